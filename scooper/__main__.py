@@ -22,121 +22,561 @@ Notwithstanding the foregoing, third party components included herein are subjec
 noted in the files associated with those components.
 """
 
+import sys
+
+from scooper.core.utils.profiling import PROFILER
+
+if "--profile" in sys.argv[1:]:
+    PROFILER.enable()
+    PROFILER.begin("import")
+
+from scooper.core.constants import CBS_COMMON_LAYER_ARN
 from scooper.core.lambda_layer import LambdaLayer
 
-LambdaLayer.import_layer(
-    "arn:aws:lambda:ca-central-1:495075646178:layer:CBSCommonLayer:13", "cbs_common"
-)
+LambdaLayer.import_layer(CBS_COMMON_LAYER_ARN, "cbs_common")
+from contextlib import contextmanager
 from dataclasses import asdict, is_dataclass
-from json import load
+from datetime import datetime, timedelta
+from json import dumps, load
 from os import getenv
 from pathlib import Path
 from string import Template
 from subprocess import run
+from typing import Any, Iterator, Optional
 
 from aws_cdk import App, Environment
+from boto3 import Session
+from botocore.exceptions import ClientError
 from cbs_common.aws.organization_metadata import OrganizationMetadata
 from cbs_common.aws.sso_metadata import SSOMetadata
-from click import group
+from click import ClickException, UsageError, echo, get_current_context, group
 
+from scooper.cdk.scooper.fanout_stack import ScooperFanOut
 from scooper.cdk.scooper.scooper_stack import Scooper
 from scooper.core.cli import options
 from scooper.core.cli.callbacks import S3LifecycleRule
 from scooper.core.config import ScooperConfig
-from scooper.core.constants import ORG, SCOOPER
+from scooper.core.constants import HIVE, ORG, SCOOPER, TRAIL
 from scooper.core.lambda_layer import LambdaLayer
-from scooper.core.utils.io import date_range_input, write_dict_to_file, write_dict_to_s3
+from scooper.core.utils.cassette import CASSETTE, REPLAY
+from scooper.core.utils.io import (
+    LOOKUP_EVENTS_RETENTION,
+    S3Publisher,
+    ShardedReportWriter,
+    date_range_input,
+    write_dict_to_file,
+)
 from scooper.core.utils.logger import get_logger
-from scooper.incident_response.cloudtrail import write_cloudtrail_scoop_to_s3
+from scooper.core.utils.metrics import API_METRICS
+from scooper.core.utils.progress import PROGRESS
+from scooper.core.utils.queues import SQS_MAX_WAIT_SECONDS, LocalQueue, SQSQueue
+from scooper.core.utils.shards import Shard, download_shards, merge_shards
+from scooper.core.utils.snapshot import DEFAULT_COMPRESSION, write_report_snapshot
+from scooper.core.utils.tracing import TRACER
+from scooper.fanout.run import FANOUT_STACK, FanOutRun
+from scooper.incident_response.cloudtrail import (
+    EventFilter,
+    select_trail,
+    write_cloudtrail_scoop_to_s3,
+)
+from scooper.incident_response.partitions import PartitionLayout
+from scooper.incident_response.search import (
+    EventQuery,
+    LocalScoopStore,
+    S3ScoopStore,
+    SearchStats,
+    search_scoops,
+)
 from scooper.sources import custom, native
+from scooper.sources.inventory import Predicate, load_inventory
 from scooper.sources.report import LoggingReport
+from scooper.sources.watch import InventoryRefresher, watch
 
 _logger = get_logger()
 
 
 @group(invoke_without_command=True)
+@options.accounts
+@options.cassette_timing
 @options.cloudtrail_scoop
+@options.cloudtrail_scoop_event_category
+@options.cloudtrail_scoop_filter
+@options.cloudtrail_scoop_granularity
+@options.cloudtrail_scoop_layout
+@options.cloudtrail_scoop_max_events
+@options.cloudtrail_scoop_partition_by
+@options.cloudtrail_scoop_source
+@options.cloudwatch_listing
+@options.cloudwatch_summary
 @options.configure_logging
 @options.destroy
+@options.exclude
+@options.fanout
+@options.fanout_concurrency
+@options.inventory_ttl
 @options.level
 @options.lifecycle_rules
+@options.max_memory
+@options.ou
+@options.profile
+@options.record
+@options.replay
 @options.role_name
+@options.scoop_processes
+@options.shard
+@options.shard_bucket
+@options.shard_run_id
+@options.snapshot
+@options.trace
+@options.watch_queue
 def main(
+    accounts: tuple[str, ...],
+    cassette_timing: bool,
     cloudtrail_scoop: bool,
+    cloudtrail_scoop_event_category: str,
+    cloudtrail_scoop_filter: tuple[tuple[str, str], ...],
+    cloudtrail_scoop_granularity: str,
+    cloudtrail_scoop_layout: str,
+    cloudtrail_scoop_max_events: Optional[int],
+    cloudtrail_scoop_partition_by: Optional[str],
+    cloudtrail_scoop_source: str,
+    cloudwatch_listing: bool,
+    cloudwatch_summary: bool,
     configure_logging: bool,
     destroy: bool,
+    exclude: tuple[str, ...],
+    fanout: bool,
+    fanout_concurrency: int,
+    inventory_ttl: int,
     level: str,
     lifecycle_rules: list[S3LifecycleRule],
+    max_memory: Optional[int],
+    ou: tuple[str, ...],
+    profile: bool,
+    record: Optional[Path],
+    replay: Optional[Path],
     role_name: str,
+    scoop_processes: int,
+    shard: Optional[Shard],
+    shard_bucket: Optional[str],
+    shard_run_id: Optional[str],
+    snapshot: bool,
+    trace: bool,
+    watch_queue: bool,
 ) -> None:
-    scooper_config = ScooperConfig(level, role_name)
+    if get_current_context().invoked_subcommand is not None:
+        return
+    if record and replay:
+        raise UsageError("--record and --replay are mutually exclusive")
+    if shard and (configure_logging or destroy or cloudtrail_scoop):
+        raise UsageError(
+            "--shard can't be combined with --configure-logging, --destroy or --cloudtrail-scoop, run them after merging"
+        )
+    if bool(shard) != bool(shard_run_id):
+        raise UsageError("--shard and --shard-run-id must be given together")
+    if fanout and (level != ORG or shard or cloudwatch_listing):
+        raise UsageError(
+            "--fanout is only for org-level runs, and can't be combined with --shard or --cloudwatch-listing"
+        )
+    if cloudtrail_scoop_partition_by and cloudtrail_scoop_layout != HIVE:
+        raise UsageError(
+            "--cloudtrail-scoop-partition-by requires --cloudtrail-scoop-layout hive"
+        )
+    if record:
+        CASSETTE.record(record, timing=cassette_timing)
+        get_current_context().call_on_close(CASSETTE.close)
+    elif replay:
+        CASSETTE.replay(replay, timing=cassette_timing)
+
+    scooper_config = ScooperConfig(
+        level,
+        role_name,
+        target_accounts=accounts,
+        target_ous=ou,
+        exclude_accounts=exclude,
+        inventory_ttl=timedelta(minutes=inventory_ttl),
+        shard=shard,
+    )
+    shard = scooper_config.shard
+    # Each shard of a sharded run writes its outputs apart, to be merged later
+    out = shard.directory if shard else Path("out")
+    if profile:
+        PROFILER.end("import")
+        get_current_context().call_on_close(PROFILER.write)
+
+    if trace:
+        TRACER.enable()
+        get_current_context().call_on_close(TRACER.write)
+
+    API_METRICS.default_account_id = scooper_config.account_id
+    # Write API call metrics and final progress once the run is over, however it ends
+    get_current_context().call_on_close(API_METRICS.write)
+    get_current_context().call_on_close(PROGRESS.close)
+
+    # Per-account sources write one shard per account at org level
+    shard_writers = (
+        {
+            "cloudwatch": ShardedReportWriter("cloudwatch", root=out),
+            "iam_metadata": ShardedReportWriter("iam_metadata", root=out),
+        }
+        if level == ORG
+        else {}
+    )
 
     cloudtrail = native.CloudTrail(level)
-    cloudwatch = native.CloudWatch(level, scooper_config)
+    cloudwatch = native.CloudWatch(
+        level,
+        scooper_config,
+        summary=cloudwatch_summary,
+        listing_path=(
+            out / "cloudwatch_log_groups.ndjson" if cloudwatch_listing else None
+        ),
+        writer=shard_writers.get("cloudwatch"),
+    )
     config = native.Config(level)
     iam = custom.IAMMetadata(
         level,
         organizational_account_access_role_template=Template(
             f"arn:aws:iam::$account:role/{role_name}"
         ),
+        account_ids=[account["Id"] for account in scooper_config.accounts],
+        writer=shard_writers.get("iam_metadata"),
     )
 
-    reports = {
-        "cloudtrail": cloudtrail.report,
-        "cloudwatch": cloudwatch.report,
-        "config": config.report,
-        "iam_metadata": iam.get_report(),
-    }
+    # Organization-wide sources only run in the first shard of a sharded run
+    org_wide = shard is None or shard.is_first
+    reports = {}
+
+    if org_wide:
+        reports["cloudtrail"] = cloudtrail.report
+    if fanout:
+        with _source("FanOut"):
+            reports.update(
+                _fan_out(
+                    scooper_config,
+                    shard_writers,
+                    max_concurrency=fanout_concurrency,
+                    cloudwatch_summary=cloudwatch_summary,
+                )
+            )
+    if "cloudwatch" not in reports:
+        reports["cloudwatch"] = cloudwatch.report
+    if org_wide:
+        reports["config"] = config.report
 
-    if level == ORG:
-        reports["organization_metadata"] = OrganizationMetadata().get_report()
-        reports["sso_metadata"] = SSOMetadata().get_report()
+    if "iam_metadata" not in reports:
+        with _source("IAMMetadata"):
+            reports["iam_metadata"] = iam.get_report()
 
-    for title, report in reports.items():
-        write_dict_to_file(
-            asdict(report) if is_dataclass(report) else report,
-            Path(f"out/{title}.json"),
+    if level == ORG and org_wide:
+        if CASSETTE.mode == REPLAY:
+            _logger.warning(
+                "Organization and SSO metadata are collected with CBS Common's own clients, which still call AWS when replaying"
+            )
+        with _source("OrganizationMetadata"):
+            reports["organization_metadata"] = OrganizationMetadata().get_report()
+        with _source("SSOMetadata"):
+            reports["sso_metadata"] = SSOMetadata().get_report()
+
+    with PROFILER.phase("write_reports"):
+        for title, report in reports.items():
+            write_dict_to_file(
+                asdict(report) if is_dataclass(report) else report,
+                out / f"{title}.json",
+            )
+
+    if snapshot:
+        with PROFILER.phase("write_snapshot"):
+            write_report_snapshot(
+                reports,
+                out / "reports.snapshot",
+                shard_writers=shard_writers,
+                compression=DEFAULT_COMPRESSION,
+            )
+
+    if shard:
+        shard.write_manifest(
+            shard_run_id,
+            level=level,
+            accounts=[account["Id"] for account in scooper_config.accounts],
+        )
+        if shard_bucket:
+            shard.upload(shard_bucket)
+        _logger.info(
+            "Shard %s done, run `scooper merge` once every shard is", shard.name
         )
 
     if configure_logging or destroy:
         _configure_logging(
             scooper_config=scooper_config,
             reports=reports,
+            shard_writers=shard_writers,
             destroy=destroy,
             lifecycle_rules=lifecycle_rules,
+            watch=watch_queue,
+            fanout=fanout,
         )
 
     if cloudtrail_scoop:
         _logger.info("Starting CloudTrail Scoop...")
-        start_time, end_time = date_range_input()
+        trail = None
+        if cloudtrail_scoop_source == TRAIL:
+            region = Session().region_name
+            trail = select_trail(reports["cloudtrail"].details["trails"], region)
+            if trail is None:
+                _logger.warning(
+                    "No trail logs region '%s' to S3, falling back to LookupEvents",
+                    region,
+                )
+        # Trails' log files go back as far as they're retained, unlike LookupEvents
+        start_time, end_time = date_range_input(
+            max_age=None if trail is not None else LOOKUP_EVENTS_RETENTION
+        )
         bucket_name = input(
             "Enter name of bucket you want to dump historical logs to: "
         ).strip()
-        write_cloudtrail_scoop_to_s3(start_time, end_time, bucket_name)
+        with _source("CloudTrailScoop"):
+            write_cloudtrail_scoop_to_s3(
+                start_time,
+                end_time,
+                bucket_name,
+                trail,
+                processes=scoop_processes,
+                event_filter=EventFilter(
+                    cloudtrail_scoop_filter, cloudtrail_scoop_event_category
+                ),
+                layout=PartitionLayout(
+                    cloudtrail_scoop_layout,
+                    cloudtrail_scoop_granularity,
+                    cloudtrail_scoop_max_events,
+                    cloudtrail_scoop_partition_by,
+                ),
+                max_memory=max_memory,
+            )
+
+
+@main.command()
+@options.shard_bucket
+def merge(shard_bucket: Optional[str]) -> None:
+    """Merge outputs of every shard of a run split with --shard into out/."""
+    if shard_bucket:
+        download_shards(shard_bucket)
+    try:
+        merge_shards()
+    except ValueError as e:
+        raise ClickException(str(e))
+
+
+@main.command("watch")
+@options.accounts
+@options.cloudwatch_summary
+@options.exclude
+@options.level
+@options.local_queue
+@options.once
+@options.ou
+@options.queue_url
+@options.role_name
+def watch_command(
+    accounts: tuple[str, ...],
+    cloudwatch_summary: bool,
+    exclude: tuple[str, ...],
+    level: str,
+    local_queue: Optional[Path],
+    once: bool,
+    ou: tuple[str, ...],
+    queue_url: Optional[str],
+    role_name: str,
+) -> None:
+    """Refresh reports in out/ as changes to logging configuration are queued."""
+    if bool(queue_url) == bool(local_queue):
+        raise UsageError("Watch either --queue-url or --local-queue")
+
+    scooper_config = ScooperConfig(
+        level,
+        role_name,
+        target_accounts=accounts,
+        target_ous=ou,
+        exclude_accounts=exclude,
+    )
+    queue = LocalQueue(local_queue) if local_queue else SQSQueue(queue_url)
+    refresher = InventoryRefresher(
+        scooper_config, Session().region_name, cloudwatch_summary=cloudwatch_summary
+    )
+
+    _logger.info("Watching %s for changes...", local_queue or queue_url)
+    refreshed = watch(
+        queue, refresher, wait_seconds=0 if once else SQS_MAX_WAIT_SECONDS, once=once
+    )
+    _logger.info("Refreshed %d changes", refreshed)
+
+
+@main.command()
+@options.group_by
+@options.report
+@options.sort_by
+@options.top
+@options.where
+def query(
+    group_by: Optional[str],
+    report: Path,
+    sort_by: str,
+    top: Optional[int],
+    where: tuple[Predicate, ...],
+) -> None:
+    """Query Log Groups of the CloudWatch report of the last run in out/."""
+    try:
+        inventory = load_inventory(report)
+    except (KeyError, ValueError) as e:
+        raise ClickException(f"Can't query {report}: {e}")
+
+    mask = inventory.mask(where)
+    _logger.info("%d of %d Log Groups match", mask.sum(), len(inventory))
+    if group_by:
+        echo(dumps(inventory.group_by(group_by, mask, top), indent=2))
+    else:
+        echo(dumps(inventory.top(top, sort_by, mask), indent=2))
+
+
+@main.command()
+@options.end_time
+@options.match
+@options.scoop_bucket
+@options.scoop_dir
+@options.search_processes
+@options.start_time
+def search(
+    end_time: Optional[datetime],
+    match: tuple[tuple[str, str], ...],
+    scoop_bucket: Optional[str],
+    scoop_dir: Optional[Path],
+    search_processes: int,
+    start_time: Optional[datetime],
+) -> None:
+    """Search CloudTrail Scoops for events matching every --match, output as NDJSON."""
+    if bool(scoop_bucket) == bool(scoop_dir):
+        raise UsageError("Search either --scoop-bucket or --scoop-dir")
+    if start_time and end_time and start_time >= end_time:
+        raise UsageError("--start-time must be before --end-time")
+
+    store = LocalScoopStore(scoop_dir) if scoop_dir else S3ScoopStore(scoop_bucket)
+    stats = SearchStats()
+    for lines in search_scoops(
+        store, EventQuery(match, start_time, end_time), search_processes, stats
+    ):
+        echo(lines, nl=False)
+    _logger.info(
+        "%d events matched in %d of %d objects of %d scoops",
+        stats.events,
+        stats.searched,
+        stats.objects,
+        stats.scoops,
+    )
+
+
+def _fan_out(
+    scooper_config: ScooperConfig,
+    shard_writers: dict[str, ShardedReportWriter],
+    max_concurrency: int,
+    cloudwatch_summary: bool,
+) -> dict[str, Any]:
+    """Enumerate per-account sources with the fan-out stack, if it's been deployed."""
+    try:
+        run = FanOutRun.from_stack()
+    except ClientError:
+        _logger.warning(
+            "%s stack isn't deployed yet, enumerating accounts locally", FANOUT_STACK
+        )
+        return {}
+
+    run.start(
+        [account["Id"] for account in scooper_config.accounts],
+        max_concurrency=max_concurrency,
+        cloudwatch_summary=cloudwatch_summary,
+    )
+    try:
+        run.wait()
+    except RuntimeError as e:
+        raise ClickException(str(e))
+
+    # Same rules as a local run's CloudWatch.get_report
+    cloudwatch_accounts = 0
+    logging_enabled = False
+    for _, log_groups in run.collect("cloudwatch", shard_writers["cloudwatch"]):
+        cloudwatch_accounts += 1
+        if cloudwatch_summary:
+            logging_enabled = logging_enabled or native.CloudWatch.has_log_groups(
+                log_groups
+            )
+    if not cloudwatch_summary:
+        logging_enabled = cloudwatch_accounts > 0
+    accounts = sum(
+        1 for _ in run.collect("iam_metadata", shard_writers["iam_metadata"])
+    )
+    _logger.info("Collected fan-out results of %d accounts", accounts)
+
+    return {
+        "cloudwatch": LoggingReport(
+            service="CloudWatch",
+            logging_enabled=logging_enabled,
+            details={
+                "level": ORG,
+                "shards": shard_writers["cloudwatch"].close(
+                    service="CloudWatch", level=ORG
+                ),
+            },
+        ),
+        "iam_metadata": {"shards": shard_writers["iam_metadata"].close()},
+    }
+
+
+@contextmanager
+def _source(name: str) -> Iterator[None]:
+    """Attribute API calls and trace spans within context to source `name`."""
+    with API_METRICS.source(name), TRACER.span(name, "source"):
+        yield
 
 
 def _configure_logging(
     scooper_config: ScooperConfig,
     reports: dict[str, LoggingReport],
+    shard_writers: dict[str, ShardedReportWriter],
     destroy: bool,
     lifecycle_rules: list[S3LifecycleRule],
+    watch: bool,
+    fanout: bool,
 ) -> None:
     app = App()
     stack_name = SCOOPER
+    env = Environment(
+        account=getenv("CDK_DEFAULT_ACCOUNT"), region=getenv("CDK_DEFAULT_REGION")
+    )
 
-    Scooper(
+    scooper = Scooper(
         app,
         stack_name,
         scooper_config=scooper_config,
         logging_reports=[
             report for report in reports.values() if isinstance(report, LoggingReport)
         ],
-        env=Environment(
-            account=getenv("CDK_DEFAULT_ACCOUNT"), region=getenv("CDK_DEFAULT_REGION")
-        ),
+        env=env,
         termination_protection=True,
         lifecycle_rules=lifecycle_rules,
+        watch=watch,
     )
+    if fanout:
+        ScooperFanOut(
+            app,
+            FANOUT_STACK,
+            scooper_config=scooper_config,
+            scooper_bucket=scooper.scooper_bucket,
+            env=env,
+        )
+    # Apps of more than one stack must be told to deploy or destroy them all
+    all_stacks = ["--all"] if fanout else []
+
+    with PROFILER.phase("cdk_synth"):
+        cloud_assembly_directory = app.synth().directory
 
     if destroy:
         run(
@@ -154,7 +594,8 @@ def _configure_logging(
                 "cdk",
                 "destroy",
                 "--app",
-                app.synth().directory,
+                cloud_assembly_directory,
+                *all_stacks,
             ]
         )
         return
@@ -166,8 +607,9 @@ def _configure_logging(
             "cdk",
             "deploy",
             "--app",
-            app.synth().directory,
+            cloud_assembly_directory,
             f"--outputs-file={stack_outputs}",
+            *all_stacks,
         ]
     )
 
@@ -193,19 +635,16 @@ def _configure_logging(
 
     if scooper_config.level == ORG:
         _logger.info("Publishing %s metadata...", stack_name)
-        for name, report in reports.items():
-            if isinstance(report, LoggingReport):
-                write_dict_to_s3(
-                    report.details,
-                    bucket_name,
-                    f"scooper/{name}.json",
-                )
-            else:
-                write_dict_to_s3(
-                    report,
-                    bucket_name,
+        with S3Publisher(bucket_name) as publisher:
+            for name, report in reports.items():
+                publisher.publish_dict(
+                    report.details if isinstance(report, LoggingReport) else report,
                     f"scooper/{name}.json",
                 )
+                if name in shard_writers:
+                    # Upload per-account shards as they are rather than re-serializing them
+                    for file_name, path in shard_writers[name].paths.items():
+                        publisher.publish_file(path, f"scooper/{name}/{file_name}")
 
 
 if __name__ == "__main__":
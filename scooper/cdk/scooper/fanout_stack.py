@@ -0,0 +1,192 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import aws_cdk as cdk
+import aws_cdk.aws_iam as iam
+import aws_cdk.aws_lambda as lambda_
+import aws_cdk.aws_s3 as s3
+import aws_cdk.aws_stepfunctions as sfn
+import aws_cdk.aws_stepfunctions_tasks as tasks
+import jsii
+from constructs import Construct
+
+from scooper.core.config import ScooperConfig
+from scooper.core.constants import CBS_COMMON_LAYER_ARN
+from scooper.fanout.run import RUNS_PREFIX
+from scooper.fanout.worker import BUCKET_NAME_VARIABLE, ROLE_NAME_VARIABLE
+
+PACKAGE_PATH = Path(__file__).parents[2]
+REQUIREMENTS_PATH = PACKAGE_PATH / "fanout" / "requirements.txt"
+# The worker only needs the package's enumeration code
+ASSET_EXCLUDE = ["cdk", "**/__pycache__", "**/tests", "out"]
+
+
+@jsii.implements(cdk.ILocalBundling)
+class _LocalBundling:
+    """Bundle the worker with pip on the host, sparing deployments a Docker daemon."""
+
+    def try_bundle(self, output_dir: str, *, image: cdk.DockerImage, **_) -> bool:
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "pip",
+                "install",
+                "--quiet",
+                "--requirement",
+                str(REQUIREMENTS_PATH),
+                "--target",
+                output_dir,
+                # Install wheels for the Lambda runtime, whichever platform bundles them
+                "--platform",
+                "manylinux2014_x86_64",
+                "--implementation",
+                "cp",
+                "--python-version",
+                "3.11",
+                "--only-binary=:all:",
+            ]
+        )
+        if result.returncode != 0:
+            return False
+
+        shutil.copytree(
+            PACKAGE_PATH,
+            Path(output_dir) / "scooper",
+            ignore=shutil.ignore_patterns("cdk", "__pycache__", "tests", "out"),
+            dirs_exist_ok=True,
+        )
+        return True
+
+
+class ScooperFanOut(cdk.Stack):
+    """Enumeration of organization accounts by a Lambda worker per account, fanned out by
+    a Step Functions distributed map over an account list in the Scooper bucket.
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        scooper_config: ScooperConfig,
+        scooper_bucket: s3.IBucket,
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        self.worker = lambda_.Function(
+            self,
+            "Worker",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="scooper.fanout.worker.handler",
+            code=lambda_.Code.from_asset(
+                str(PACKAGE_PATH),
+                exclude=ASSET_EXCLUDE,
+                bundling=cdk.BundlingOptions(
+                    image=lambda_.Runtime.PYTHON_3_11.bundling_image,
+                    command=[
+                        "bash",
+                        "-c",
+                        "pip install --requirement fanout/requirements.txt --target /asset-output"
+                        " && mkdir /asset-output/scooper && cp -r . /asset-output/scooper",
+                    ],
+                    local=_LocalBundling(),
+                ),
+            ),
+            layers=[
+                lambda_.LayerVersion.from_layer_version_arn(
+                    self, "CBSCommonLayer", CBS_COMMON_LAYER_ARN
+                )
+            ],
+            environment={
+                BUCKET_NAME_VARIABLE: scooper_bucket.bucket_name,
+                ROLE_NAME_VARIABLE: scooper_config.org_role_name,
+            },
+            memory_size=512,
+            timeout=cdk.Duration.minutes(15),
+        )
+        self.worker.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=["sts:AssumeRole"],
+                resources=[f"arn:aws:iam::*:role/{scooper_config.org_role_name}"],
+            )
+        )
+        # The management account is enumerated with the worker's own role
+        self.worker.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=[
+                    "iam:Generate*",
+                    "iam:Get*",
+                    "iam:List*",
+                    "logs:DescribeLogGroups",
+                ],
+                resources=["*"],
+            )
+        )
+        scooper_bucket.grant_put(self.worker, f"{RUNS_PREFIX}/*")
+
+        enumerate_account = tasks.LambdaInvoke(
+            self,
+            "EnumerateAccount",
+            lambda_function=self.worker,
+            payload_response_only=True,
+            result_path=sfn.JsonPath.DISCARD,
+        )
+        enumerate_accounts = sfn.DistributedMap(
+            self,
+            "EnumerateAccounts",
+            item_reader=sfn.S3JsonItemReader(
+                bucket=scooper_bucket,
+                key=sfn.JsonPath.string_at("$.accounts_key"),
+            ),
+            item_selector={
+                "account_id": sfn.JsonPath.string_at("$$.Map.Item.Value"),
+                "run_prefix": sfn.JsonPath.string_at("$.run_prefix"),
+                "cloudwatch_summary": sfn.JsonPath.string_at("$.cloudwatch_summary"),
+            },
+            max_concurrency_path=sfn.JsonPath.string_at("$.max_concurrency"),
+            # Per-account results go to the bucket, rather than the execution's output
+            result_writer=sfn.ResultWriter(
+                bucket=scooper_bucket, prefix=f"{RUNS_PREFIX}/results"
+            ),
+            result_path=sfn.JsonPath.DISCARD,
+        )
+        enumerate_accounts.item_processor(enumerate_account)
+
+        self.state_machine = sfn.StateMachine(
+            self,
+            "StateMachine",
+            definition_body=sfn.DefinitionBody.from_chainable(enumerate_accounts),
+        )
+        scooper_bucket.grant_read_write(self.state_machine, f"{RUNS_PREFIX}/*")
+
+        cdk.CfnOutput(self, "BucketName", value=scooper_bucket.bucket_name)
+        cdk.CfnOutput(
+            self, "StateMachineArn", value=self.state_machine.state_machine_arn
+        )
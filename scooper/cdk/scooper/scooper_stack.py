@@ -33,6 +33,7 @@ import aws_cdk.aws_logs as logs
 import aws_cdk.aws_s3 as s3
 from constructs import Construct
 
+from scooper.cdk.scooper.watch import Watch
 from scooper.core.cli.callbacks import S3LifecycleRule
 from scooper.core.config import ScooperConfig
 from scooper.core.constants import ORG
@@ -50,6 +51,7 @@ class Scooper(cdk.Stack):
         scooper_config: ScooperConfig,
         logging_reports: list[LoggingReport],
         lifecycle_rules: list[S3LifecycleRule],
+        watch: bool = False,
         **kwargs,
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
@@ -98,6 +100,10 @@ class Scooper(cdk.Stack):
 
         cdk.CfnOutput(self, "BucketName", value=self.scooper_bucket.bucket_name)
 
+        if watch:
+            self.watch = Watch(self, "Watch", scooper_config=self.scooper_config)
+            cdk.CfnOutput(self, "WatchQueueUrl", value=self.watch.queue.queue_url)
+
     @staticmethod
     def check_logging(logging_report: LoggingReport) -> bool:
         """Check `if (logging is enabled and owned by Scooper) or (logging is disabled and not owned by Scooper)`."""
@@ -0,0 +1,102 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+import aws_cdk as cdk
+import aws_cdk.aws_events as events
+import aws_cdk.aws_events_targets as targets
+import aws_cdk.aws_sqs as sqs
+from constructs import Construct
+
+from scooper.core.config import ScooperConfig
+from scooper.core.constants import ORG, WATCHED_EVENTS
+from scooper.core.utils.queues import MAX_RECEIVE_COUNT, VISIBILITY_TIMEOUT_SECONDS
+
+
+class Watch(Construct):
+    """EventBridge rule sending changes to logging configuration to a queue consumed by `scooper watch`."""
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        scooper_config: ScooperConfig,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        # Changes that keep failing to refresh are set aside rather than retried forever
+        dead_letter_queue = sqs.Queue(
+            self,
+            "DeadLetterQueue",
+            encryption=sqs.QueueEncryption.SQS_MANAGED,
+            enforce_ssl=True,
+            retention_period=cdk.Duration.days(14),
+        )
+        self.queue = sqs.Queue(
+            self,
+            "Queue",
+            encryption=sqs.QueueEncryption.SQS_MANAGED,
+            enforce_ssl=True,
+            visibility_timeout=cdk.Duration.seconds(VISIBILITY_TIMEOUT_SECONDS),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=MAX_RECEIVE_COUNT, queue=dead_letter_queue
+            ),
+        )
+
+        rule = events.Rule(
+            self,
+            "Rule",
+            description="Changes to logging configuration watched by Scooper",
+            event_pattern=events.EventPattern(
+                source=[
+                    f"aws.{event_source.split('.')[0]}"
+                    for event_source in WATCHED_EVENTS
+                ],
+                detail_type=["AWS API Call via CloudTrail"],
+                detail={
+                    "eventSource": list(WATCHED_EVENTS),
+                    "eventName": sorted(
+                        {name for names in WATCHED_EVENTS.values() for name in names}
+                    ),
+                },
+            ),
+        )
+        rule.add_target(targets.SqsQueue(self.queue))
+
+        if scooper_config.level == ORG:
+            # Let member accounts forward their own changes to this account's default bus
+            stack = cdk.Stack.of(self)
+            events.CfnEventBusPolicy(
+                self,
+                "OrganizationEventBusPolicy",
+                statement_id="ScooperWatchOrganization",
+                statement={
+                    "Effect": "Allow",
+                    "Principal": "*",
+                    "Action": "events:PutEvents",
+                    "Resource": f"arn:{stack.partition}:events:{stack.region}:{stack.account}:event-bus/default",
+                    "Condition": {
+                        "StringEquals": {"aws:PrincipalOrgID": scooper_config.org_id}
+                    },
+                },
+            )
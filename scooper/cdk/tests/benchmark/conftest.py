@@ -0,0 +1,67 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+import tracemalloc
+from json import dump
+from os import getenv
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable
+
+from pytest import fixture, mark
+
+from scooper.cdk.tests.unit.conftest import *  # NOQA
+
+benchmark = mark.skipif(
+    not getenv("SCOOPER_BENCHMARK"),
+    reason="Set SCOOPER_BENCHMARK=1 to run benchmarks",
+)
+
+
+def measure(func: Callable[[], Any]) -> dict[str, float]:
+    """Time `func` end to end and record its tracemalloc peak."""
+    tracemalloc.start()
+    start_time = perf_counter()
+    try:
+        func()
+        seconds = perf_counter() - start_time
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": seconds, "peak_bytes": peak_bytes}
+
+
+@fixture(scope="session")
+def benchmark_results():
+    """Collect benchmark results, writing them to `SCOOPER_BENCHMARK_OUTPUT` when done."""
+    results: dict[str, list[dict[str, Any]]] = {}
+    yield results
+
+    if results:
+        output = Path(getenv("SCOOPER_BENCHMARK_OUTPUT", "out/benchmark"))
+        output.mkdir(parents=True, exist_ok=True)
+        for name, points in results.items():
+            with (output / f"{name}.json").open("w") as f:
+                dump({"benchmark": name, "points": points}, f, indent=2)
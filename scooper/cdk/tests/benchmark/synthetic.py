@@ -0,0 +1,348 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from json import dumps, loads
+from math import ceil
+from os import getenv
+from pathlib import Path
+from threading import Lock
+from time import monotonic
+from typing import Any, Optional
+from uuid import UUID
+
+from boto3 import Session, client
+from botocore.awsrequest import AWSPreparedRequest, AWSResponse
+from botocore.client import BaseClient
+
+ROLE_NAME = "OrganizationAccountAccessRole"
+
+
+def _sizes(name: str, default: str) -> list[int]:
+    return [int(size) for size in getenv(name, default).split(",")]
+
+
+@dataclass(frozen=True)
+class OrgShape:
+    """Shape of a synthetic organization, configurable through `SCOOPER_BENCHMARK_*` variables."""
+
+    accounts: int
+    regions: int = int(getenv("SCOOPER_BENCHMARK_REGIONS", "2"))
+    trails: int = int(getenv("SCOOPER_BENCHMARK_TRAILS", "2"))
+    config_recorders: int = int(getenv("SCOOPER_BENCHMARK_CONFIG_RECORDERS", "1"))
+    log_groups: int = int(getenv("SCOOPER_BENCHMARK_LOG_GROUPS", "25"))
+
+    @classmethod
+    def scaling_curve(cls) -> list["OrgShape"]:
+        return [
+            cls(accounts=accounts)
+            for accounts in _sizes("SCOOPER_BENCHMARK_ACCOUNTS", "1,5,25")
+        ]
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _regions(count: int) -> list[str]:
+    regions = ["us-east-1"] + [
+        region
+        for region in Session().get_available_regions("cloudtrail")
+        if region != "us-east-1"
+    ]
+    return regions[:count]
+
+
+def _member_client(account_id: str, service: str, **kwargs) -> Any:
+    credentials = client("sts").assume_role(
+        RoleArn=f"arn:aws:iam::{account_id}:role/{ROLE_NAME}",
+        RoleSessionName="ScooperBenchmark",
+    )["Credentials"]
+    return client(
+        service,
+        aws_access_key_id=credentials["AccessKeyId"],
+        aws_secret_access_key=credentials["SecretAccessKey"],
+        aws_session_token=credentials["SessionToken"],
+        **kwargs,
+    )
+
+
+def build_org(shape: OrgShape) -> list[str]:
+    """Create synthetic organization of given shape in moto, returning its member account IDs."""
+    organizations_client = client("organizations")
+    organizations_client.create_organization(FeatureSet="ALL")
+    regions = _regions(shape.regions)
+
+    # Trails and Config recorders live in the management account
+    s3_client = client("s3")
+    s3_client.create_bucket(Bucket="scooper-benchmark-trails")
+    for region in regions:
+        cloudtrail_client = client("cloudtrail", region_name=region)
+        for trail in range(shape.trails):
+            cloudtrail_client.create_trail(
+                Name=f"trail-{region}-{trail}",
+                S3BucketName="scooper-benchmark-trails",
+                IsMultiRegionTrail=region == regions[0] and trail == 0,
+            )
+    for region in regions[: shape.config_recorders]:
+        client("config", region_name=region).put_configuration_recorder(
+            ConfigurationRecorder={
+                "name": f"recorder-{region}",
+                "roleARN": f"arn:aws:iam::123456789012:role/{ROLE_NAME}",
+                "recordingGroup": {
+                    "allSupported": True,
+                    "includeGlobalResourceTypes": True,
+                },
+            }
+        )
+
+    account_ids = []
+    for account in range(shape.accounts):
+        account_id = organizations_client.create_account(
+            AccountName=f"account-{account}",
+            Email=f"account-{account}@example.com",
+        )["CreateAccountStatus"]["AccountId"]
+        logs_client = _member_client(account_id, "logs")
+        for log_group in range(shape.log_groups):
+            logs_client.create_log_group(logGroupName=f"/scooper/benchmark/{log_group}")
+        account_ids.append(account_id)
+
+    return account_ids
+
+
+class _Body:
+    def __init__(self, body: bytes) -> None:
+        self._body = body
+
+    def stream(self, **_) -> list[bytes]:
+        return [self._body]
+
+
+def _response(
+    request: AWSPreparedRequest, status_code: int, body: bytes
+) -> AWSResponse:
+    return AWSResponse(
+        request.url,
+        status_code,
+        {"content-length": str(len(body)), "x-amzn-requestid": "scooper-benchmark"},
+        _Body(body),
+    )
+
+
+_EVENTS = (
+    ("ec2.amazonaws.com", "DescribeInstances", True),
+    ("s3.amazonaws.com", "GetBucketAcl", True),
+    ("iam.amazonaws.com", "ListRoles", True),
+    ("sts.amazonaws.com", "AssumeRole", False),
+    ("ec2.amazonaws.com", "RunInstances", False),
+    ("kms.amazonaws.com", "Decrypt", True),
+)
+
+
+@dataclass(frozen=True)
+class ScoopShape:
+    """Shape of a synthetic CloudTrail scoop, configurable through `SCOOPER_BENCHMARK_*` variables.
+
+    `throttle_tps` emulates LookupEvents' 2 TPS limit when set, at the cost of making
+    the benchmark as slow as a real scoop.
+    """
+
+    events_per_hour: int
+    hours: int = int(getenv("SCOOPER_BENCHMARK_SCOOP_HOURS", "24"))
+    processes: int = int(getenv("SCOOPER_BENCHMARK_SCOOP_PROCESSES", "1"))
+    throttle_tps: Optional[float] = (
+        float(getenv("SCOOPER_BENCHMARK_THROTTLE_TPS"))
+        if getenv("SCOOPER_BENCHMARK_THROTTLE_TPS")
+        else None
+    )
+
+    @classmethod
+    def scaling_curve(cls) -> list["ScoopShape"]:
+        return [
+            cls(events_per_hour=events_per_hour)
+            for events_per_hour in _sizes(
+                "SCOOPER_BENCHMARK_EVENTS_PER_HOUR", "1000,10000"
+            )
+        ]
+
+    @property
+    def events(self) -> int:
+        return self.events_per_hour * self.hours
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "events": self.events}
+
+
+class SyntheticLookupEvents:
+    """Local stand-in for CloudTrail's LookupEvents answering a real botocore client.
+
+    Events fall on a fixed grid of `events_per_hour` and are generated on demand, newest
+    first, 50 to a page like the real API. Responses are served from botocore's
+    `before-send` event, so retries and response parsing run exactly as they would
+    against AWS.
+    """
+
+    PAGE_SIZE = 50
+
+    def __init__(
+        self, events_per_hour: int, throttle_tps: Optional[float] = None
+    ) -> None:
+        self.step = 3600 / events_per_hour
+        self.throttle_tps = throttle_tps
+        self.requests = 0
+        self.throttled = 0
+        self._tokens = throttle_tps or 0.0
+        self._refilled_at = monotonic()
+        self._lock = Lock()
+
+    def attach(self, cloudtrail_client: BaseClient) -> BaseClient:
+        cloudtrail_client.meta.events.register_first(
+            "before-send.cloudtrail.LookupEvents", self
+        )
+        return cloudtrail_client
+
+    def _throttled(self) -> bool:
+        if self.throttle_tps is None:
+            return False
+
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(
+                self.throttle_tps,
+                self._tokens + (now - self._refilled_at) * self.throttle_tps,
+            )
+            self._refilled_at = now
+            if self._tokens < 1:
+                self.throttled += 1
+                return True
+            self._tokens -= 1
+            return False
+
+    def _event(self, index: int, account_id: str) -> dict[str, Any]:
+        event_source, event_name, read_only = _EVENTS[index % len(_EVENTS)]
+        event_time = index * self.step
+        event_id = str(UUID(int=index))
+        timestamp = (
+            f"{datetime.fromtimestamp(event_time, timezone.utc):%Y-%m-%dT%H:%M:%SZ}"
+        )
+        user_name = f"user-{index % 97}"
+        cloudtrail_event = {
+            "eventVersion": "1.08",
+            "userIdentity": {
+                "type": "IAMUser",
+                "principalId": f"AIDA{index % 97:016d}",
+                "arn": f"arn:aws:iam::{account_id}:user/{user_name}",
+                "accountId": account_id,
+                "accessKeyId": f"AKIA{index % 89:016d}",
+                "userName": user_name,
+            },
+            "eventTime": timestamp,
+            "eventSource": event_source,
+            "eventName": event_name,
+            "awsRegion": "us-east-1",
+            "sourceIPAddress": f"10.{index % 251}.{index % 241}.{index % 239}",
+            "userAgent": "aws-cli/2.15.0 Python/3.11.6 Linux/6.1 exe/x86_64",
+            "requestParameters": {"maxResults": 1000, "filterSet": {}},
+            "responseElements": None,
+            "requestID": event_id,
+            "eventID": event_id,
+            "readOnly": read_only,
+            "eventType": "AwsApiCall",
+            "managementEvent": True,
+            "recipientAccountId": account_id,
+            "eventCategory": "Management",
+        }
+        return {
+            "EventId": event_id,
+            "EventName": event_name,
+            "ReadOnly": str(read_only).lower(),
+            "AccessKeyId": cloudtrail_event["userIdentity"]["accessKeyId"],
+            "EventTime": event_time,
+            "EventSource": event_source,
+            "Username": user_name,
+            "Resources": [],
+            "CloudTrailEvent": dumps(cloudtrail_event),
+        }
+
+    def __call__(self, request: AWSPreparedRequest, **_) -> AWSResponse:
+        with self._lock:
+            self.requests += 1
+        if self._throttled():
+            return _response(
+                request,
+                400,
+                dumps(
+                    {"__type": "ThrottlingException", "message": "Rate exceeded"}
+                ).encode(),
+            )
+
+        params = loads(request.body)
+        # Indices of grid events in [StartTime, EndTime), served newest first
+        first = ceil(params["StartTime"] / self.step)
+        last = ceil(params["EndTime"] / self.step) - 1
+        newest = int(params.get("NextToken", last))
+        oldest = max(first, newest - self.PAGE_SIZE + 1)
+
+        page: dict[str, Any] = {
+            "Events": [
+                self._event(index, "123456789012")
+                for index in range(newest, oldest - 1, -1)
+            ]
+        }
+        if oldest > first:
+            page["NextToken"] = str(oldest - 1)
+
+        return _response(request, 200, dumps(page).encode())
+
+
+class LocalS3:
+    """Local stand-in for S3's PutObject, optionally writing objects under `root`."""
+
+    def __init__(self, root: Optional[Path] = None) -> None:
+        self.root = root
+        self.objects = 0
+        self.bytes = 0
+        self._lock = Lock()
+
+    def attach(self, s3_client: BaseClient) -> BaseClient:
+        s3_client.meta.events.register_first("before-send.s3.PutObject", self)
+        return s3_client
+
+    def __call__(self, request: AWSPreparedRequest, **_) -> AWSResponse:
+        body = request.body
+        if hasattr(body, "read"):
+            body = body.read()
+
+        if self.root is not None:
+            path = self.root / request.url.split("://", 1)[1].split("?")[0]
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(body)
+
+        with self._lock:
+            self.objects += 1
+            self.bytes += len(body)
+
+        response = _response(request, 200, b"")
+        response.headers["ETag"] = '"scooper-benchmark"'
+        return response
@@ -0,0 +1,102 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from datetime import timedelta
+from importlib.util import find_spec
+from unittest.mock import patch
+
+import botocore
+from moto import (
+    mock_cloudtrail,
+    mock_config,
+    mock_iam,
+    mock_logs,
+    mock_organizations,
+    mock_s3,
+    mock_sts,
+)
+from pytest import mark
+
+from scooper.cdk.tests.benchmark.conftest import benchmark, measure
+from scooper.cdk.tests.benchmark.synthetic import ROLE_NAME, OrgShape, build_org
+from scooper.core.constants import ORG
+
+pytestmark = benchmark
+
+orig = botocore.client.BaseClient._make_api_call
+
+
+def mock_make_api_call(self, operation_name, kwarg):
+    # moto doesn't implement Config's delivery channel status
+    if operation_name == "DescribeDeliveryChannelStatus":
+        return {"DeliveryChannelsStatus": []}
+    return orig(self, operation_name, kwarg)
+
+
+@mark.parametrize(
+    "shape", OrgShape.scaling_curve(), ids=lambda shape: f"{shape.accounts}-accounts"
+)
+@patch("botocore.client.BaseClient._make_api_call", new=mock_make_api_call)
+@mock_cloudtrail
+@mock_config
+@mock_iam
+@mock_logs
+@mock_organizations
+@mock_s3
+@mock_sts
+def test_enumeration_scaling(shape, benchmark_results, tmp_path, monkeypatch):
+    from scooper.core.config import ScooperConfig
+    from scooper.sources.native import CloudTrail, CloudWatch, Config
+
+    # Keep the organization inventory cache out of the working tree
+    monkeypatch.chdir(tmp_path)
+    build_org(shape)
+    scooper_config = ScooperConfig(ORG, ROLE_NAME, inventory_ttl=timedelta(0))
+
+    results = {
+        "OrganizationInventory": measure(lambda: scooper_config.accounts),
+        "CloudTrail": measure(lambda: CloudTrail(ORG).get_report()),
+        "CloudWatch": measure(lambda: CloudWatch(ORG, scooper_config).get_report()),
+        "CloudWatchSummary": measure(
+            lambda: CloudWatch(ORG, scooper_config, summary=True).get_report()
+        ),
+        "Config": measure(lambda: Config(ORG).get_report()),
+    }
+
+    if find_spec("cbs_common") is not None:
+        from string import Template
+
+        from scooper.sources.custom import IAMMetadata
+
+        results["IAMMetadata"] = measure(
+            lambda: IAMMetadata(
+                ORG,
+                Template(f"arn:aws:iam::$account:role/{ROLE_NAME}"),
+                account_ids=[account["Id"] for account in scooper_config.accounts],
+            ).get_report()
+        )
+
+    benchmark_results.setdefault("enumeration", []).append(
+        {"shape": shape.to_dict(), "results": results}
+    )
@@ -0,0 +1,90 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+
+from boto3 import client
+from moto import mock_sts
+from pytest import mark
+
+from scooper.cdk.tests.benchmark.conftest import benchmark
+from scooper.cdk.tests.benchmark.synthetic import (
+    LocalS3,
+    ScoopShape,
+    SyntheticLookupEvents,
+)
+
+pytestmark = benchmark
+
+
+@mark.parametrize(
+    "shape",
+    ScoopShape.scaling_curve(),
+    ids=lambda shape: f"{shape.events_per_hour}-events-per-hour",
+)
+@mock_sts
+def test_cloudtrail_scoop_throughput(shape, benchmark_results):
+    from scooper.core.utils.metrics import instrument
+    from scooper.incident_response.cloudtrail import (
+        config,
+        write_cloudtrail_scoop_to_s3,
+    )
+
+    end_time = datetime(2024, 1, 2, tzinfo=timezone.utc)
+    start_time = end_time - timedelta(hours=shape.hours)
+    lookup_events = SyntheticLookupEvents(shape.events_per_hour, shape.throttle_tps)
+    local_s3 = LocalS3()
+
+    start = perf_counter()
+    stats = write_cloudtrail_scoop_to_s3(
+        start_time,
+        end_time,
+        "scooper-benchmark-scoop",
+        cloudtrail_client=lookup_events.attach(
+            instrument(client("cloudtrail", config=config))
+        ),
+        s3_client=local_s3.attach(instrument(client("s3"))),
+        processes=shape.processes,
+    )
+    seconds = perf_counter() - start
+
+    encoded = stats.stages.get("serialize") or stats.stages["encode"]
+    assert stats.stages["fetch"].items == encoded.items
+    assert stats.stages["upload"].items == shape.hours
+    # Every scooped hour, and the scoop's manifest
+    assert local_s3.objects == shape.hours + 1
+
+    benchmark_results.setdefault("scoop", []).append(
+        {
+            "shape": shape.to_dict(),
+            "seconds": seconds,
+            "events_per_second": stats.stages["fetch"].items / seconds,
+            "lookup_events": {
+                "requests": lookup_events.requests,
+                "throttled": lookup_events.throttled,
+            },
+            "stages": stats.to_dict(),
+        }
+    )
@@ -25,7 +25,15 @@ noted in the files associated with those components.
 import os
 
 from boto3 import client
-from moto import mock_cloudtrail, mock_config, mock_ec2, mock_s3, mock_sts
+from moto import (
+    mock_cloudtrail,
+    mock_config,
+    mock_ec2,
+    mock_logs,
+    mock_organizations,
+    mock_s3,
+    mock_sts,
+)
 from pytest import fixture
 
 
@@ -67,3 +75,15 @@ def s3_client():
 def ec2_client():
     with mock_ec2():
         yield client("ec2")
+
+
+@fixture(scope="module")
+def organizations_client():
+    with mock_organizations():
+        yield client("organizations")
+
+
+@fixture(scope="module")
+def logs_client():
+    with mock_logs():
+        yield client("logs")
@@ -0,0 +1,101 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+import gzip
+
+from boto3 import client
+from moto import mock_logs, mock_sts
+from pytest import raises
+
+
+def test_record_replay(tmp_path):
+    from scooper.core.utils.cassette import Cassette, CassetteMissError
+
+    path = tmp_path / "cassette.jsonl.gz"
+    recorder = Cassette()
+    recorder.record(path, timing=True)
+
+    with mock_logs(), mock_sts():
+        sts_client = recorder.attach(client("sts"))
+        credentials = sts_client.assume_role(
+            RoleArn="arn:aws:iam::111111111111:role/test", RoleSessionName="test"
+        )["Credentials"]
+        logs_client = recorder.attach(client("logs"), "111111111111")
+        logs_client.create_log_group(logGroupName="test")
+        log_groups = logs_client.describe_log_groups()["logGroups"]
+    recorder.close()
+
+    with gzip.open(path, "rt") as f:
+        cassette = f.read()
+    assert credentials["SecretAccessKey"] not in cassette
+    assert credentials["SessionToken"] not in cassette
+
+    player = Cassette()
+    player.replay(path)
+    logs_client = player.attach(client("logs"), "111111111111")
+
+    assert logs_client.describe_log_groups()["logGroups"] == log_groups
+    with raises(CassetteMissError):
+        player.attach(client("logs"), "222222222222").describe_log_groups()
+
+
+def test_record_binary_bodies(tmp_path):
+    from base64 import b64encode
+    from json import dumps
+
+    from moto import mock_s3
+
+    from scooper.core.utils.cassette import Cassette, CassetteOmittedError
+
+    path = tmp_path / "cassette.jsonl.gz"
+    log = {"Records": [{"userIdentity": {"accessKeyId": "ASIASECRET"}}]}
+    recorder = Cassette()
+    recorder.record(path)
+
+    with mock_s3():
+        s3_client = recorder.attach(client("s3"))
+        s3_client.create_bucket(Bucket="trail-bucket")
+        s3_client.put_object(
+            Bucket="trail-bucket",
+            Key="log.json.gz",
+            Body=gzip.compress(dumps(log).encode()),
+        )
+        s3_client.put_object(Bucket="trail-bucket", Key="blob", Body=bytes(range(256)))
+        s3_client.get_object(Bucket="trail-bucket", Key="log.json.gz")["Body"].read()
+        s3_client.get_object(Bucket="trail-bucket", Key="blob")["Body"].read()
+    recorder.close()
+
+    with gzip.open(path, "rt") as f:
+        cassette = f.read()
+    assert b64encode(bytes(range(256))).decode() not in cassette
+
+    player = Cassette()
+    player.replay(path)
+    s3_client = player.attach(client("s3"))
+
+    # Gzipped bodies are redacted before they're encoded, and others left out
+    body = s3_client.get_object(Bucket="trail-bucket", Key="log.json.gz")["Body"]
+    assert b"ASIASECRET" not in gzip.decompress(body.read())
+    with raises(CassetteOmittedError):
+        s3_client.get_object(Bucket="trail-bucket", Key="blob")
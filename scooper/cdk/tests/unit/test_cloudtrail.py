@@ -22,7 +22,12 @@ Notwithstanding the foregoing, third party components included herein are subjec
 noted in the files associated with those components.
 """
 
+import gzip
+from datetime import datetime, timedelta, timezone
+from json import dumps, loads
+
 from moto import mock_cloudtrail
+from pytest import mark, raises
 
 from scooper.core.constants import ACCOUNT
 
@@ -99,3 +104,484 @@ def test_disabled(sts_client):
 
     report = CloudTrail(ACCOUNT).report
     assert not report.logging_enabled
+
+
+def test_partition():
+    from scooper.incident_response.cloudtrail import CloudTrailDump
+
+    dump = CloudTrailDump(
+        [
+            {
+                "EventTime": datetime(2024, 1, 1, hour, minute, tzinfo=timezone.utc),
+                "CloudTrailEvent": f'{{"eventID": "{hour}:{minute}"}}',
+            }
+            for hour, minute in ((11, 0), (10, 45), (10, 15))
+        ]
+    )
+    partitions = dump.partition()
+
+    assert partitions == {
+        datetime(2024, 1, 1, 11, tzinfo=timezone.utc): [{"eventID": "11:0"}],
+        datetime(2024, 1, 1, 10, tzinfo=timezone.utc): [
+            {"eventID": "10:45"},
+            {"eventID": "10:15"},
+        ],
+    }
+
+
+TRAIL = {
+    "Name": "trail",
+    "S3BucketName": "trail-bucket",
+    "S3KeyPrefix": "logs",
+    "IsOrganizationTrail": False,
+    "IsMultiRegionTrail": True,
+    "HomeRegion": "us-east-1",
+}
+
+
+def put_trail_logs(s3_client, scoop_bucket):
+    s3_client.create_bucket(Bucket="trail-bucket")
+    s3_client.create_bucket(Bucket=scoop_bucket)
+    prefix = "logs/AWSLogs/123456789012/CloudTrail/us-east-1/2024/01/01"
+    for delivered, event_times in (
+        ("0915", ("09:05:00",)),
+        ("0940", ("09:35:00", "09:25:00")),
+        ("1015", ("10:10:00", "10:05:00", "10:01:00")),
+        ("2015", ("20:10:00",)),
+    ):
+        s3_client.put_object(
+            Bucket="trail-bucket",
+            Key=f"{prefix}/123456789012_CloudTrail_us-east-1_20240101T{delivered}Z_abc.json.gz",
+            Body=gzip.compress(
+                dumps(
+                    {
+                        "Records": [
+                            {
+                                "eventTime": f"2024-01-01T{time}Z",
+                                "eventID": time,
+                                "eventSource": (
+                                    "s3.amazonaws.com"
+                                    if time == "10:05:00"
+                                    else "iam.amazonaws.com"
+                                ),
+                            }
+                            for time in event_times
+                        ]
+                    }
+                ).encode()
+            ),
+        )
+
+
+def scooped_objects(s3_client, scoop_bucket, prefix="scooper/CloudTrail/"):
+    return {
+        obj["Key"]: loads(
+            s3_client.get_object(Bucket=scoop_bucket, Key=obj["Key"])["Body"].read()
+        )
+        for obj in s3_client.list_objects_v2(Bucket=scoop_bucket, Prefix=prefix)[
+            "Contents"
+        ]
+    }
+
+
+@mark.parametrize("processes", [1, 2])
+def test_scoop_trail(s3_client, sts_client, processes):
+    from scooper.incident_response.cloudtrail import write_cloudtrail_scoop_to_s3
+
+    put_trail_logs(s3_client, "scoop-bucket")
+
+    stats = write_cloudtrail_scoop_to_s3(
+        datetime(2024, 1, 1, 9, 30, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, 12, tzinfo=timezone.utc),
+        "scoop-bucket",
+        trail=TRAIL,
+        processes=processes,
+    )
+    objects = scooped_objects(s3_client, "scoop-bucket")
+    prefix = "scooper/CloudTrail/123456789012/us-east-1/2024/01/01"
+
+    # Logs delivered before or well after the range aren't downloaded, and 09:25 is filtered
+    assert stats.stages["fetch"].items == 2
+    assert list(objects) == [
+        f"{prefix}/CloudTrail_2024-01-01T09:00:00+00:00.json",
+        f"{prefix}/CloudTrail_2024-01-01T10:00:00+00:00.json",
+    ]
+    assert objects[f"{prefix}/CloudTrail_2024-01-01T09:00:00+00:00.json"] == [
+        {
+            "eventTime": "2024-01-01T09:35:00Z",
+            "eventID": "09:35:00",
+            "eventSource": "iam.amazonaws.com",
+        }
+    ]
+
+    # Manifest summarizes each object written, whichever process encoded it
+    (manifest,) = scooped_objects(
+        s3_client, "scoop-bucket", "scooper/manifests/CloudTrail/"
+    ).values()
+    summary = manifest["objects"][f"{prefix}/CloudTrail_2024-01-01T10:00:00+00:00.json"]
+    assert manifest["account"] == "123456789012" and manifest["region"] == "us-east-1"
+    assert sorted(manifest["objects"]) == list(objects)
+    assert summary["events"] == 3
+    assert summary["minEventTime"] == "2024-01-01T10:01:00Z"
+    assert summary["maxEventTime"] == "2024-01-01T10:10:00Z"
+    assert summary["bytes"] == len(
+        s3_client.get_object(
+            Bucket="scoop-bucket",
+            Key=f"{prefix}/CloudTrail_2024-01-01T10:00:00+00:00.json",
+        )["Body"].read()
+    )
+
+
+@mark.parametrize("processes", [1, 2])
+def test_scoop_hive_layout(s3_client, sts_client, processes):
+    from scooper.incident_response.cloudtrail import write_cloudtrail_scoop_to_s3
+    from scooper.incident_response.partitions import PartitionLayout
+
+    put_trail_logs(s3_client, "hive-bucket")
+
+    write_cloudtrail_scoop_to_s3(
+        datetime(2024, 1, 1, 9, 30, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, 12, tzinfo=timezone.utc),
+        "hive-bucket",
+        trail=TRAIL,
+        processes=processes,
+        layout=PartitionLayout("hive", "day", max_events=2, partition_by="eventSource"),
+    )
+    objects = scooped_objects(s3_client, "hive-bucket")
+    prefix = "scooper/CloudTrail/account=123456789012/region=us-east-1/year=2024/month=01/day=01"
+
+    iam_prefix = (
+        f"{prefix}/eventsource=iam.amazonaws.com/CloudTrail_2024-01-01T00:00:00+00:00"
+    )
+
+    # Log files arrive in any order, but their events are split in objects of at most 2
+    assert sorted(objects) == [
+        f"{iam_prefix}_00000.json",
+        f"{iam_prefix}_00001.json",
+        f"{prefix}/eventsource=s3.amazonaws.com/CloudTrail_2024-01-01T00:00:00+00:00_00000.json",
+    ]
+    assert sorted(len(events) for events in objects.values()) == [1, 1, 2]
+    assert sorted(
+        event["eventID"]
+        for key, events in objects.items()
+        if key.startswith(iam_prefix)
+        for event in events
+    ) == ["09:35:00", "10:01:00", "10:10:00"]
+
+
+@mark.parametrize("processes", [1, 2])
+def test_scoop_max_memory(s3_client, sts_client, processes):
+    from scooper.incident_response.cloudtrail import write_cloudtrail_scoop_to_s3
+    from scooper.incident_response.partitions import PartitionLayout
+
+    bucket_name = f"spill-bucket-{processes}"
+    put_trail_logs(s3_client, bucket_name)
+
+    stats = write_cloudtrail_scoop_to_s3(
+        datetime(2024, 1, 1, 9, 30, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, 12, tzinfo=timezone.utc),
+        bucket_name,
+        TRAIL,
+        processes=processes,
+        layout=PartitionLayout("hive", "day", max_events=2),
+        max_memory=1,
+    )
+    objects = scooped_objects(s3_client, bucket_name)
+    manifest = scooped_objects(s3_client, bucket_name, "scooper/manifests/CloudTrail/")
+
+    # Every partition spills, but objects still hold every event, split by the layout
+    assert stats.stages["spill"].items >= 1
+    assert sorted(
+        event["eventID"] for events in objects.values() for event in events
+    ) == ["09:35:00", "10:01:00", "10:05:00", "10:10:00"]
+    assert all(len(events) <= 2 for events in objects.values())
+    assert sorted(next(iter(manifest.values()))["objects"]) == sorted(objects)
+
+
+def test_lookup_scoop_max_memory(s3_client, sts_client):
+    from threading import Lock
+    from types import SimpleNamespace
+
+    from scooper.incident_response.cloudtrail import write_cloudtrail_scoop_to_s3
+
+    s3_client.create_bucket(Bucket="lookup-spill-bucket")
+    periods = []
+    lock = Lock()
+
+    def lookup_events(StartTime, EndTime, **_):
+        with lock:
+            periods.append((StartTime.hour, EndTime.hour))
+        yield {
+            "Events": [
+                {
+                    "EventId": f"{StartTime.hour}",
+                    "EventTime": StartTime,
+                    "CloudTrailEvent": dumps(
+                        {"eventTime": f"{StartTime:%Y-%m-%dT%H:%M:%SZ}"}
+                    ),
+                }
+            ]
+        }
+
+    cloudtrail_client = SimpleNamespace(
+        meta=SimpleNamespace(service_model=SimpleNamespace(service_name="cloudtrail")),
+        get_paginator=lambda _: SimpleNamespace(paginate=lookup_events),
+    )
+
+    write_cloudtrail_scoop_to_s3(
+        datetime(2024, 1, 1, 9, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, 13, tzinfo=timezone.utc),
+        "lookup-spill-bucket",
+        cloudtrail_client=cloudtrail_client,
+        max_memory=1,
+    )
+    objects = scooped_objects(s3_client, "lookup-spill-bucket")
+
+    # Time range is looked up an hour at a time, so no lookup holds much at once
+    assert sorted(periods) == [(9, 10), (10, 11), (11, 12), (12, 13)]
+    assert sorted(
+        event["eventTime"] for events in objects.values() for event in events
+    ) == [f"2024-01-01T{hour:02d}:00:00Z" for hour in range(9, 13)]
+
+
+def test_lookup_window():
+    from threading import Lock
+    from time import sleep
+    from types import SimpleNamespace
+
+    from scooper.incident_response.cloudtrail import (
+        LOOKUP_SLICE,
+        NUM_WORKERS,
+        iter_cloudtrail_events,
+    )
+
+    pages, page_size = 10, 5
+    looked_up = []
+    lock = Lock()
+
+    def lookup_events(StartTime, **_):
+        for page in range(pages):
+            events = [
+                {
+                    "EventId": f"{StartTime.hour}-{page}-{i}",
+                    "EventTime": StartTime + timedelta(minutes=pages - page),
+                }
+                for i in range(page_size)
+            ]
+            with lock:
+                looked_up.extend(events)
+            yield {"Events": events}
+
+    cloudtrail_client = SimpleNamespace(
+        meta=SimpleNamespace(service_model=SimpleNamespace(service_name="cloudtrail")),
+        get_paginator=lambda _: SimpleNamespace(paginate=lookup_events),
+    )
+
+    consumed = 0
+    for events in iter_cloudtrail_events(
+        datetime(2024, 1, 1, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, 12, tzinfo=timezone.utc),
+        cloudtrail_client,
+        slice_duration=LOOKUP_SLICE,
+    ):
+        consumed += len(events)
+        # However slowly events are consumed, only a page per worker is looked up ahead,
+        # and one held by each worker waiting for room
+        sleep(0.001)
+        assert len(looked_up) - consumed <= 2 * NUM_WORKERS * page_size
+
+    assert consumed == len(looked_up) == 12 * pages * page_size
+
+    # Lookups waiting for room return once the consumer stops early
+    events = iter_cloudtrail_events(
+        datetime(2024, 1, 1, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, 12, tzinfo=timezone.utc),
+        cloudtrail_client,
+        slice_duration=LOOKUP_SLICE,
+    )
+    next(events)
+    events.close()
+
+
+def test_partition_layout():
+    from scooper.incident_response.partitions import Partition, PartitionLayout
+
+    hour = datetime(2024, 1, 2, 3, tzinfo=timezone.utc)
+
+    assert (
+        PartitionLayout("hive", "hour", partition_by="userAgent").object_key(
+            "123456789012", "ca-central-1", Partition(hour, "aws-cli/2.0 (a/b)")
+        )
+        == "scooper/CloudTrail/account=123456789012/region=ca-central-1/year=2024/month=01/day=02/hour=03/useragent=aws-cli%2F2.0%20%28a%2Fb%29/CloudTrail_2024-01-02T03:00:00+00:00.json"
+    )
+    assert (
+        PartitionLayout("hive", partition_by="eventSource")
+        .object_key("123456789012", "ca-central-1", Partition(hour))
+        .endswith(
+            "/eventsource=__HIVE_DEFAULT_PARTITION__/CloudTrail_2024-01-02T03:00:00+00:00.json"
+        )
+    )
+    with raises(ValueError):
+        PartitionLayout(partition_by="eventSource")
+
+
+def test_encode_fragments():
+    from scooper.core.utils.io import dict_to_json_bytes
+    from scooper.incident_response.cloudtrail import (
+        CloudTrailDump,
+        _encode_events,
+        _pack_fragments,
+    )
+    from scooper.incident_response.partitions import Partition, PartitionLayout
+
+    events = [
+        (datetime(2024, 1, 1, hour, minute, tzinfo=timezone.utc), {"id": minute})
+        for hour, minute in ((10, 5), (11, 10), (10, 15), (10, 20))
+    ]
+    layout = PartitionLayout()
+    chunks = [_encode_events(events[:2], layout), _encode_events(events[2:], layout)]
+
+    assert {
+        Partition(hour): dict_to_json_bytes(partition)
+        for hour, partition in CloudTrailDump.partition_events(events).items()
+    } == {
+        Partition(hour): next(
+            _pack_fragments(
+                [
+                    fragment
+                    for chunk in chunks
+                    for fragment in chunk.get(Partition(hour), [])
+                ],
+                None,
+            )
+        )[0].getvalue()
+        for hour in (
+            datetime(2024, 1, 1, 10, tzinfo=timezone.utc),
+            datetime(2024, 1, 1, 11, tzinfo=timezone.utc),
+        )
+    }
+
+
+def test_lookup_filtered_events():
+    from threading import Lock
+    from types import SimpleNamespace
+
+    from scooper.incident_response.cloudtrail import EventFilter, get_cloudtrail_events
+
+    def lookup_event(event_id, username, event_source):
+        return {
+            "EventId": event_id,
+            "Username": username,
+            "EventSource": event_source,
+            "EventTime": datetime(2024, 1, 1, 10, tzinfo=timezone.utc),
+            "CloudTrailEvent": "{}",
+        }
+
+    events = [
+        lookup_event("1", "alice", "iam.amazonaws.com"),
+        lookup_event("2", "alice", "s3.amazonaws.com"),
+        lookup_event("3", "bob", "iam.amazonaws.com"),
+    ]
+    calls = []
+    lock = Lock()
+
+    def lookup_events(LookupAttributes, **kwargs):
+        with lock:
+            calls.append((LookupAttributes, kwargs.get("EventCategory")))
+        username = LookupAttributes[0]["AttributeValue"]
+        # Both periods' lookups return the same events, as if on their boundary
+        yield {"Events": [e for e in events if e["Username"] == username]}
+
+    cloudtrail_client = SimpleNamespace(
+        meta=SimpleNamespace(service_model=SimpleNamespace(service_name="cloudtrail")),
+        get_paginator=lambda _: SimpleNamespace(paginate=lookup_events),
+    )
+    event_filter = EventFilter(
+        (
+            ("EventSource", "iam.amazonaws.com"),
+            ("Username", "alice"),
+            ("Username", "bob"),
+        ),
+        "insight",
+    )
+
+    scooped = get_cloudtrail_events(
+        datetime(2024, 1, 1, 9, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, 11, tzinfo=timezone.utc),
+        cloudtrail_client,
+        event_filter,
+    )
+
+    # One lookup per username and period, with event sources matched client-side
+    assert sorted(event["EventId"] for event in scooped) == ["1", "3"]
+    assert len(calls) == 4
+    assert {attributes[0]["AttributeValue"] for attributes, _ in calls} == {
+        "alice",
+        "bob",
+    }
+    assert {attributes[0]["AttributeKey"] for attributes, _ in calls} == {"Username"}
+    assert {category for _, category in calls} == {"insight"}
+
+
+def test_filter_trail_log():
+    from scooper.incident_response.cloudtrail import EventFilter, _parse_trail_log
+
+    records = [
+        {
+            "eventTime": "2024-01-01T10:00:00Z",
+            "eventID": "assumed-role",
+            "eventName": "DeleteTrail",
+            "userIdentity": {
+                "arn": "arn:aws:sts::123456789012:assumed-role/Admin/alice",
+                "accessKeyId": "ASIAEXAMPLE",
+            },
+            "resources": [
+                {"ARN": "arn:aws:cloudtrail:us-east-1:123456789012:trail/org-trail"}
+            ],
+        },
+        {
+            "eventTime": "2024-01-01T10:05:00Z",
+            "eventID": "user",
+            "eventName": "DeleteTrail",
+            "userIdentity": {"userName": "bob"},
+        },
+        {
+            "eventTime": "2024-01-01T10:10:00Z",
+            "eventID": "other-event",
+            "eventName": "CreateTrail",
+            "userIdentity": {"userName": "alice"},
+        },
+    ]
+    log = gzip.compress(dumps({"Records": records}).encode())
+
+    def scooped(*attributes):
+        return [
+            event["eventID"]
+            for _, event in _parse_trail_log(
+                log,
+                datetime(2024, 1, 1, tzinfo=timezone.utc),
+                datetime(2024, 1, 2, tzinfo=timezone.utc),
+                EventFilter(attributes),
+            )
+        ]
+
+    assert scooped() == ["assumed-role", "user", "other-event"]
+    assert scooped(("EventName", "DeleteTrail"), ("Username", "alice")) == [
+        "assumed-role"
+    ]
+    assert scooped(("Username", "alice"), ("Username", "bob")) == [
+        "assumed-role",
+        "user",
+        "other-event",
+    ]
+    assert scooped(("ResourceName", "org-trail")) == ["assumed-role"]
+    assert scooped(("AccessKeyId", "ASIAEXAMPLE")) == ["assumed-role"]
+
+
+def test_process_pool():
+    from scooper.incident_response.cloudtrail import _process_pool
+
+    # Workers are forked up front, so threads started later aren't forked along
+    with _process_pool(2) as pool:
+        assert len(pool._processes) == 2
+        assert pool.submit(sum, [1, 2]).result() == 3
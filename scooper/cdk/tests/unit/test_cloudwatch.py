@@ -0,0 +1,121 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from json import loads
+
+from moto import mock_logs, mock_organizations
+
+from scooper.core.constants import ACCOUNT
+
+
+def put_log_groups(logs_client):
+    logs_client.create_log_group(logGroupName="unencrypted")
+    logs_client.create_log_group(logGroupName="retained")
+    logs_client.put_retention_policy(logGroupName="retained", retentionInDays=30)
+    logs_client.create_log_group(
+        logGroupName="encrypted",
+        kmsKeyId="arn:aws:kms:us-east-1:123456789012:key/test",
+    )
+
+
+@mock_logs
+def test_enumerate(logs_client, sts_client):
+    from scooper.core.config import ScooperConfig
+    from scooper.sources.native.cloudwatch import CloudWatch
+
+    put_log_groups(logs_client)
+    report = CloudWatch(ACCOUNT, ScooperConfig(ACCOUNT)).report
+
+    assert report.logging_enabled and len(report.details["log_groups"]) == 3
+
+
+@mock_logs
+def test_summary(logs_client, sts_client, tmp_path):
+    from scooper.core.config import ScooperConfig
+    from scooper.sources.native.cloudwatch import CloudWatch
+
+    put_log_groups(logs_client)
+    listing_path = tmp_path / "log_groups.ndjson"
+    report = CloudWatch(
+        ACCOUNT, ScooperConfig(ACCOUNT), summary=True, listing_path=listing_path
+    ).report
+    summary = report.details["summary"]
+
+    assert report.logging_enabled and "log_groups" not in report.details
+    assert summary["log_group_count"] == 3
+    assert summary["retention_histogram"] == {"never": 2, "30": 1}
+    assert summary["kms_encrypted_fraction"] == 1 / 3
+    assert len(summary["largest_log_groups"]) == 3
+    with listing_path.open() as f:
+        assert {loads(line)["logGroupName"] for line in f} == {
+            "unencrypted",
+            "retained",
+            "encrypted",
+        }
+
+
+@mock_logs
+def test_disabled(sts_client):
+    from scooper.core.config import ScooperConfig
+    from scooper.sources.native.cloudwatch import CloudWatch
+
+    report = CloudWatch(ACCOUNT, ScooperConfig(ACCOUNT), summary=True).report
+    assert not report.logging_enabled
+
+
+@mock_logs
+def test_listing(logs_client, sts_client, tmp_path):
+    from scooper.core.config import ScooperConfig
+    from scooper.sources.native.cloudwatch import CloudWatch
+
+    put_log_groups(logs_client)
+    listing_path = tmp_path / "log_groups.ndjson"
+    report = CloudWatch(
+        ACCOUNT, ScooperConfig(ACCOUNT), listing_path=listing_path
+    ).report
+
+    # Log Groups are listed whether they're summarized or reported in full
+    assert len(report.details["log_groups"]) == 3
+    with listing_path.open() as f:
+        assert len(f.readlines()) == 3
+
+
+@mock_logs
+@mock_organizations
+def test_sharded_without_log_groups(
+    organizations_client, sts_client, tmp_path, monkeypatch
+):
+    from scooper.core.config import ScooperConfig
+    from scooper.core.constants import ORG
+    from scooper.core.utils.io import ShardedReportWriter
+    from scooper.sources.native.cloudwatch import CloudWatch
+
+    monkeypatch.chdir(tmp_path)
+    organizations_client.create_organization(FeatureSet="ALL")
+    report = CloudWatch(
+        ORG, ScooperConfig(ORG), writer=ShardedReportWriter("cloudwatch")
+    ).report
+
+    # Enabled once an account was enumerated, as when accounts aren't sharded
+    assert report.logging_enabled and "shards" in report.details
@@ -0,0 +1,179 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from json import dumps, load, loads
+from types import SimpleNamespace
+
+import aws_cdk as cdk
+from aws_cdk.assertions import Match, Template
+from moto import mock_logs, mock_s3
+
+from scooper.core.constants import ORG
+
+BUCKET_NAME = "scooper-fanout-test"
+
+
+def _fanout_template() -> Template:
+    from scooper.cdk.scooper.fanout_stack import ScooperFanOut
+
+    # Skip bundling the worker, which needs pip or Docker
+    app = cdk.App(context={"aws:cdk:bundling-stacks": []})
+    bucket_stack = cdk.Stack(app, "BucketStack")
+    stack = ScooperFanOut(
+        app,
+        "ScooperFanOut",
+        scooper_config=SimpleNamespace(level=ORG, org_role_name="ScooperRole"),
+        scooper_bucket=cdk.aws_s3.Bucket(bucket_stack, "ScooperBucket"),
+    )
+    return Template.from_stack(stack)
+
+
+def test_worker():
+    template = _fanout_template()
+
+    template.has_resource_properties(
+        "AWS::Lambda::Function",
+        {
+            "Handler": "scooper.fanout.worker.handler",
+            "Runtime": "python3.11",
+            "Layers": [Match.string_like_regexp("CBSCommonLayer")],
+            "Environment": {
+                "Variables": Match.object_like({"SCOOPER_ROLE_NAME": "ScooperRole"})
+            },
+        },
+    )
+    template.has_resource_properties(
+        "AWS::IAM::Policy",
+        {
+            "PolicyDocument": {
+                "Statement": Match.array_with(
+                    [
+                        Match.object_like(
+                            {
+                                "Action": "sts:AssumeRole",
+                                "Resource": "arn:aws:iam::*:role/ScooperRole",
+                            }
+                        )
+                    ]
+                )
+            }
+        },
+    )
+
+
+def test_state_machine():
+    template = _fanout_template()
+    template.resource_count_is("AWS::StepFunctions::StateMachine", 1)
+
+    definition = template.find_resources("AWS::StepFunctions::StateMachine")
+    definition = dumps(next(iter(definition.values()))["Properties"])
+    assert '\\"Mode\\":\\"DISTRIBUTED\\"' in definition
+    assert '\\"MaxConcurrencyPath\\":\\"$.max_concurrency\\"' in definition
+    assert '\\"Key.$\\":\\"$.accounts_key\\"' in definition
+
+    outputs = template.find_outputs("*")
+    assert {"BucketName", "StateMachineArn"} <= set(outputs)
+
+
+@mock_logs
+@mock_s3
+def test_worker_handler(logs_client, s3_client, sts_client, monkeypatch):
+    from scooper.fanout import worker
+
+    s3_client.create_bucket(Bucket=BUCKET_NAME)
+    logs_client.create_log_group(logGroupName="a")
+    monkeypatch.setenv(worker.BUCKET_NAME_VARIABLE, BUCKET_NAME)
+    monkeypatch.setenv(worker.ROLE_NAME_VARIABLE, "ScooperRole")
+    # IAM metadata needs the CBS Common layer
+    monkeypatch.setenv(worker.SOURCES_VARIABLE, "cloudwatch")
+    monkeypatch.setattr("scooper.core.utils.io.S3_CLIENT", s3_client)
+
+    result = worker.handler(
+        {"account_id": "123456789012", "run_prefix": "scooper/runs/test"}, None
+    )
+
+    object_key = "scooper/runs/test/cloudwatch/123456789012.json"
+    assert result == {
+        "account_id": "123456789012",
+        "results": {"cloudwatch": object_key},
+    }
+    shard = load(s3_client.get_object(Bucket=BUCKET_NAME, Key=object_key)["Body"])
+    assert [log_group["logGroupName"] for log_group in shard] == ["a"]
+
+
+@mock_s3
+def test_fanout_run(s3_client, tmp_path, caplog):
+    from logging import WARNING
+
+    from boto3 import client
+    from moto import mock_iam, mock_stepfunctions
+
+    from scooper.core.utils.io import ShardedReportWriter
+    from scooper.fanout.run import FanOutRun
+
+    s3_client.create_bucket(Bucket=BUCKET_NAME)
+    with mock_iam(), mock_stepfunctions():
+        sfn_client = client("stepfunctions")
+        state_machine_arn = sfn_client.create_state_machine(
+            name="fanout",
+            definition=dumps(
+                {"StartAt": "Done", "States": {"Done": {"Type": "Succeed"}}}
+            ),
+            roleArn="arn:aws:iam::123456789012:role/fanout",
+        )["stateMachineArn"]
+
+        run = FanOutRun(
+            BUCKET_NAME, state_machine_arn, sfn_client=sfn_client, s3_client=s3_client
+        )
+        run.start(["111111111111", "222222222222"], max_concurrency=5)
+        execution = sfn_client.describe_execution(executionArn=run.execution_arn)
+
+    accounts = load(
+        s3_client.get_object(Bucket=BUCKET_NAME, Key=f"{run.prefix}/accounts.json")[
+            "Body"
+        ]
+    )
+    assert accounts == ["111111111111", "222222222222"]
+    assert loads(execution["input"])["max_concurrency"] == 5
+
+    # Stand in for the workers
+    for account_id in accounts:
+        s3_client.put_object(
+            Bucket=BUCKET_NAME,
+            Key=f"{run.prefix}/cloudwatch/{account_id}.json",
+            Body=dumps([{"logGroupName": account_id}]),
+        )
+    writer = ShardedReportWriter("cloudwatch", root=tmp_path)
+
+    assert dict(run.collect("cloudwatch", writer)) == {
+        account_id: [{"logGroupName": account_id}] for account_id in accounts
+    }
+    assert set(writer.paths) == {"111111111111.json", "222222222222.json"}
+
+    # Accounts whose workers wrote no shard are named
+    with caplog.at_level(WARNING):
+        assert not list(
+            run.collect("iam_metadata", ShardedReportWriter("iam_metadata", tmp_path))
+        )
+    assert "111111111111, 222222222222" in caplog.text
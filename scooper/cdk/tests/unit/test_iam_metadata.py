@@ -0,0 +1,134 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+import sys
+from string import Template
+from threading import Lock
+from time import sleep
+from types import ModuleType
+
+from botocore.exceptions import ClientError
+from pytest import fixture
+
+ACCOUNT_IDS = ["123456789012", "111111111111", "222222222222", "333333333333"]
+DENIED_ACCOUNT_ID = "222222222222"
+ROLE_TEMPLATE = Template("arn:aws:iam::$account:role/ScooperRole")
+
+
+class StubCBSCommon:
+    """Stand-in of the CBS Common layer, recording what Scooper asks of it."""
+
+    def __init__(self) -> None:
+        self.assumed: list[str] = []
+        self.active = 0
+        self.peak = 0
+        self.lock = Lock()
+
+    def assume_role(self, role_arn, sts_client):
+        from boto3 import Session
+
+        with self.lock:
+            self.assumed.append(role_arn)
+        if DENIED_ACCOUNT_ID in role_arn:
+            raise ClientError(
+                {"Error": {"Code": "AccessDenied", "Message": "Denied"}}, "AssumeRole"
+            )
+        return Session()
+
+    def modules(self) -> dict[str, ModuleType]:
+        stub = self
+
+        class IAMMetadata:
+            def get_report(self):
+                with stub.lock:
+                    stub.active += 1
+                    stub.peak = max(stub.peak, stub.active)
+                sleep(0.05)
+                with stub.lock:
+                    stub.active -= 1
+                return {account_id: {"Users": []} for account_id in self._clients}
+
+        modules = {
+            name: ModuleType(name)
+            for name in (
+                "cbs_common",
+                "cbs_common.aws",
+                "cbs_common.aws.boto_types",
+                "cbs_common.aws.iam_metadata",
+                "cbs_common.aws.utilities",
+            )
+        }
+        modules["cbs_common.aws.boto_types"].DataRequest = dict
+        modules["cbs_common.aws.iam_metadata"].IAMMetadata = IAMMetadata
+        modules["cbs_common.aws.utilities"].BotoHelper = None
+        modules["cbs_common.aws.utilities"].assume_role = self.assume_role
+        return modules
+
+
+@fixture
+def cbs_common(monkeypatch):
+    stub = StubCBSCommon()
+    for name, module in stub.modules().items():
+        monkeypatch.setitem(sys.modules, name, module)
+    # Import IAM metadata afresh against the stub
+    for name in ("scooper.sources.custom", "scooper.sources.custom.iam_metadata"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    yield stub
+
+
+def test_lazy_role_assumption(sts_client, cbs_common):
+    from scooper.sources.custom import IAMMetadata
+
+    iam_metadata = IAMMetadata("org", ROLE_TEMPLATE, account_ids=ACCOUNT_IDS)
+
+    # Roles are only assumed once their account's client is needed, and only once
+    assert cbs_common.assumed == []
+    client = iam_metadata.get_client("111111111111")
+    assert iam_metadata.get_client("111111111111") is client
+    assert cbs_common.assumed == ["arn:aws:iam::111111111111:role/ScooperRole"]
+
+    # Scooper's own account is read without assuming a role
+    iam_metadata.get_client("123456789012")
+    assert len(cbs_common.assumed) == 1
+
+
+def test_report(sts_client, cbs_common):
+    from scooper.sources.custom import IAMMetadata
+
+    report = IAMMetadata(
+        "org", ROLE_TEMPLATE, account_ids=ACCOUNT_IDS, max_workers=2
+    ).get_report()
+
+    # Accounts are collected at most `max_workers` at a time
+    assert 1 <= cbs_common.peak <= 2
+    # Accounts that can't be assumed into are recorded as failed rather than dropped
+    assert sorted(report) == sorted(ACCOUNT_IDS)
+    assert report[DENIED_ACCOUNT_ID] == {
+        "Error": {"Code": "AccessDenied", "Message": "Denied"}
+    }
+    assert all(
+        report[account_id] == {"Users": []}
+        for account_id in ACCOUNT_IDS
+        if account_id != DENIED_ACCOUNT_ID
+    )
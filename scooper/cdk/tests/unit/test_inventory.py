@@ -0,0 +1,167 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from json import dump
+
+from pytest import mark, raises
+
+TB = 1024**4
+
+
+def log_group(name, account_id, region="ca-central-1", **attributes):
+    return {
+        "logGroupName": name,
+        "creationTime": 1700000000000,
+        "arn": f"arn:aws:logs:{region}:{account_id}:log-group:{name}:*",
+        "storedBytes": 0,
+        **attributes,
+    }
+
+
+LOG_GROUPS = {
+    "111111111111": [
+        log_group("huge", "111111111111", storedBytes=3 * TB),
+        log_group("retained", "111111111111", storedBytes=2 * TB, retentionInDays=30),
+        log_group(
+            "encrypted",
+            "111111111111",
+            region="us-east-1",
+            kmsKeyId="arn:aws:kms:us-east-1:111111111111:key/test",
+        ),
+    ],
+    "222222222222": [
+        log_group("large", "222222222222", storedBytes=TB + 1),
+        log_group("small", "222222222222", storedBytes=1024),
+    ],
+}
+
+
+def write_report(tmp_path, sharded):
+    from scooper.core.utils.io import ShardedReportWriter
+
+    details = {"level": "org"}
+    if sharded:
+        writer = ShardedReportWriter("cloudwatch", root=tmp_path)
+        for account_id, log_groups in LOG_GROUPS.items():
+            writer.write(account_id, log_groups)
+        details["shards"] = writer.close()
+    else:
+        details["log_groups"] = LOG_GROUPS
+
+    path = tmp_path / "cloudwatch.json"
+    with path.open("w") as f:
+        dump({"service": "CloudWatch", "details": details}, f)
+    return path
+
+
+@mark.parametrize("sharded", [False, True])
+def test_query(tmp_path, sharded):
+    from scooper.sources.inventory import LogGroupInventory, Predicate, load_inventory
+
+    report_path = write_report(tmp_path, sharded)
+    inventory = load_inventory(report_path)
+    inventory_path = tmp_path / "cloudwatch_inventory.npz"
+
+    assert len(inventory) == 5 and inventory_path.exists()
+
+    mask = inventory.mask(
+        [Predicate.parse("storedBytes>1TB"), Predicate.parse("retentionInDays=never")]
+    )
+    assert [row["name"] for row in inventory.top(mask=mask)] == ["huge", "large"]
+
+    unencrypted = inventory.mask([Predicate.parse("kmsKeyId=none")])
+    assert inventory.group_by("account", unencrypted) == [
+        {"account": "111111111111", "count": 2, "storedBytes": 5 * TB},
+        {"account": "222222222222", "count": 2, "storedBytes": TB + 1025},
+    ]
+    assert inventory.group_by("region", top=1) == [
+        {"region": "ca-central-1", "count": 4, "storedBytes": 6 * TB + 1025}
+    ]
+    assert inventory.group_by("retentionInDays") == [
+        {"retentionInDays": None, "count": 4, "storedBytes": 4 * TB + 1025},
+        {"retentionInDays": 30, "count": 1, "storedBytes": 2 * TB},
+    ]
+    assert inventory.top(1) == [
+        {
+            "account": "111111111111",
+            "region": "ca-central-1",
+            "name": "huge",
+            "storedBytes": 3 * TB,
+            "retentionInDays": None,
+            "creationTime": 1700000000000,
+            "kmsKeyId": None,
+        }
+    ]
+    assert not inventory.mask([Predicate.parse("account=333333333333")]).any()
+    assert inventory.mask([Predicate.parse("retentionInDays<60")]).sum() == 1
+
+    # Cached inventory is loaded as long as the report is no newer
+    loaded = LogGroupInventory.load(inventory_path)
+    assert [loaded.name(i) for i in range(len(loaded))] == [
+        inventory.name(i) for i in range(len(inventory))
+    ]
+    assert load_inventory(report_path).group_by("account") == inventory.group_by(
+        "account"
+    )
+
+
+def test_account_level_report(tmp_path):
+    from scooper.sources.inventory import LogGroupInventory
+
+    path = tmp_path / "cloudwatch.json"
+    with path.open("w") as f:
+        dump({"details": {"log_groups": LOG_GROUPS["222222222222"]}}, f)
+
+    # Account of each Log Group comes from its ARN
+    assert LogGroupInventory.from_report(path).group_by("account") == [
+        {"account": "222222222222", "count": 2, "storedBytes": TB + 1025}
+    ]
+
+
+@mark.parametrize(
+    "expression",
+    [
+        "storedBytes>>1",
+        "name=huge",
+        "account>1",
+        "retentionInDays>never",
+        "storedBytes>1XB",
+    ],
+)
+def test_invalid_predicate(expression):
+    from scooper.sources.inventory import Predicate
+
+    with raises(ValueError):
+        Predicate.parse(expression)
+
+
+def test_summary_only_report(tmp_path):
+    from scooper.sources.inventory import LogGroupInventory
+
+    path = tmp_path / "cloudwatch.json"
+    with path.open("w") as f:
+        dump({"details": {"summary": {"log_group_count": 1}}}, f)
+
+    with raises(ValueError, match="--cloudwatch-listing"):
+        LogGroupInventory.from_report(path)
@@ -0,0 +1,100 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from json import load
+
+
+def test_sharded_report_writer(tmp_path):
+    from scooper.core.utils.io import ShardedReportWriter
+
+    writer = ShardedReportWriter("cloudwatch", root=tmp_path)
+    writer.write("111111111111", [{"logGroupName": "a"}])
+    writer.write("222222222222", [])
+    index_path = writer.close(level="org")
+
+    with (tmp_path / index_path).open() as f:
+        index = load(f)
+    with (tmp_path / "cloudwatch" / "111111111111.json").open() as f:
+        shard = load(f)
+
+    assert index["level"] == "org"
+    assert list(index["shards"]) == ["111111111111", "222222222222"]
+    # Shards are referred to relative to the report prefix, wherever it's written
+    assert index_path == "cloudwatch/index.json"
+    assert index["shards"]["111111111111"]["path"] == "cloudwatch/111111111111.json"
+    assert shard == [{"logGroupName": "a"}]
+    assert set(writer.paths) == {
+        "111111111111.json",
+        "222222222222.json",
+        "index.json",
+    }
+
+
+def test_s3_publisher(s3_client, tmp_path):
+    from scooper.core.utils.io import S3Publisher
+
+    bucket_name = "publisher-test"
+    s3_client.create_bucket(Bucket=bucket_name)
+    shard_path = tmp_path / "111111111111.json"
+    shard_path.write_text('[{"logGroupName": "a"}]')
+
+    def publish(report: dict) -> S3Publisher:
+        with S3Publisher(bucket_name, s3_client=s3_client) as publisher:
+            publisher.publish_dict(report, "scooper/cloudwatch.json")
+            publisher.publish_file(shard_path, "scooper/cloudwatch/111111111111.json")
+        return publisher
+
+    first = publish({"level": "org", "accounts": {"b", "a"}})
+    # Key and set order don't count as changes
+    second = publish({"accounts": {"a", "b"}, "level": "org"})
+    shard_path.write_text("[]")
+    third = publish({"level": "org", "accounts": {"a"}})
+
+    assert (first.published, first.skipped) == (2, 0)
+    assert (second.published, second.skipped) == (0, 2)
+    assert (third.published, third.skipped) == (2, 0)
+    body = s3_client.get_object(Bucket=bucket_name, Key="scooper/cloudwatch.json")
+    assert load(body["Body"]) == {"accounts": ["a"], "level": "org"}
+
+
+def test_date_range_input(monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    from scooper.core.utils.io import date_range_input
+
+    start = datetime.now(tz=timezone.utc) - timedelta(days=400)
+    end = datetime.now(tz=timezone.utc) - timedelta(days=399)
+    old_dates = [f"{date:%Y-%m-%d %H:%M:%S}" for date in (start, end)]
+
+    # Dates older than LookupEvents' 90 days are accepted when nothing limits them
+    answers = iter(old_dates)
+    monkeypatch.setattr("builtins.input", lambda _: next(answers))
+    start_time, end_time = date_range_input(max_age=None)
+    assert end_time - start_time == timedelta(days=1)
+
+    # They're asked for again otherwise
+    recent = f"{datetime.now(tz=timezone.utc):%Y-%m-%d %H:%M:%S}"
+    answers = iter([old_dates[0], recent, recent])
+    start_time, _ = date_range_input()
+    assert start_time > datetime.now(tz=timezone.utc) - timedelta(days=1)
@@ -0,0 +1,117 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from datetime import datetime, timezone
+from json import dumps, loads
+
+from pytest import raises
+
+
+def event(i, **attributes):
+    return {
+        "eventTime": f"2024-01-01T10:{i % 60:02d}:00Z",
+        "eventName": "AssumeRole" if i % 2 else "GetObject",
+        "sourceIPAddress": f"10.0.{i // 256}.{i % 256}",
+        "userIdentity": {
+            "arn": "arn:aws:iam::123456789012:user/alice",
+            "accessKeyId": f"AKIA{i:016d}",
+        },
+        **attributes,
+    }
+
+
+def test_value_set_degrades_to_bloom_filter():
+    from scooper.incident_response.manifest import (
+        BLOOM_FILTER_BITS,
+        DISTINCT_VALUES_LIMIT,
+        ValueSet,
+    )
+
+    few = ValueSet(["a", "b"])
+    many = ValueSet(str(i) for i in range(DISTINCT_VALUES_LIMIT * 10))
+
+    assert few.to_dict() == {"values": ["a", "b"]}
+    assert few.might_contain("a") and not few.might_contain("c")
+    assert many.values is None
+    assert all(many.might_contain(str(i)) for i in range(DISTINCT_VALUES_LIMIT * 10))
+    assert sum(many.might_contain(f"x{i}") for i in range(1000)) < 50
+    # Degraded sets are as large as their filter
+    assert few.memory < BLOOM_FILTER_BITS // 8 < many.memory
+
+    few.merge(many)
+    loaded = ValueSet.from_dict(loads(dumps(few.to_dict())))
+    assert loaded.values is None
+    assert loaded.might_contain("a") and loaded.might_contain("639")
+
+
+def test_object_summary():
+    from scooper.incident_response.manifest import ObjectSummary
+
+    first = ObjectSummary.of_events([event(i) for i in range(5, 10)])
+    second = ObjectSummary.of_events(
+        [event(i) for i in range(100, 200)] + [{"eventTime": "2024-01-01T10:00:00Z"}]
+    )
+    first.merge(second)
+
+    assert first.events == 106
+    assert (first.min_event_time, first.max_event_time) == (
+        "2024-01-01T10:00:00Z",
+        "2024-01-01T10:59:00Z",
+    )
+    assert first.fields["eventName"].to_dict() == {
+        "values": ["AssumeRole", "GetObject"]
+    }
+    assert first.fields["userIdentity.accessKeyId"].values is None
+    assert first.fields["userIdentity.accessKeyId"].might_contain(
+        "AKIA0000000000000007"
+    )
+    assert first.fields["sourceIPAddress"].might_contain("10.0.0.150")
+
+
+def test_manifest_round_trip():
+    from scooper.incident_response.manifest import ObjectSummary, ScoopManifest
+    from scooper.incident_response.partitions import PartitionLayout
+
+    manifest = ScoopManifest(
+        "123456789012",
+        "ca-central-1",
+        datetime(2024, 1, 1, tzinfo=timezone.utc),
+        datetime(2024, 1, 2, tzinfo=timezone.utc),
+        PartitionLayout("hive", "day", max_events=1000),
+    )
+    manifest.objects["b"] = ObjectSummary.of_events([event(1)])
+    manifest.objects["a"] = ObjectSummary.of_events([event(2)])
+    obj = loads(dumps(manifest.to_dict()))
+    loaded = ScoopManifest.from_dict(obj)
+
+    assert manifest.key == (
+        "scooper/manifests/CloudTrail/123456789012/ca-central-1/"
+        "Manifest_2024-01-01T00:00:00+00:00_2024-01-02T00:00:00+00:00.json"
+    )
+    assert list(obj["objects"]) == ["a", "b"]
+    assert loaded.layout == manifest.layout
+    assert loaded.to_dict() == obj
+
+    with raises(ValueError):
+        ScoopManifest.from_dict({**obj, "version": 0})
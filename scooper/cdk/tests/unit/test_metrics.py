@@ -0,0 +1,68 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from boto3 import client
+from moto import mock_logs
+
+from scooper.core.utils.metrics import ApiMetrics
+
+
+@mock_logs
+def test_instrument(logs_client):
+    metrics = ApiMetrics()
+    logs_client = metrics.instrument(client("logs"), account_id="123456789012")
+
+    with metrics.source("CloudWatch"):
+        logs_client.create_log_group(logGroupName="test")
+        logs_client.describe_log_groups()
+    logs_client.describe_log_groups()
+
+    calls = {call["operation"]: call for call in metrics.to_dict()["calls"]}
+    summary = metrics.source_summary("CloudWatch")
+
+    assert calls["DescribeLogGroups"]["calls"] == 2
+    assert calls["DescribeLogGroups"]["account"] == "123456789012"
+    assert calls["DescribeLogGroups"]["region"] == "us-east-1"
+    assert summary["api_calls"] == 2 and summary["wall_seconds"] > 0
+
+
+@mock_logs
+def test_openmetrics(logs_client):
+    metrics = ApiMetrics()
+    logs_client = metrics.instrument(client("logs"))
+    logs_client.describe_log_groups()
+
+    lines = metrics.to_openmetrics().splitlines()
+
+    assert lines[-1] == "# EOF"
+    assert (
+        'scooper_api_calls_total{service="logs",operation="DescribeLogGroups",'
+        'account="unknown",region="us-east-1"} 1'
+    ) in lines
+    assert any(
+        line.startswith("scooper_api_call_duration_seconds_bucket")
+        and 'le="+Inf"' in line
+        and line.endswith(" 1")
+        for line in lines
+    )
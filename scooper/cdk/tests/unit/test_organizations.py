@@ -0,0 +1,137 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from datetime import timedelta
+
+from moto import mock_organizations
+
+
+def create_organization(organizations_client) -> dict[str, str]:
+    organizations_client.create_organization(FeatureSet="ALL")
+    root_id = organizations_client.list_roots()["Roots"][0]["Id"]
+    business_unit = organizations_client.create_organizational_unit(
+        ParentId=root_id, Name="business-unit"
+    )["OrganizationalUnit"]["Id"]
+    team = organizations_client.create_organizational_unit(
+        ParentId=business_unit, Name="team"
+    )["OrganizationalUnit"]["Id"]
+
+    account_ids = {}
+    for name, parent_id in (("root", None), ("bu", business_unit), ("team", team)):
+        account_id = organizations_client.create_account(
+            AccountName=name, Email=f"{name}@example.com"
+        )["CreateAccountStatus"]["AccountId"]
+        if parent_id is not None:
+            organizations_client.move_account(
+                AccountId=account_id,
+                SourceParentId=root_id,
+                DestinationParentId=parent_id,
+            )
+        account_ids[name] = account_id
+
+    return {"root": root_id, "business_unit": business_unit, **account_ids}
+
+
+@mock_organizations
+def test_filter(organizations_client, tmp_path):
+    from scooper.core.utils.organizations import OrganizationInventory
+
+    ids = create_organization(organizations_client)
+    inventory = OrganizationInventory.load(path=tmp_path / "organization.json")
+
+    subtree = {
+        account["Id"] for account in inventory.filter(ou_ids=[ids["business_unit"]])
+    }
+    assert subtree == {ids["bu"], ids["team"]}
+
+    targeted = inventory.filter(
+        account_ids=[ids["root"]], ou_ids=[ids["business_unit"]], exclude=[ids["team"]]
+    )
+    assert {account["Id"] for account in targeted} == {ids["root"], ids["bu"]}
+
+    assert len(inventory.filter()) == len(inventory.accounts)
+
+
+@mock_organizations
+def test_cache(organizations_client, tmp_path):
+    from scooper.core.utils.organizations import OrganizationInventory
+
+    create_organization(organizations_client)
+    path = tmp_path / "organization.json"
+    inventory = OrganizationInventory.load(path=path)
+    organizations_client.create_account(AccountName="new", Email="new@example.com")
+
+    assert len(OrganizationInventory.load(path=path).accounts) == len(
+        inventory.accounts
+    )
+    assert (
+        len(OrganizationInventory.load(path=path, ttl=timedelta(0)).accounts)
+        == len(inventory.accounts) + 1
+    )
+
+
+@mock_organizations
+def test_failed_walk(organizations_client, tmp_path, monkeypatch):
+    from botocore.exceptions import ClientError
+    from pytest import raises
+
+    from scooper.core.utils.organizations import ORG_CLIENT, OrganizationInventory
+
+    create_organization(organizations_client)
+    path = tmp_path / "organization.json"
+
+    def throttled(**_):
+        raise ClientError(
+            {"Error": {"Code": "TooManyRequestsException", "Message": "Throttled"}},
+            "ListAccountsForParent",
+        )
+
+    # A walk missing accounts is never cached, so the next run walks again
+    with monkeypatch.context() as m:
+        m.setattr(ORG_CLIENT, "list_accounts_for_parent", throttled)
+        with raises(ClientError):
+            OrganizationInventory.load(path=path)
+    assert not path.exists()
+
+    assert len(OrganizationInventory.load(path=path).accounts) == 4
+    assert path.exists()
+
+
+@mock_organizations
+def test_unknown_target_accounts(
+    organizations_client, sts_client, tmp_path, monkeypatch, caplog
+):
+    from logging import WARNING
+
+    from scooper.core.config import ScooperConfig
+
+    monkeypatch.chdir(tmp_path)
+    ids = create_organization(organizations_client)
+    config = ScooperConfig(
+        "org", target_accounts=(ids["root"], "999999999999"), inventory_ttl=timedelta(0)
+    )
+
+    with caplog.at_level(WARNING, logger="scooper.core.config"):
+        assert [account["Id"] for account in config.accounts] == [ids["root"]]
+    assert "999999999999" in caplog.text
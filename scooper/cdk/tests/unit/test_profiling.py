@@ -0,0 +1,116 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+import tracemalloc
+from json import loads
+
+from scooper.core.utils.profiling import Profiler
+
+
+def test_nested_phases(tmp_path):
+    profiler = Profiler()
+    profiler.enable()
+
+    try:
+        with profiler.phase("outer"):
+            with profiler.phase("inner"):
+                data = [bytes(1024) for _ in range(1024)]
+            del data
+        profiler.write(tmp_path)
+    finally:
+        tracemalloc.stop()
+
+    summary = loads((tmp_path / "summary.json").read_text())
+
+    assert set(summary) == {"outer", "inner"}
+    assert summary["inner"]["peak_bytes"] >= 1024 * 1024
+    assert summary["outer"]["peak_bytes"] >= summary["inner"]["peak_bytes"]
+    assert summary["inner"]["top_allocators"]
+    assert (tmp_path / "outer.prof").exists() and (tmp_path / "inner.txt").exists()
+
+
+def test_disabled(tmp_path):
+    profiler = Profiler()
+
+    with profiler.phase("phase"):
+        pass
+    profiler.write(tmp_path)
+
+    assert not any(tmp_path.iterdir())
+
+
+def test_threads(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    profiler = Profiler()
+    profiler.enable()
+
+    def work(_):
+        with profiler.phase("account"):
+            with profiler.phase("page"):
+                return sum(range(10000))
+
+    try:
+        with profiler.phase("source"):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                assert len(list(executor.map(work, range(32)))) == 32
+        profiler.write(tmp_path)
+    finally:
+        tracemalloc.stop()
+
+    summary = loads((tmp_path / "summary.json").read_text())
+
+    # Each thread nests its own phases, and every entry's wall time counts
+    assert set(summary) == {"source", "account", "page"}
+    assert summary["account"]["wall_seconds"] >= summary["page"]["wall_seconds"] > 0
+    assert not profiler._stack
+
+
+def test_scoop_stages(monkeypatch):
+    from scooper.incident_response.cloudtrail import ScoopStats
+
+    profiler = Profiler()
+    profiler.enable()
+    snapshots = []
+    take_snapshot = tracemalloc.take_snapshot
+
+    def counted_snapshot():
+        snapshots.append(None)
+        return take_snapshot()
+
+    monkeypatch.setattr("scooper.incident_response.cloudtrail.PROFILER", profiler)
+    monkeypatch.setattr(tracemalloc, "take_snapshot", counted_snapshot)
+    stats = ScoopStats()
+
+    try:
+        with profiler.phase("scoop.write"):
+            for _ in range(100):
+                with stats.stage("upload", profiled=False) as stage:
+                    stage.items += 1
+    finally:
+        tracemalloc.stop()
+
+    # Per-object stages add up their times, but only their enclosing phase is profiled
+    assert stats.stages["upload"].items == 100 and stats.stages["upload"].seconds > 0
+    assert len(snapshots) == 2
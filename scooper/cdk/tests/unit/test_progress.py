@@ -0,0 +1,55 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from logging import INFO
+
+from scooper.core.utils.progress import ProgressReporter
+
+
+def test_aggregate(caplog):
+    progress = ProgressReporter(log_interval=0, stream=StringIO())
+    progress.cover("cloudtrail.lookup_events", total_seconds=100)
+
+    def work(_) -> None:
+        progress.update(
+            "cloudtrail.lookup_events", pages=1, items=50, covered_seconds=10
+        )
+
+    with caplog.at_level(INFO, logger="scooper.core.utils.progress"):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(work, range(5)))
+        progress.update("logs.describe_log_groups", pages=2, items=3)
+        snapshot = progress.snapshot()
+        progress.close()
+
+    assert snapshot["cloudtrail.lookup_events"]["items"] == 250
+    assert snapshot["cloudtrail.lookup_events"]["covered_fraction"] == 0.5
+    assert snapshot["cloudtrail.lookup_events"]["eta_seconds"] is not None
+    assert snapshot["overall"]["pages"] == 7 and snapshot["overall"]["items"] == 253
+    assert any(
+        "stage=overall" in record.message and "items=253" in record.message
+        for record in caplog.records
+    )
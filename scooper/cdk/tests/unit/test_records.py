@@ -0,0 +1,124 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+import tracemalloc
+from copy import deepcopy
+from dataclasses import asdict
+from json import dumps, loads
+from pickle import dumps as pickle_dumps
+from pickle import loads as pickle_loads
+
+from pytest import raises
+
+KMS_KEY_ARN = (
+    "arn:aws:kms:ca-central-1:123456789012:key/0b1c2d3e-aaaa-bbbb-cccc-0123456789ab"
+)
+
+
+def log_group(i: int) -> dict:
+    return {
+        "logGroupName": f"/aws/lambda/function-{i}",
+        "creationTime": 1700000000000 + i,
+        "retentionInDays": 30,
+        "metricFilterCount": 0,
+        "arn": f"arn:aws:logs:ca-central-1:123456789012:log-group:/aws/lambda/function-{i}:*",
+        "storedBytes": 1024 * i,
+        "kmsKeyId": KMS_KEY_ARN,
+        "logGroupClass": "STANDARD",
+    }
+
+
+def test_record_reads_and_encodes_as_response_dict():
+    from scooper.core.utils.io import dict_to_json_bytes
+    from scooper.sources.records import LogGroup
+
+    response = {**log_group(1), "unknownKey": {"nested": True}}
+    record = LogGroup(response)
+
+    assert record == response
+    assert record["kmsKeyId"] == KMS_KEY_ARN
+    assert record["unknownKey"] == {"nested": True}
+    assert "dataProtectionStatus" not in record
+    assert record.get("dataProtectionStatus") is None
+    assert {"accountId": "123456789012", **record} == {
+        "accountId": "123456789012",
+        **response,
+    }
+    assert loads(dict_to_json_bytes({"log_groups": [record]})) == {
+        "log_groups": [response]
+    }
+    assert pickle_loads(pickle_dumps(record)) == response
+    assert deepcopy(record) is record
+
+    with raises(AttributeError):
+        record.storedBytes = 0
+    with raises(KeyError):
+        record["dataProtectionStatus"]
+
+
+def test_report_details_keep_json_shape():
+    from scooper.sources.records import Trail
+    from scooper.sources.report import LoggingReport
+
+    trail = {
+        "Name": "org-trail",
+        "S3BucketName": "trail-bucket",
+        "HomeRegion": "ca-central-1",
+        "IsOrganizationTrail": True,
+        "EventSelectors": [{"ReadWriteType": "All"}],
+    }
+    report = LoggingReport(
+        service="CloudTrail",
+        logging_enabled=True,
+        details={"level": "org", "trails": [Trail(trail)]},
+    )
+
+    assert asdict(report)["details"]["trails"] == [trail]
+    assert loads(dumps(Trail(trail).to_dict())) == trail
+
+
+def test_records_intern_repeated_strings_and_use_less_memory():
+    from scooper.sources.records import LogGroup
+
+    # Strings decoded from a response are distinct objects, even when equal
+    payload = dumps([log_group(i) for i in range(1000)])
+
+    tracemalloc.start()
+    try:
+        dicts = loads(payload)
+        dicts_size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    tracemalloc.start()
+    try:
+        records = [LogGroup(obj) for obj in loads(payload)]
+        records_size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    assert records[0]["kmsKeyId"] is records[-1]["kmsKeyId"]
+    assert not hasattr(records[0], "__dict__")
+    assert records == dicts
+    assert records_size < dicts_size * 0.75
@@ -0,0 +1,168 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+import gzip
+from datetime import datetime, timezone
+from json import dumps, loads
+
+from pytest import mark
+
+TRAIL = {
+    "Name": "trail",
+    "S3BucketName": "search-trail-bucket",
+    "IsOrganizationTrail": False,
+    "IsMultiRegionTrail": True,
+    "HomeRegion": "us-east-1",
+}
+
+
+def record(time, access_key_id, event_name="GetObject"):
+    return {
+        "eventTime": f"2024-01-01T{time}Z",
+        "eventName": event_name,
+        "awsRegion": "us-east-1",
+        "sourceIPAddress": "10.0.0.1",
+        "readOnly": event_name.startswith("Get"),
+        "userIdentity": {
+            "arn": "arn:aws:iam::123456789012:user/alice",
+            "accessKeyId": access_key_id,
+        },
+        "recipientAccountId": "123456789012",
+    }
+
+
+def scoop(s3_client):
+    from scooper.incident_response.cloudtrail import write_cloudtrail_scoop_to_s3
+
+    s3_client.create_bucket(Bucket="search-trail-bucket")
+    s3_client.create_bucket(Bucket="search-bucket")
+    prefix = "AWSLogs/123456789012/CloudTrail/us-east-1/2024/01/01"
+    records = [
+        record(f"{hour:02d}:{minute:02d}:00", f"AKIA{hour}")
+        for hour in range(9, 12)
+        for minute in (10, 40)
+    ]
+    records.append(record("10:45:00", "AKIALEAKED", "PutObject"))
+    s3_client.put_object(
+        Bucket="search-trail-bucket",
+        Key=f"{prefix}/123456789012_CloudTrail_us-east-1_20240101T1200Z_abc.json.gz",
+        Body=gzip.compress(dumps({"Records": records}).encode()),
+    )
+
+    write_cloudtrail_scoop_to_s3(
+        datetime(2024, 1, 1, 9, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, 12, tzinfo=timezone.utc),
+        "search-bucket",
+        trail=TRAIL,
+    )
+
+
+def search(store, processes=1, **query):
+    from scooper.incident_response.search import EventQuery, SearchStats, search_scoops
+
+    stats = SearchStats()
+    lines = b"".join(
+        search_scoops(store, EventQuery(**query), processes, stats)
+    ).splitlines()
+    return [loads(line) for line in lines], stats
+
+
+@mark.parametrize("processes", [1, 2])
+def test_search_s3(s3_client, sts_client, processes):
+    from scooper.incident_response.search import S3ScoopStore
+
+    scoop(s3_client)
+    store = S3ScoopStore("search-bucket", s3_client)
+
+    # Only the 10:00 object's manifest summary holds the leaked key
+    events, stats = search(
+        store, processes, field_values=(("userIdentity.accessKeyId", "AKIALEAKED"),)
+    )
+    assert [event["eventTime"] for event in events] == ["2024-01-01T10:45:00Z"]
+    assert (stats.scoops, stats.objects, stats.searched, stats.events) == (1, 3, 1, 1)
+
+    # Values of non-indexed fields match as JSON, and objects are output in time order
+    events, stats = search(
+        store,
+        processes,
+        field_values=(("readOnly", "true"), ("eventName", "GetObject")),
+        start_time=datetime(2024, 1, 1, 9, 30, tzinfo=timezone.utc),
+        end_time=datetime(2024, 1, 1, 11, 30, tzinfo=timezone.utc),
+    )
+    assert [event["eventTime"] for event in events] == [
+        "2024-01-01T09:40:00Z",
+        "2024-01-01T10:10:00Z",
+        "2024-01-01T10:40:00Z",
+        "2024-01-01T11:10:00Z",
+    ]
+    assert stats.searched == 3
+
+    # Scoops of other accounts aren't searched
+    _, stats = search(store, field_values=(("recipientAccountId", "210987654321"),))
+    assert (stats.scoops, stats.searched) == (0, 0)
+
+
+def test_search_local(s3_client, sts_client, tmp_path):
+    from scooper.incident_response.search import LocalScoopStore
+
+    scoop(s3_client)
+    for obj in s3_client.list_objects_v2(Bucket="search-bucket")["Contents"]:
+        path = tmp_path / obj["Key"]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        s3_client.download_file("search-bucket", obj["Key"], str(path))
+
+    events, stats = search(
+        LocalScoopStore(tmp_path),
+        field_values=(
+            ("userIdentity.accessKeyId", "AKIA9"),
+            ("userIdentity.accessKeyId", "AKIA11"),
+        ),
+        end_time=datetime(2024, 1, 1, 11, 30, tzinfo=timezone.utc),
+    )
+    assert [event["eventTime"] for event in events] == [
+        "2024-01-01T09:10:00Z",
+        "2024-01-01T09:40:00Z",
+        "2024-01-01T11:10:00Z",
+    ]
+    assert (stats.objects, stats.searched) == (3, 2)
+
+
+def test_search_object():
+    from scooper.core.utils.io import dict_to_json_bytes
+    from scooper.incident_response.search import EventQuery, _search_object
+
+    query = EventQuery((("userAgent", 'aws-cli/2.0 "quoted"'), ("readOnly", "false")))
+    events = [
+        {"userAgent": 'aws-cli/2.0 "quoted"', "readOnly": False, "n": 1},
+        {"userAgent": 'aws-cli/2.0 "quoted"', "readOnly": True, "n": 2},
+        {"userAgent": "boto3", "readOnly": False, "resources": [{"n": 3}]},
+        {"userAgent": 'aws-cli/2.0 "quoted"', "readOnly": False, "n": 4},
+    ]
+    expected = (2, b"".join(dumps(events[i]).encode() + b"\n" for i in (0, 3)))
+
+    assert query.may_match_text(dumps(events).encode())
+    assert not query.may_match_text(dumps(events[1:3]).encode().replace(b"false", b"0"))
+    # Scooped objects are scanned for events holding values, and others decoded whole
+    assert _search_object(dict_to_json_bytes(events), query) == expected
+    assert _search_object(dumps(events).encode(), query) == expected
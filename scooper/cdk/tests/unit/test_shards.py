@@ -0,0 +1,119 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from json import load
+
+from pytest import raises
+
+
+def _write_shard(shard, accounts, org_wide, run_id="run-1"):
+    from scooper.core.utils.io import ShardedReportWriter, write_dict_to_file
+
+    writer = ShardedReportWriter("cloudwatch", root=shard.directory)
+    for account_id in accounts:
+        writer.write(account_id, [{"logGroupName": account_id}])
+    write_dict_to_file(
+        {
+            "service": "CloudWatch",
+            "logging_enabled": bool(accounts),
+            "details": {
+                "level": "org",
+                "shards": writer.close(service="CloudWatch", level="org"),
+            },
+            "event_time": f"2024-01-01T00:00:0{shard.index}+00:00",
+            "owned_by_scooper": False,
+            "timings": {"api_calls": len(accounts)},
+        },
+        shard.directory / "cloudwatch.json",
+    )
+    if org_wide:
+        write_dict_to_file(
+            {
+                "service": "CloudTrail",
+                "logging_enabled": True,
+                "details": {},
+                "event_time": "2024-01-01T00:00:00+00:00",
+            },
+            shard.directory / "cloudtrail.json",
+        )
+    shard.write_manifest(run_id, level="org", accounts=accounts)
+
+
+def test_shard_contains():
+    from scooper.core.utils.shards import Shard
+
+    shards = [Shard.parse(f"{index}/3") for index in range(3)]
+    account_ids = [f"{n:012d}" for n in range(100)]
+
+    # Every account falls in exactly one shard
+    for account_id in account_ids:
+        assert sum(shard.contains(account_id) for shard in shards) == 1
+    with raises(ValueError):
+        Shard.parse("3/3")
+
+
+def test_merge_shards(tmp_path, monkeypatch):
+    from scooper.core.utils.shards import Shard, merge_shards
+
+    monkeypatch.chdir(tmp_path)
+    _write_shard(Shard(0, 2), ["111111111111"], org_wide=True)
+
+    with raises(ValueError, match="Missing shard"):
+        merge_shards()
+
+    _write_shard(Shard(1, 2), ["222222222222", "333333333333"], org_wide=False)
+    merge_shards()
+
+    with open("out/cloudwatch.json") as f:
+        cloudwatch = load(f)
+    with open("out/cloudwatch/index.json") as f:
+        index = load(f)
+    with open("out/cloudwatch/333333333333.json") as f:
+        shard = load(f)
+    with open("out/cloudtrail.json") as f:
+        cloudtrail = load(f)
+
+    assert cloudwatch["logging_enabled"]
+    assert cloudwatch["details"]["shards"] == "cloudwatch/index.json"
+    assert cloudwatch["event_time"] == "2024-01-01T00:00:01+00:00"
+    assert set(cloudwatch["timings"]["shards"]) == {"0-of-2", "1-of-2"}
+    assert list(index["shards"]) == ["111111111111", "222222222222", "333333333333"]
+    assert index["shards"]["333333333333"]["path"] == "cloudwatch/333333333333.json"
+    assert shard == [{"logGroupName": "333333333333"}]
+    assert cloudtrail["service"] == "CloudTrail"
+
+
+def test_merge_stale_shards(tmp_path, monkeypatch):
+    from scooper.core.utils.shards import Shard, merge_shards
+
+    monkeypatch.chdir(tmp_path)
+    _write_shard(Shard(0, 2), ["111111111111"], org_wide=True, run_id="run-2")
+    # Left over from an earlier run split the same number of ways
+    _write_shard(Shard(1, 2), ["222222222222"], org_wide=False, run_id="run-1")
+
+    with raises(ValueError, match="stale runs"):
+        merge_shards()
+
+    _write_shard(Shard(1, 2), ["222222222222"], org_wide=False, run_id="run-2")
+    merge_shards()
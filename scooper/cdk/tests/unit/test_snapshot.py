@@ -0,0 +1,97 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from datetime import datetime, timezone
+
+from pytest import importorskip, mark, raises
+
+
+@mark.parametrize("compression", [None, "zstd"])
+def test_report_snapshot(tmp_path, compression):
+    from scooper.core.utils.io import ShardedReportWriter
+    from scooper.core.utils.snapshot import Snapshot, write_report_snapshot
+    from scooper.sources.report import LoggingReport
+
+    if compression:
+        importorskip("zstandard")
+
+    event_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    writer = ShardedReportWriter("cloudwatch", root=tmp_path)
+    for account_id in ("111111111111", "222222222222"):
+        writer.write(account_id, [{"logGroupName": account_id}])
+    reports = {
+        "cloudwatch": LoggingReport(
+            service="CloudWatch",
+            logging_enabled=True,
+            details={"level": "org", "shards": writer.close()},
+            event_time=event_time,
+        ),
+        "organization_metadata": {"accounts": {"111111111111", "222222222222"}},
+    }
+    path = write_report_snapshot(
+        reports,
+        tmp_path / "reports.snapshot",
+        shard_writers={"cloudwatch": writer},
+        compression=compression,
+    )
+
+    # Corrupt every other section, which a lazy load must never touch
+    with Snapshot(path) as snapshot:
+        others = [
+            snapshot._sections[name]
+            for name in snapshot.sections
+            if name != "cloudwatch/222222222222"
+        ]
+    data = bytearray(path.read_bytes())
+    for offset, length in others:
+        data[offset : offset + length] = b"\xc1" * length
+    corrupted = tmp_path / "corrupted.snapshot"
+    corrupted.write_bytes(data)
+
+    with Snapshot(corrupted) as snapshot:
+        assert snapshot.compression == compression
+        assert snapshot.accounts("cloudwatch") == ["111111111111", "222222222222"]
+        assert snapshot.account("cloudwatch", "222222222222") == [
+            {"logGroupName": "222222222222"}
+        ]
+
+    with Snapshot(path) as snapshot:
+        cloudwatch = snapshot.load("cloudwatch")
+        assert cloudwatch["event_time"] == event_time
+        assert cloudwatch["details"]["level"] == "org"
+        assert sorted(snapshot.load("organization_metadata")["accounts"]) == [
+            "111111111111",
+            "222222222222",
+        ]
+        with raises(KeyError):
+            snapshot.load("config")
+
+
+def test_not_a_snapshot(tmp_path):
+    from scooper.core.utils.snapshot import Snapshot
+
+    path = tmp_path / "report.json"
+    path.write_text('{"service": "CloudWatch"}')
+    with raises(ValueError, match="not a Scooper snapshot"):
+        Snapshot(path)
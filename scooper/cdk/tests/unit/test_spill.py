@@ -0,0 +1,79 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from datetime import datetime, timezone
+
+
+def fragment(i):
+    from scooper.core.utils.io import dict_to_json_bytes
+    from scooper.incident_response.manifest import ObjectSummary
+
+    events = [{"eventTime": f"2024-01-01T10:00:{i:02d}Z", "eventName": f"Event{i}"}]
+    return ObjectSummary.of_events(events), dict_to_json_bytes(events)[2:-2]
+
+
+def test_spill_buffer():
+    from scooper.incident_response.partitions import Partition
+    from scooper.incident_response.spill import SpillBuffer
+
+    hours = [
+        Partition(datetime(2024, 1, 1, hour, tzinfo=timezone.utc)) for hour in (10, 11)
+    ]
+    fragments = [fragment(i) for i in range(10)]
+    budget = 3 * (len(fragments[0][1]) + fragments[0][0].memory)
+
+    with SpillBuffer(budget) as buffer:
+        for i, (summary, encoded) in enumerate(fragments):
+            buffer.add(hours[i % 2], [(summary, encoded)])
+            assert buffer.memory <= budget
+        directory = buffer.directory
+
+        assert buffer.spills and buffer.spilled(hours[0]) and buffer.spilled(hours[1])
+        flushed = [
+            (partition, [(s.to_dict(), f) for s, f in partition_fragments])
+            for partition, _, partition_fragments in buffer.partitions()
+        ]
+        assert buffer.memory == 0
+
+    # Spilled and held fragments are merged back in the order they were added
+    assert flushed == [
+        (hour, [(s.to_dict(), f) for s, f in fragments[i::2]])
+        for i, hour in enumerate(hours)
+    ]
+    assert not directory.exists()
+
+
+def test_unbounded_spill_buffer():
+    from scooper.incident_response.partitions import Partition
+    from scooper.incident_response.spill import SpillBuffer
+
+    hour = Partition(datetime(2024, 1, 1, 10, tzinfo=timezone.utc))
+    with SpillBuffer() as buffer:
+        fragments = [fragment(i) for i in range(100)]
+        buffer.add(hour, fragments)
+        assert not buffer.spills and not buffer.spilled(hour)
+        # Summaries count towards memory, not only encoded events
+        assert buffer.memory == sum(len(f) + s.memory for s, f in fragments)
+        assert buffer.memory > 2 * sum(len(f) for _, f in fragments)
+        assert buffer._directory is None
@@ -0,0 +1,93 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from json import loads
+
+from scooper.core.utils.tracing import Tracer
+
+
+def test_spans(tmp_path):
+    tracer = Tracer()
+    tracer.enable()
+
+    def work(account_id: str) -> None:
+        with tracer.span(account_id, "account", source="CloudWatch"):
+            pass
+
+    with tracer.span("CloudWatch", "source"):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(work, ["111111111111", "222222222222"]))
+    tracer.write(tmp_path / "trace.json")
+
+    events = loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    spans = [event for event in events if event["ph"] == "X"]
+    thread_names = [event for event in events if event["ph"] == "M"]
+
+    assert {span["name"] for span in spans} == {
+        "CloudWatch",
+        "111111111111",
+        "222222222222",
+    }
+    assert all(span["dur"] >= 0 for span in spans)
+    assert {span["tid"] for span in spans} == {
+        thread_name["tid"] for thread_name in thread_names
+    }
+
+
+def test_disabled(tmp_path):
+    tracer = Tracer()
+
+    with tracer.span("CloudWatch", "source"):
+        pass
+    tracer.write(tmp_path / "trace.json")
+
+    assert not tracer.to_dict()["traceEvents"]
+    assert not (tmp_path / "trace.json").exists()
+
+
+def test_pagination_spans(monkeypatch):
+    from time import sleep
+    from types import SimpleNamespace
+
+    from scooper.core.utils.paginate import iter_pages
+
+    tracer = Tracer()
+    tracer.enable()
+    monkeypatch.setattr("scooper.core.utils.paginate.TRACER", tracer)
+    logs_client = SimpleNamespace(
+        meta=SimpleNamespace(service_model=SimpleNamespace(service_name="logs")),
+        get_paginator=lambda _: SimpleNamespace(
+            paginate=lambda: iter([{"logGroups": [{}]}] * 3)
+        ),
+    )
+
+    for _ in iter_pages(logs_client, "describe_log_groups", "logGroups"):
+        sleep(0.05)
+
+    # Spans only cover fetching pages, not the time spent processing them
+    spans = tracer.to_dict()["traceEvents"]
+    spans = [span for span in spans if span["ph"] == "X"]
+    assert len(spans) >= 3
+    assert all(span["dur"] < 50000 for span in spans)
@@ -0,0 +1,162 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from json import load
+
+from moto import mock_logs
+from pytest import raises
+
+from scooper.core.constants import ACCOUNT, ORG
+
+ACCOUNT_ID = "123456789012"
+
+
+def _event(event_name: str, region: str = "us-east-1", **detail) -> dict:
+    return {
+        "detail-type": "AWS API Call via CloudTrail",
+        "source": "aws.logs",
+        "account": ACCOUNT_ID,
+        "region": region,
+        "detail": {
+            "eventSource": "logs.amazonaws.com",
+            "eventName": event_name,
+            **detail,
+        },
+    }
+
+
+@mock_logs
+def test_watch_local_queue(logs_client, sts_client, tmp_path):
+    from scooper.core.config import ScooperConfig
+    from scooper.core.utils.queues import LocalQueue
+    from scooper.sources.watch import InventoryRefresher, watch
+
+    queue = LocalQueue(tmp_path / "queue")
+    for log_group_name in ("a", "b"):
+        logs_client.create_log_group(logGroupName=log_group_name)
+        queue.send(_event("CreateLogGroup"))
+    queue.send(_event("DescribeLogGroups"))
+    queue.send(_event("CreateLogGroup", region="ca-central-1"))
+    queue.send(_event("DeleteLogGroup", errorCode="ResourceNotFoundException"))
+
+    refresher = InventoryRefresher(
+        ScooperConfig(ACCOUNT), "us-east-1", out=tmp_path / "out"
+    )
+    # Both creations collapse into one refresh of the account's Log Groups
+    assert watch(queue, refresher, wait_seconds=0, once=True) == 1
+    assert not queue.receive(wait_seconds=0)
+
+    with (tmp_path / "out" / "cloudwatch.json").open() as f:
+        report = load(f)
+    assert report["logging_enabled"]
+    assert [
+        log_group["logGroupName"] for log_group in report["details"]["log_groups"]
+    ] == [
+        "a",
+        "b",
+    ]
+
+
+def test_watch_construct():
+    from types import SimpleNamespace
+
+    import aws_cdk as cdk
+    from aws_cdk.assertions import Match, Template
+
+    from scooper.cdk.scooper.watch import Watch
+
+    stack = cdk.Stack(cdk.App(), "WatchTest")
+    Watch(stack, "Watch", scooper_config=SimpleNamespace(level=ORG, org_id="o-test"))
+    template = Template.from_stack(stack)
+
+    template.resource_count_is("AWS::SQS::Queue", 2)
+    template.resource_count_is("AWS::Events::EventBusPolicy", 1)
+    template.has_resource_properties(
+        "AWS::Events::Rule",
+        {
+            "EventPattern": Match.object_like(
+                {
+                    "detail": {
+                        "eventSource": Match.array_with(["logs.amazonaws.com"]),
+                        "eventName": Match.array_with(
+                            ["CreateLogGroup", "PutConfigurationRecorder"]
+                        ),
+                    }
+                }
+            )
+        },
+    )
+
+
+def test_watch_failing_message(tmp_path, monkeypatch):
+    from scooper.core.utils.queues import LocalQueue
+    from scooper.sources import watch as watch_module
+    from scooper.sources.watch import watch
+
+    class Refresher:
+        def __init__(self):
+            self.refreshed = []
+
+        def refresh(self, change):
+            if change.account_id == "000000000000":
+                raise ValueError("Access denied")
+            self.refreshed.append(change.account_id)
+            return True
+
+    def failing_event(index):
+        event = _event("CreateLogGroup")
+        event["account"] = "000000000000"
+        event["region"] = f"region-{index}"
+        return event
+
+    # A full batch of failing messages ahead of one that would succeed
+    queue = LocalQueue(tmp_path / "queue", max_receive_count=2)
+    for index in range(10):
+        queue.send(failing_event(index))
+    queue.send(_event("CreateLogGroup"))
+
+    refresher = Refresher()
+    assert watch(queue, refresher, wait_seconds=0, once=True) == 1
+    assert refresher.refreshed == [ACCOUNT_ID]
+
+    # Failing messages are retried once visible again, then set aside
+    queue = LocalQueue(tmp_path / "retried", visibility_timeout=0, max_receive_count=3)
+    queue.send(failing_event(0))
+
+    class Stop(Exception):
+        pass
+
+    delays = []
+
+    def sleep(seconds):
+        delays.append(seconds)
+        if len(delays) == 3:
+            raise Stop
+
+    monkeypatch.setattr(watch_module, "sleep", sleep)
+    with raises(Stop):
+        watch(queue, refresher, wait_seconds=0)
+    assert delays == [1, 2, 4]
+    assert not queue.receive(wait_seconds=0)
+    assert len(list(queue.dead_letter_directory.glob("*.json"))) == 1
@@ -25,12 +25,104 @@ noted in the files associated with those components.
 from __future__ import annotations
 
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from re import compile, match
 from typing import Optional, Union
 
 from aws_cdk import aws_s3 as s3
 from click import BadParameter, Context, Option
 
+from scooper.core.constants import LOOKUP_ATTRIBUTE_KEYS
+from scooper.core.utils.shards import Shard
+from scooper.sources.inventory import Predicate, parse_size
+
+
+def account_ids_tokenizer(
+    _: Context, __: Option, value: Optional[str]
+) -> tuple[str, ...]:
+    if value is None:
+        return ()
+    account_ids = tuple(
+        account_id.strip() for account_id in value.split(",") if account_id.strip()
+    )
+    for account_id in account_ids:
+        if not match(r"^\d{12}$", account_id):
+            raise BadParameter(f"Invalid AWS account ID: '{account_id}'")
+    return account_ids
+
+
+def lookup_attributes_tokenizer(
+    _: Context, __: Option, value: tuple[str, ...]
+) -> tuple[tuple[str, str], ...]:
+    attributes = []
+    for attribute in value:
+        key, separator, attribute_value = attribute.partition("=")
+        if not separator or not attribute_value:
+            raise BadParameter(
+                f"Invalid lookup attribute, expected KEY=VALUE: '{attribute}'"
+            )
+        if key not in LOOKUP_ATTRIBUTE_KEYS:
+            raise BadParameter(
+                f"Unsupported lookup attribute '{key}', expected one of {', '.join(LOOKUP_ATTRIBUTE_KEYS)}"
+            )
+        attributes.append((key, attribute_value))
+    return tuple(attributes)
+
+
+def field_values_tokenizer(
+    _: Context, __: Option, value: tuple[str, ...]
+) -> tuple[tuple[str, str], ...]:
+    matches = []
+    for field_value in value:
+        path, separator, path_value = field_value.partition("=")
+        if not separator or not path or not path_value:
+            raise BadParameter(
+                f"Invalid event field value, expected FIELD=VALUE: '{field_value}'"
+            )
+        matches.append((path, path_value))
+    return tuple(matches)
+
+
+def utc_datetime(
+    _: Context, __: Option, value: Optional[datetime]
+) -> Optional[datetime]:
+    # Times are given in UTC, like CloudTrail's event times
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc)
+
+
+def shard_tokenizer(_: Context, __: Option, value: Optional[str]) -> Optional[Shard]:
+    if value is None:
+        return None
+    if not match(r"^\d+/\d+$", value):
+        raise BadParameter(f"Invalid shard, expected i/N: '{value}'")
+    try:
+        return Shard.parse(value)
+    except ValueError as e:
+        raise BadParameter(str(e))
+
+
+def predicates_tokenizer(
+    _: Context, __: Option, value: tuple[str, ...]
+) -> tuple[Predicate, ...]:
+    try:
+        return tuple(Predicate.parse(expression) for expression in value)
+    except ValueError as e:
+        raise BadParameter(str(e))
+
+
+def size_tokenizer(_: Context, __: Option, value: Optional[str]) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        size = parse_size(value)
+    except ValueError as e:
+        raise BadParameter(str(e))
+    if size < 1:
+        raise BadParameter(f"Size must be at least one byte: '{value}'")
+    return size
+
 
 def lifecycle_tokenizer(
     _: Context, __: Option, value: Optional[str]
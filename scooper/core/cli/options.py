@@ -22,11 +22,53 @@ Notwithstanding the foregoing, third party components included herein are subjec
 noted in the files associated with those components.
 """
 
-from click import Choice, option
+from pathlib import Path
 
-from scooper.core.cli.callbacks import lifecycle_tokenizer
-from scooper.core.constants import ACCOUNT, ORG
+from click import Choice, DateTime, IntRange
+from click import Path as PathType
+from click import option
 
+from scooper.core.cli.callbacks import (
+    account_ids_tokenizer,
+    field_values_tokenizer,
+    lifecycle_tokenizer,
+    lookup_attributes_tokenizer,
+    predicates_tokenizer,
+    shard_tokenizer,
+    size_tokenizer,
+    utc_datetime,
+)
+from scooper.core.constants import (
+    ACCOUNT,
+    DAY,
+    FANOUT_MAX_CONCURRENCY,
+    HIVE,
+    HOUR,
+    INSIGHT,
+    INVENTORY_CATEGORICAL_COLUMNS,
+    INVENTORY_NUMERIC_COLUMNS,
+    LEGACY,
+    LOOKUP_EVENTS,
+    MANAGEMENT,
+    ORG,
+    TRAIL,
+)
+
+SEARCH_TIME_FORMATS = ["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"]
+
+accounts = option(
+    "--accounts",
+    help="Comma-separated IDs of organization accounts to enumerate",
+    required=False,
+    callback=account_ids_tokenizer,
+)
+cassette_timing = option(
+    "--cassette-timing",
+    is_flag=True,
+    default=False,
+    help="Record API call latencies with --record, or reproduce them with --replay",
+    required=False,
+)
 cloudtrail_scoop = option(
     "--cloudtrail-scoop",
     is_flag=True,
@@ -34,6 +76,61 @@ cloudtrail_scoop = option(
     help="Perform historical CloudTrail data collection of current account and region",
     required=False,
 )
+cloudtrail_scoop_event_category = option(
+    "--cloudtrail-scoop-event-category",
+    help="Category of CloudTrail events to scoop",
+    type=Choice([MANAGEMENT, INSIGHT]),
+    default=MANAGEMENT,
+)
+cloudtrail_scoop_filter = option(
+    "--cloudtrail-scoop-filter",
+    help="Only scoop CloudTrail events with given LookupEvents attribute, as KEY=VALUE (repeatable)",
+    multiple=True,
+    callback=lookup_attributes_tokenizer,
+)
+cloudtrail_scoop_granularity = option(
+    "--cloudtrail-scoop-granularity",
+    help="Time span of each partition of scooped CloudTrail events",
+    type=Choice([HOUR, DAY]),
+    default=HOUR,
+)
+cloudtrail_scoop_layout = option(
+    "--cloudtrail-scoop-layout",
+    help="Layout of scooped CloudTrail objects' keys, the legacy one or hive-style partition keys",
+    type=Choice([LEGACY, HIVE]),
+    default=LEGACY,
+)
+cloudtrail_scoop_max_events = option(
+    "--cloudtrail-scoop-max-events",
+    help="Split each partition of scooped CloudTrail events into objects of at most this many events",
+    type=IntRange(min=1),
+    required=False,
+)
+cloudtrail_scoop_partition_by = option(
+    "--cloudtrail-scoop-partition-by",
+    help="Also partition scooped CloudTrail events by given event field, e.g. eventSource, with --cloudtrail-scoop-layout hive",
+    required=False,
+)
+cloudtrail_scoop_source = option(
+    "--cloudtrail-scoop-source",
+    help="Read historical CloudTrail data with LookupEvents, or from the log files of the trail logging the current region",
+    type=Choice([LOOKUP_EVENTS, TRAIL]),
+    default=LOOKUP_EVENTS,
+)
+cloudwatch_listing = option(
+    "--cloudwatch-listing",
+    is_flag=True,
+    default=False,
+    help="Stream every Log Group to out/cloudwatch_log_groups.ndjson as CloudWatch is enumerated",
+    required=False,
+)
+cloudwatch_summary = option(
+    "--cloudwatch-summary",
+    is_flag=True,
+    default=False,
+    help="Report per-account CloudWatch Log Group aggregates instead of every Log Group",
+    required=False,
+)
 configure_logging = option(
     "--configure-logging",
     is_flag=True,
@@ -48,6 +145,44 @@ destroy = option(
     help="Destroy Scooper resources",
     required=False,
 )
+end_time = option(
+    "--end-time",
+    help="Only search CloudTrail events before given UTC time",
+    type=DateTime(SEARCH_TIME_FORMATS),
+    required=False,
+    callback=utc_datetime,
+)
+exclude = option(
+    "--exclude",
+    help="Comma-separated IDs of organization accounts to skip",
+    required=False,
+    callback=account_ids_tokenizer,
+)
+fanout = option(
+    "--fanout",
+    is_flag=True,
+    default=False,
+    help="Enumerate organization accounts with the serverless fan-out stack rather than locally, deploying it with --configure-logging",
+    required=False,
+)
+fanout_concurrency = option(
+    "--fanout-concurrency",
+    help="Accounts the fan-out stack enumerates at once",
+    type=IntRange(min=1),
+    default=FANOUT_MAX_CONCURRENCY,
+)
+group_by = option(
+    "--group-by",
+    help="Count Log Groups and total their size per value of given column",
+    type=Choice(INVENTORY_CATEGORICAL_COLUMNS + INVENTORY_NUMERIC_COLUMNS),
+    required=False,
+)
+inventory_ttl = option(
+    "--inventory-ttl",
+    help="Minutes a cached organization inventory stays valid for",
+    type=IntRange(min=0),
+    default=60,
+)
 level = option(
     "--level",
     help="Level of enumeration/resource creation to perform",
@@ -60,8 +195,153 @@ lifecycle_rules = option(
     required=False,
     callback=lifecycle_tokenizer,
 )
+local_queue = option(
+    "--local-queue",
+    help="Directory of a local stand-in queue of JSON event files to watch instead of SQS",
+    type=PathType(file_okay=False, path_type=Path),
+    required=False,
+)
+match = option(
+    "--match",
+    help="Only search CloudTrail events whose dotted field has given value, as FIELD=VALUE, e.g. 'userIdentity.accessKeyId=AKIA...' (repeatable)",
+    multiple=True,
+    callback=field_values_tokenizer,
+)
+max_memory = option(
+    "--max-memory",
+    help="Memory budget of a CloudTrail Scoop's buffered events, e.g. 512MB, past which they're spilled to temporary files",
+    required=False,
+    callback=size_tokenizer,
+)
+once = option(
+    "--once",
+    is_flag=True,
+    default=False,
+    help="Stop watching once the queue is drained",
+    required=False,
+)
+ou = option(
+    "--ou",
+    help="ID of organizational unit whose subtree of accounts to enumerate (repeatable)",
+    multiple=True,
+)
+profile = option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Write per-phase CPU and memory profiles of this run to out/profile/",
+    required=False,
+)
+queue_url = option(
+    "--queue-url",
+    help="URL of the SQS queue to watch, output as WatchQueueUrl by deployments with --watch-queue",
+    required=False,
+)
+record = option(
+    "--record",
+    help="Record every AWS API response of this run to given gzipped cassette file",
+    type=PathType(dir_okay=False, path_type=Path),
+    required=False,
+)
+replay = option(
+    "--replay",
+    help="Replay AWS API responses from given cassette file instead of calling AWS",
+    type=PathType(exists=True, dir_okay=False, path_type=Path),
+    required=False,
+)
+report = option(
+    "--report",
+    help="CloudWatch report to query the Log Groups of",
+    type=PathType(exists=True, dir_okay=False, path_type=Path),
+    default=Path("out/cloudwatch.json"),
+)
 role_name = option(
     "--role-name",
     help="Name of role with organization account access",
     default="OrganizationAccountAccessRole",
 )
+scoop_processes = option(
+    "--scoop-processes",
+    help="Worker processes decoding and encoding CloudTrail Scoop events (0 for one per CPU)",
+    type=IntRange(min=0),
+    default=1,
+)
+scoop_bucket = option(
+    "--scoop-bucket",
+    help="S3 bucket CloudTrail Scoops were written to, to search",
+    required=False,
+)
+scoop_dir = option(
+    "--scoop-dir",
+    help="Local copy of a CloudTrail Scoop bucket to search instead of S3, e.g. synced with `aws s3 sync`",
+    type=PathType(exists=True, file_okay=False, path_type=Path),
+    required=False,
+)
+search_processes = option(
+    "--search-processes",
+    help="Worker processes searching scooped CloudTrail objects (0 for one per CPU)",
+    type=IntRange(min=0),
+    default=0,
+)
+shard = option(
+    "--shard",
+    help="Only enumerate organization accounts whose ID hashes to shard i of N (i/N, 0-based)",
+    required=False,
+    callback=shard_tokenizer,
+)
+shard_run_id = option(
+    "--shard-run-id",
+    help="ID shared by every shard of a sharded run, so a merge never mixes in shards of another run",
+    required=False,
+)
+shard_bucket = option(
+    "--shard-bucket",
+    help="S3 bucket sharded runs upload their outputs to, and merges download them from",
+    required=False,
+)
+snapshot = option(
+    "--snapshot",
+    is_flag=True,
+    default=False,
+    help="Also write reports to a compact binary snapshot, out/reports.snapshot, for fast reloading",
+    required=False,
+)
+sort_by = option(
+    "--sort-by",
+    help="Numeric column to list Log Groups by, largest first",
+    type=Choice(INVENTORY_NUMERIC_COLUMNS),
+    default="storedBytes",
+)
+start_time = option(
+    "--start-time",
+    help="Only search CloudTrail events from given UTC time",
+    type=DateTime(SEARCH_TIME_FORMATS),
+    required=False,
+    callback=utc_datetime,
+)
+top = option(
+    "--top",
+    help="Only list this many Log Groups, or groups of --group-by",
+    type=IntRange(min=1),
+    required=False,
+)
+trace = option(
+    "--trace",
+    is_flag=True,
+    default=False,
+    help="Write a Chrome trace-event timeline of this run to out/trace.json",
+    required=False,
+)
+watch_queue = option(
+    "--watch-queue",
+    is_flag=True,
+    default=False,
+    help="Deploy an EventBridge rule queueing changes to logging configuration for `scooper watch`",
+    required=False,
+)
+where = option(
+    "--where",
+    help="Only query Log Groups matching COLUMN OPERATOR VALUE, e.g. 'storedBytes>1TB' or 'kmsKeyId=none' (repeatable)",
+    multiple=True,
+    callback=predicates_tokenizer,
+)
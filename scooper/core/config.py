@@ -23,14 +23,24 @@ noted in the files associated with those components.
 """
 
 from dataclasses import dataclass, field
-from typing import Literal, Optional
+from datetime import timedelta
+from functools import cached_property
+from typing import Any, Literal, Optional
 
 from botocore.exceptions import ClientError
 
 from scooper.core.constants import ORG
-from scooper.core.utils.organizations import ORG_CLIENT
+from scooper.core.utils.logger import get_logger
+from scooper.core.utils.organizations import (
+    INVENTORY_TTL,
+    ORG_CLIENT,
+    OrganizationInventory,
+)
+from scooper.core.utils.shards import Shard
 from scooper.core.utils.sts import STS_CLIENT
 
+_logger = get_logger()
+
 
 @dataclass
 class ScooperConfig:
@@ -38,6 +48,11 @@ class ScooperConfig:
     org_role_name: Optional[str] = None
     databricks_reader: bool = False
     experimental_features: bool = False
+    target_accounts: tuple[str, ...] = ()
+    target_ous: tuple[str, ...] = ()
+    exclude_accounts: tuple[str, ...] = ()
+    inventory_ttl: timedelta = INVENTORY_TTL
+    shard: Optional[Shard] = None
 
     root_id: str = field(init=False)
     org_id: str = field(init=False)
@@ -52,4 +67,48 @@ class ScooperConfig:
                     "You need to run Scooper from your organization's management account for org-level enumeration"
                 )
 
+        elif (
+            self.target_accounts
+            or self.target_ous
+            or self.exclude_accounts
+            or self.shard
+        ):
+            _logger.warning(
+                "Account targeting is ignored for account-level enumeration"
+            )
+            self.shard = None
+
         self.account_id = STS_CLIENT.get_caller_identity()["Account"]
+
+    @cached_property
+    def accounts(self) -> list[dict[str, Any]]:
+        """Organization accounts targeted by this run."""
+        if self.level != ORG:
+            return [{"Id": self.account_id}]
+
+        inventory = OrganizationInventory.load(self.org_id, ttl=self.inventory_ttl)
+        unknown = set(self.target_accounts).difference(
+            account["Id"] for account in inventory.accounts
+        )
+        if unknown:
+            _logger.warning(
+                "Skipping targeted accounts not in the organization: %s",
+                ", ".join(sorted(unknown)),
+            )
+        accounts = inventory.filter(
+            account_ids=self.target_accounts,
+            ou_ids=self.target_ous,
+            exclude=self.exclude_accounts,
+        )
+        if self.shard is not None:
+            accounts = [
+                account for account in accounts if self.shard.contains(account["Id"])
+            ]
+        _logger.info(
+            "Targeting %d of %d organization accounts%s",
+            len(accounts),
+            len(inventory.accounts),
+            f" in shard {self.shard.name}" if self.shard else "",
+        )
+
+        return accounts
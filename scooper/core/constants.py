@@ -25,3 +25,66 @@ noted in the files associated with those components.
 SCOOPER = "Scooper"
 ORG = "org"
 ACCOUNT = "account"
+LOOKUP_EVENTS = "lookup-events"
+TRAIL = "trail"
+FANOUT_MAX_CONCURRENCY = 40
+DAY = "day"
+HIVE = "hive"
+HOUR = "hour"
+INSIGHT = "insight"
+LEGACY = "legacy"
+MANAGEMENT = "management"
+# LookupEvents attributes scoops can be filtered on, from most to least selective
+LOOKUP_ATTRIBUTE_KEYS = (
+    "AccessKeyId",
+    "Username",
+    "ResourceName",
+    "EventName",
+    "EventSource",
+)
+CBS_COMMON_LAYER_ARN = (
+    "arn:aws:lambda:ca-central-1:495075646178:layer:CBSCommonLayer:13"
+)
+
+# Columns of the Log Group inventory queried by `scooper query`
+INVENTORY_CATEGORICAL_COLUMNS = ("account", "region", "kmsKeyId")
+INVENTORY_NUMERIC_COLUMNS = ("storedBytes", "retentionInDays", "creationTime")
+
+# Event fields whose values each CloudTrail scoop manifest indexes, by dotted path
+MANIFEST_INDEXED_FIELDS = (
+    "eventName",
+    "userIdentity.arn",
+    "sourceIPAddress",
+    "userIdentity.accessKeyId",
+)
+
+# Management events that change logging configuration, by event source
+WATCHED_EVENTS = {
+    "cloudtrail.amazonaws.com": (
+        "CreateTrail",
+        "DeleteTrail",
+        "PutEventSelectors",
+        "PutInsightSelectors",
+        "StartLogging",
+        "StopLogging",
+        "UpdateTrail",
+    ),
+    "config.amazonaws.com": (
+        "DeleteConfigurationAggregator",
+        "DeleteConfigurationRecorder",
+        "DeleteDeliveryChannel",
+        "PutConfigurationAggregator",
+        "PutConfigurationRecorder",
+        "PutDeliveryChannel",
+        "StartConfigurationRecorder",
+        "StopConfigurationRecorder",
+    ),
+    "logs.amazonaws.com": (
+        "AssociateKmsKey",
+        "CreateLogGroup",
+        "DeleteLogGroup",
+        "DeleteRetentionPolicy",
+        "DisassociateKmsKey",
+        "PutRetentionPolicy",
+    ),
+}
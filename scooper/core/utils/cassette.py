@@ -0,0 +1,330 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+import re
+from base64 import b64decode, b64encode
+from collections import deque
+from functools import partial
+from hashlib import sha256
+from io import BytesIO
+from json import dumps, loads
+from pathlib import Path
+from threading import Lock, local
+from time import perf_counter, sleep
+from typing import Any, Optional, TextIO
+
+from botocore.awsrequest import AWSResponse
+from botocore.client import BaseClient
+from botocore.exceptions import BotoCoreError
+from botocore.response import StreamingBody
+
+from scooper.core.utils.logger import get_logger
+
+CASSETTE_VERSION = 1
+RECORD = "record"
+REPLAY = "replay"
+REDACTED = "REDACTED"
+GZIP_MAGIC = b"\x1f\x8b"
+
+_CREDENTIAL_PATTERNS = (
+    re.compile(
+        r"<(AccessKeyId|SecretAccessKey|SessionToken)>[^<]*</\1>",
+    ),
+    re.compile(
+        r'"(accessKeyId|AccessKeyId|secretAccessKey|SecretAccessKey|sessionToken|SessionToken|accessToken)"(\s*:\s*)"[^"]*"'
+    ),
+)
+
+_logger = get_logger()
+
+
+class CassetteMissError(BotoCoreError):
+    fmt = "No recorded response to {operation} in {account}/{region}"
+
+
+class CassetteOmittedError(BotoCoreError):
+    fmt = "Response to {operation} in {account}/{region} wasn't recorded, as it couldn't be redacted"
+
+
+class _RecordedBody(BytesIO):
+    """Recorded response body, readable both whole and as a stream."""
+
+    def stream(self, **_) -> list[bytes]:
+        return [self.getvalue()]
+
+
+def _redact(body: str) -> str:
+    body = _CREDENTIAL_PATTERNS[0].sub(rf"<\1>{REDACTED}</\1>", body)
+    return _CREDENTIAL_PATTERNS[1].sub(rf'"\1"\2"{REDACTED}"', body)
+
+
+def _redact_binary(body: bytes) -> Optional[bytes]:
+    """Redact gzipped text `body`, e.g. a trail log file, or get `None` if it isn't any."""
+    if not body.startswith(GZIP_MAGIC):
+        return None
+    try:
+        text = gzip.decompress(body).decode()
+    except (OSError, EOFError, UnicodeDecodeError):
+        return None
+    return gzip.compress(_redact(text).encode())
+
+
+def _canonical(value: Any) -> str:
+    if isinstance(value, bytes):
+        return value.decode(errors="replace")
+    if isinstance(value, dict):
+        return dumps(value, sort_keys=True, default=str)
+    if hasattr(value, "read"):
+        # Streamed uploads are keyed by their size rather than read twice
+        return f"<stream of {getattr(value, 'len', 'unknown')} bytes>"
+    return str(value or "")
+
+
+class Cassette:
+    """Record/replay layer of every botocore request made by instrumented clients.
+
+    Recording appends each response (credentials redacted, latency optional) to a
+    gzipped JSON lines cassette as it arrives. Binary bodies are only recorded if
+    gzipped text that can be redacted, e.g. trail log files. Replaying serves those responses from
+    botocore's `before-send` event, in recorded order per request, so retries and
+    response parsing still run as they did live. Requests are matched on account,
+    region, operation and parameters, so a replay must be run with the same inputs.
+    """
+
+    def __init__(self) -> None:
+        self.mode: Optional[str] = None
+        self.timing = False
+        self.path: Optional[Path] = None
+        self._file: Optional[TextIO] = None
+        self._interactions: dict[str, deque[dict[str, Any]]] = {}
+        self._local = local()
+        self._lock = Lock()
+
+    def record(self, path: Path, timing: bool = False) -> None:
+        """Record responses to cassette at `path`, with their latencies if `timing`."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = gzip.open(path, "wt")
+        self._file.write(
+            dumps(
+                {
+                    "version": CASSETTE_VERSION,
+                    "region": os.getenv("AWS_REGION")
+                    or os.getenv("AWS_DEFAULT_REGION"),
+                    "timing": timing,
+                }
+            )
+            + "\n"
+        )
+        self.mode, self.timing, self.path = RECORD, timing, path
+
+    def replay(self, path: Path, timing: bool = False) -> None:
+        """Replay responses from cassette at `path`, at their recorded latencies if `timing`."""
+        with gzip.open(path, "rt") as f:
+            header = loads(f.readline())
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(
+                    f"Unsupported cassette version {header.get('version')}"
+                )
+            for line in f:
+                interaction = loads(line)
+                self._interactions.setdefault(interaction["key"], deque()).append(
+                    interaction
+                )
+
+        # Requests are still signed, and replayed runs may have no AWS configuration
+        for variable, default in (
+            ("AWS_ACCESS_KEY_ID", REDACTED),
+            ("AWS_SECRET_ACCESS_KEY", REDACTED),
+            ("AWS_DEFAULT_REGION", header.get("region")),
+        ):
+            if default and not os.getenv(variable):
+                os.environ[variable] = default
+
+        if timing and not header.get("timing"):
+            _logger.warning("Cassette %s was recorded without latencies", path)
+        self.mode, self.timing, self.path = REPLAY, timing, path
+        _logger.info("Replaying API responses from %s", path)
+
+    def close(self) -> None:
+        if self._file is not None:
+            with self._lock:
+                self._file.close()
+                self._file = None
+            _logger.info("API cassette written to %s", self.path)
+
+    def attach(
+        self, client: BaseClient, account_id: Optional[str] = None
+    ) -> BaseClient:
+        """Register record/replay handlers on given client's botocore events."""
+        region = client.meta.region_name
+        events = client.meta.events
+
+        events.register(
+            "before-call",
+            partial(self._before_call, account_id=account_id, region=region),
+        )
+        events.register("request-created", self._request_created)
+        events.register_first("before-send", self._before_send)
+        events.register("response-received", self._response_received)
+
+        return client
+
+    def _before_call(
+        self,
+        model,
+        params: dict,
+        context: dict,
+        account_id: Optional[str],
+        region: Optional[str],
+        **_,
+    ) -> None:
+        if self.mode is None:
+            return
+
+        operation = f"{model.service_model.service_name}.{model.name}"
+        request = "\n".join(
+            (
+                account_id or "",
+                region or "",
+                operation,
+                params.get("method", ""),
+                params.get("url_path", ""),
+                _canonical(params.get("query_string")),
+                _canonical(params.get("body")),
+            )
+        )
+        context["scooper_cassette"] = {
+            "key": sha256(request.encode()).hexdigest(),
+            "operation": operation,
+            "account": account_id,
+            "region": region,
+            "streaming": model.has_streaming_output,
+        }
+
+    def _request_created(self, request, **_) -> None:
+        if self.mode is None:
+            return
+
+        # `before-send` only gets the prepared request, which has no context
+        self._local.context = request.context
+        request.context["scooper_cassette_sent_at"] = perf_counter()
+
+    def _before_send(self, request, **_) -> Optional[AWSResponse]:
+        if self.mode != REPLAY:
+            return None
+
+        call = self._local.context.get("scooper_cassette")
+        with self._lock:
+            interactions = self._interactions.get(call["key"])
+            if not interactions:
+                raise CassetteMissError(
+                    operation=call["operation"],
+                    account=call["account"],
+                    region=call["region"],
+                )
+            # The last response to a request keeps answering any repeats of it
+            interaction = (
+                interactions.popleft() if len(interactions) > 1 else interactions[0]
+            )
+        if interaction.get("omitted"):
+            raise CassetteOmittedError(
+                operation=call["operation"],
+                account=call["account"],
+                region=call["region"],
+            )
+
+        if self.timing:
+            sleep(interaction.get("latency", 0.0))
+
+        body = (
+            b64decode(interaction["body_base64"])
+            if "body_base64" in interaction
+            else interaction["body"].encode()
+        )
+        return AWSResponse(
+            request.url,
+            interaction["status"],
+            interaction["headers"],
+            _RecordedBody(body),
+        )
+
+    def _response_received(
+        self,
+        response_dict: Optional[dict],
+        parsed_response: Optional[dict],
+        context: dict,
+        **_,
+    ) -> None:
+        if self.mode != RECORD or response_dict is None:
+            return
+
+        call = context["scooper_cassette"]
+        latency = perf_counter() - context["scooper_cassette_sent_at"]
+        body = response_dict["body"]
+        if call["streaming"] and response_dict["status_code"] < 300:
+            # Read the stream once, and hand the caller an equivalent one
+            body = body.read()
+            parsed_response["Body"] = StreamingBody(BytesIO(body), len(body))
+
+        interaction = {
+            "key": call["key"],
+            "operation": call["operation"],
+            "account": call["account"],
+            "region": call["region"],
+            "status": response_dict["status_code"],
+            "headers": dict(response_dict["headers"]),
+        }
+        # Bodies are redacted before they're encoded, and left out if they can't be
+        try:
+            redacted = _redact(body.decode()).encode()
+            interaction["body"] = redacted.decode()
+        except UnicodeDecodeError:
+            redacted = _redact_binary(body)
+            if redacted is None:
+                _logger.warning(
+                    "Not recording response to %s, as it can't be redacted",
+                    call["operation"],
+                )
+                interaction["omitted"] = True
+            else:
+                interaction["body_base64"] = b64encode(redacted).decode()
+        if redacted is not None:
+            # Streamed bodies are checked against their length once replayed
+            for header in interaction["headers"]:
+                if header.lower() == "content-length":
+                    interaction["headers"][header] = str(len(redacted))
+        if self.timing:
+            interaction["latency"] = latency
+
+        line = dumps(interaction) + "\n"
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+
+
+CASSETTE = Cassette()
@@ -22,16 +22,30 @@ Notwithstanding the foregoing, third party components included herein are subjec
 noted in the files associated with those components.
 """
 
+from __future__ import annotations
+
+from collections.abc import Mapping
 from datetime import datetime, timedelta, timezone
-from json import JSONEncoder, dump, dumps
+from hashlib import sha256
+from json import JSONEncoder, dump, dumps, loads
 from pathlib import Path
+from threading import Lock
 from typing import Any, Callable, Optional
 
 from boto3 import client
+from botocore.client import BaseClient
+from botocore.exceptions import ClientError
 
 from scooper.core.utils.logger import get_logger
+from scooper.core.utils.metrics import instrument
+from scooper.core.utils.tracing import TRACER
+
+S3_CLIENT = instrument(client("s3"))
+WRITE_BUFFER_SIZE = 1024 * 1024
+PUBLISH_MANIFEST_KEY = "scooper/manifest.json"
+# How far back LookupEvents can look up events
+LOOKUP_EVENTS_RETENTION = timedelta(days=90)
 
-S3_CLIENT = client("s3")
 _logger = get_logger()
 
 
@@ -40,27 +54,251 @@ class ScooperEncoder(JSONEncoder):
         if isinstance(obj, datetime):
             return obj.isoformat()
         elif isinstance(obj, set):
-            return list(obj)
+            # Sets iterate in a per-process order, which would make output unstable
+            try:
+                return sorted(obj)
+            except TypeError:
+                return list(obj)
+        elif isinstance(obj, Mapping):
+            # Records of `scooper.sources.records`, encoded as the dicts they were made of
+            return dict(obj)
         return JSONEncoder.default(self, obj)
 
 
-def write_dict_to_s3(obj: dict, bucket_name: str, object_key: str) -> None:
-    obj_as_json = dumps(obj, cls=ScooperEncoder, indent=2).encode()
-    S3_CLIENT.put_object(Body=obj_as_json, Bucket=bucket_name, Key=object_key)
+def dict_to_json_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+    return dumps(obj, cls=ScooperEncoder, indent=2, sort_keys=sort_keys).encode()
+
+
+def write_bytes_to_s3(
+    body: bytes,
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional[BaseClient] = None,
+) -> None:
+    with TRACER.span(object_key, "upload", bucket=bucket_name, bytes=len(body)):
+        (s3_client or S3_CLIENT).put_object(
+            Body=body, Bucket=bucket_name, Key=object_key
+        )
 
     _logger.info("Object written to s3://%s/%s", bucket_name, object_key)
 
 
+def write_dict_to_s3(
+    obj: dict,
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional[BaseClient] = None,
+) -> None:
+    write_bytes_to_s3(dict_to_json_bytes(obj), bucket_name, object_key, s3_client)
+
+
 def write_dict_to_file(obj: dict, path: Path) -> None:
     if not path.parent.exists():
         path.parent.mkdir(parents=True, exist_ok=True)
 
-    with path.open("w") as out:
+    # `dump` encodes iteratively, so chunks are flushed to disk as the buffer fills
+    with path.open("w", buffering=WRITE_BUFFER_SIZE) as out:
         dump(obj, out, cls=ScooperEncoder, indent=2)
 
     _logger.info("Object written to %s", path)
 
 
+def upload_file_to_s3(
+    path: Path,
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional[BaseClient] = None,
+) -> None:
+    with TRACER.span(object_key, "upload", bucket=bucket_name):
+        (s3_client or S3_CLIENT).upload_file(
+            Filename=str(path), Bucket=bucket_name, Key=object_key
+        )
+
+    _logger.info("%s uploaded to s3://%s/%s", path, bucket_name, object_key)
+
+
+def download_file_from_s3(bucket_name: str, object_key: str, path: Path) -> None:
+    if not path.parent.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    with TRACER.span(object_key, "download", bucket=bucket_name):
+        S3_CLIENT.download_file(Bucket=bucket_name, Key=object_key, Filename=str(path))
+
+    _logger.info("s3://%s/%s downloaded to %s", bucket_name, object_key, path)
+
+
+def _file_sha256(path: Path) -> str:
+    digest = sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(WRITE_BUFFER_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class S3Publisher:
+    """Publisher of objects to a bucket that skips those unchanged since last published.
+
+    SHA-256 hashes of published objects are kept in a manifest object in the bucket,
+    so an unchanged object costs neither a PUT nor a new version. Dicts are serialized
+    with sorted keys, so their hashes only change along with their content.
+    """
+
+    def __init__(
+        self,
+        bucket_name: str,
+        manifest_key: str = PUBLISH_MANIFEST_KEY,
+        s3_client: Optional[BaseClient] = None,
+    ) -> None:
+        self.bucket_name = bucket_name
+        self.manifest_key = manifest_key
+        self.published = 0
+        self.skipped = 0
+        self._s3_client = s3_client or S3_CLIENT
+        self._hashes = self._read_manifest()
+        self._changed = False
+
+    def __enter__(self) -> S3Publisher:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def _read_manifest(self) -> dict[str, str]:
+        try:
+            response = self._s3_client.get_object(
+                Bucket=self.bucket_name, Key=self.manifest_key
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return {}
+            raise
+        return loads(response["Body"].read())["sha256"]
+
+    def _unchanged(self, object_key: str, digest: str) -> bool:
+        if self._hashes.get(object_key) == digest:
+            self.skipped += 1
+            _logger.debug("s3://%s/%s unchanged", self.bucket_name, object_key)
+            return True
+        return False
+
+    def _published(self, object_key: str, digest: str) -> None:
+        self._hashes[object_key] = digest
+        self._changed = True
+        self.published += 1
+
+    def publish_dict(self, obj: Any, object_key: str) -> None:
+        body = dict_to_json_bytes(obj, sort_keys=True)
+        digest = sha256(body).hexdigest()
+        if not self._unchanged(object_key, digest):
+            write_bytes_to_s3(body, self.bucket_name, object_key, self._s3_client)
+            self._published(object_key, digest)
+
+    def publish_file(self, path: Path, object_key: str) -> None:
+        digest = _file_sha256(path)
+        if not self._unchanged(object_key, digest):
+            upload_file_to_s3(path, self.bucket_name, object_key, self._s3_client)
+            self._published(object_key, digest)
+
+    def close(self) -> None:
+        """Write manifest of published objects' hashes, if any were published."""
+        if self._changed:
+            write_bytes_to_s3(
+                dict_to_json_bytes({"sha256": dict(sorted(self._hashes.items()))}),
+                self.bucket_name,
+                self.manifest_key,
+                self._s3_client,
+            )
+            self._changed = False
+
+        _logger.info(
+            "%d objects published to s3://%s, %d unchanged ones skipped",
+            self.published,
+            self.bucket_name,
+            self.skipped,
+        )
+
+
+class NDJSONWriter:
+    """Thread-safe writer streaming objects to a newline-delimited JSON file."""
+
+    def __init__(self, path: Path) -> None:
+        if not path.parent.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.path = path
+        self._file = path.open("w")
+        self._lock = Lock()
+
+    def __enter__(self) -> NDJSONWriter:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def write(self, obj: dict) -> None:
+        line = dumps(obj, cls=ScooperEncoder) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def close(self) -> None:
+        self._file.close()
+        _logger.info("Objects written to %s", self.path)
+
+
+class ShardedReportWriter:
+    """Thread-safe writer of a report as one JSON shard per account plus an index.
+
+    Shards are written to `{root}/{title}/{account_id}.json` as soon as each account
+    finishes, so a report never has to be held in memory in its entirety. The index
+    refers to shards relative to `root`, the report prefix, so it stays valid once
+    published to S3 or copied elsewhere.
+    """
+
+    def __init__(self, title: str, root: Path = Path("out")) -> None:
+        self.title = title
+        self.root = root
+        self.directory = root / title
+        self.index_path = self.directory / "index.json"
+        self._shards: dict[str, dict[str, Any]] = {}
+        self._lock = Lock()
+
+    @property
+    def paths(self) -> dict[str, Path]:
+        """Paths of written shards and index relative to the shard directory."""
+        with self._lock:
+            paths = {
+                f"{account_id}.json": self.root / shard["path"]
+                for account_id, shard in self._shards.items()
+            }
+        if self.index_path.exists():
+            paths[self.index_path.name] = self.index_path
+        return paths
+
+    def write(self, account_id: str, obj: Any) -> Path:
+        path = self.directory / f"{account_id}.json"
+        write_dict_to_file(obj, path)
+
+        with self._lock:
+            self._shards[account_id] = {
+                "path": path.relative_to(self.root).as_posix(),
+                "bytes": path.stat().st_size,
+            }
+
+        return path
+
+    def close(self, **metadata) -> str:
+        """Write index of shards, along with any given metadata, returning its path
+        relative to the report prefix for reports to refer to it by.
+        """
+        with self._lock:
+            shards = dict(sorted(self._shards.items()))
+        write_dict_to_file(
+            {"title": self.title, **metadata, "shards": shards}, self.index_path
+        )
+
+        return self.index_path.relative_to(self.root).as_posix()
+
+
 def _input(message: str, *_, **__) -> Callable:
     """Function wrapper to handle common user input needs."""
 
@@ -75,16 +313,18 @@ def _input(message: str, *_, **__) -> Callable:
     return inner
 
 
-def date_range_input() -> tuple[datetime, datetime]:
-    """CLI input for date range."""
+def date_range_input(
+    max_age: Optional[timedelta] = LOOKUP_EVENTS_RETENTION,
+) -> tuple[datetime, datetime]:
+    """CLI input for date range, of dates at most `max_age` old if given."""
 
     def _validate_date(date_string: str) -> Optional[datetime]:
         try:
             date = datetime.strptime(date_string, "%Y-%m-%d %H:%M:%S").astimezone(
                 timezone.utc
             )
-            if date < (datetime.now(tz=timezone.utc) - timedelta(days=90)):
-                _logger.error("Date must be within last 90 days")
+            if max_age is not None and date < datetime.now(tz=timezone.utc) - max_age:
+                _logger.error("Date must be within last %d days", max_age.days)
                 return None
             _logger.debug("Date entered: %s", date.date())
             return date
@@ -0,0 +1,320 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import partial
+from json import dumps
+from pathlib import Path
+from threading import Lock
+from time import perf_counter
+from typing import Any, Iterator, Optional
+
+from botocore.client import BaseClient
+
+from scooper.core.utils.cassette import CASSETTE
+from scooper.core.utils.logger import get_logger
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+THROTTLING_ERROR_CODES = {
+    "RequestLimitExceeded",
+    "RequestThrottled",
+    "RequestThrottledException",
+    "SlowDown",
+    "ThrottledException",
+    "Throttling",
+    "ThrottlingException",
+    "TooManyRequestsException",
+}
+
+_logger = get_logger()
+_current_source: ContextVar[Optional[str]] = ContextVar("scooper_source", default=None)
+
+CallKey = tuple[str, str, Optional[str], Optional[str]]
+
+
+@dataclass
+class CallStats:
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    throttles: int = 0
+    response_bytes: int = 0
+    latency_sum: float = 0.0
+    latency_buckets: list[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+    )
+
+    def observe(self, latency: float) -> None:
+        self.calls += 1
+        self.latency_sum += latency
+        self.latency_buckets[bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "throttles": self.throttles,
+            "response_bytes": self.response_bytes,
+            "latency_seconds": {
+                "sum": self.latency_sum,
+                "buckets": {
+                    str(le): count
+                    for le, count in zip(
+                        (*LATENCY_BUCKETS, "+Inf"), self.latency_buckets
+                    )
+                },
+            },
+        }
+
+
+class ApiMetrics:
+    """Thread-safe metrics of botocore API calls made by instrumented clients.
+
+    Calls are keyed by (service, operation, account, region), and also attributed to
+    whichever source is being reported on in the calling context.
+    """
+
+    def __init__(self) -> None:
+        self.default_account_id: Optional[str] = None
+        self._calls: dict[CallKey, CallStats] = {}
+        self._sources: dict[str, CallStats] = {}
+        self._source_seconds: dict[str, float] = {}
+        self._lock = Lock()
+
+    def instrument(
+        self, client: BaseClient, account_id: Optional[str] = None
+    ) -> BaseClient:
+        """Register metric handlers on given client's botocore events."""
+        region = client.meta.region_name
+        events = client.meta.events
+
+        events.register("before-call", self._before_call)
+        events.register(
+            "after-call",
+            partial(self._after_call, account_id=account_id, region=region),
+        )
+        events.register(
+            "after-call-error",
+            partial(self._after_call_error, account_id=account_id, region=region),
+        )
+        events.register(
+            "needs-retry",
+            partial(self._needs_retry, account_id=account_id, region=region),
+        )
+
+        return client
+
+    def _stats(self, key: CallKey) -> list[CallStats]:
+        stats = [self._calls.setdefault(key, CallStats())]
+        if (source := _current_source.get()) is not None:
+            stats.append(self._sources.setdefault(source, CallStats()))
+        return stats
+
+    def _before_call(self, model, context: dict, **_) -> None:
+        context["scooper_operation"] = (model.service_model.service_name, model.name)
+        context["scooper_start_time"] = perf_counter()
+
+    def _after_call(
+        self,
+        http_response,
+        parsed: dict,
+        model,
+        context: dict,
+        account_id: Optional[str],
+        region: Optional[str],
+        **_,
+    ) -> None:
+        latency = perf_counter() - context.get("scooper_start_time", perf_counter())
+        key = (model.service_model.service_name, model.name, account_id, region)
+        # Avoid touching the body of streaming responses to measure it
+        response_bytes = int(http_response.headers.get("content-length", 0))
+        retries = parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+
+        with self._lock:
+            for stats in self._stats(key):
+                stats.observe(latency)
+                stats.errors += http_response.status_code >= 400
+                stats.retries += retries
+                stats.response_bytes += response_bytes
+
+    def _after_call_error(
+        self,
+        context: dict,
+        account_id: Optional[str],
+        region: Optional[str],
+        **_,
+    ) -> None:
+        latency = perf_counter() - context.get("scooper_start_time", perf_counter())
+        service, operation = context.get("scooper_operation", ("unknown", "unknown"))
+        key = (service, operation, account_id, region)
+
+        with self._lock:
+            for stats in self._stats(key):
+                stats.observe(latency)
+                stats.errors += 1
+
+    def _needs_retry(
+        self,
+        response: Optional[tuple],
+        operation,
+        account_id: Optional[str],
+        region: Optional[str],
+        **_,
+    ) -> None:
+        if response is None:
+            return
+
+        _, parsed = response
+        if parsed.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES:
+            key = (
+                operation.service_model.service_name,
+                operation.name,
+                account_id,
+                region,
+            )
+            with self._lock:
+                for stats in self._stats(key):
+                    stats.throttles += 1
+
+    @contextmanager
+    def source(self, name: str) -> Iterator[None]:
+        """Attribute API calls made within context to given source, and time it."""
+        token = _current_source.set(name)
+        start_time = perf_counter()
+
+        try:
+            yield
+        finally:
+            _current_source.reset(token)
+            with self._lock:
+                self._source_seconds[name] = self._source_seconds.get(name, 0.0) + (
+                    perf_counter() - start_time
+                )
+
+    def _source_summary(self, name: str) -> dict[str, Any]:
+        stats = self._sources.get(name, CallStats())
+        return {
+            "wall_seconds": self._source_seconds.get(name, 0.0),
+            "api_calls": stats.calls,
+            "api_seconds": stats.latency_sum,
+            "errors": stats.errors,
+            "retries": stats.retries,
+            "throttles": stats.throttles,
+            "response_bytes": stats.response_bytes,
+        }
+
+    def source_summary(self, name: str) -> dict[str, Any]:
+        """Timing summary of given source."""
+        with self._lock:
+            return self._source_summary(name)
+
+    def _label_values(self, key: CallKey) -> dict[str, str]:
+        service, operation, account_id, region = key
+        return {
+            "service": service,
+            "operation": operation,
+            "account": account_id or self.default_account_id or "unknown",
+            "region": region or "unknown",
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": [
+                    {**self._label_values(key), **stats.to_dict()}
+                    for key, stats in sorted(
+                        self._calls.items(), key=lambda item: str(item[0])
+                    )
+                ],
+                "sources": {
+                    name: self._source_summary(name) for name in self._source_seconds
+                },
+            }
+
+    def to_openmetrics(self) -> str:
+        """Render call metrics in OpenMetrics text exposition format."""
+        with self._lock:
+            calls = sorted(self._calls.items(), key=lambda item: str(item[0]))
+
+        def labels(key: CallKey, **extra) -> str:
+            label_values = {**self._label_values(key), **extra}
+            return ",".join(f'{name}="{value}"' for name, value in label_values.items())
+
+        lines = []
+        for name, attribute, help_text in (
+            ("scooper_api_calls", "calls", "API calls made"),
+            ("scooper_api_errors", "errors", "API calls that failed"),
+            ("scooper_api_retries", "retries", "Retry attempts made by botocore"),
+            ("scooper_api_throttles", "throttles", "Throttled API responses"),
+            ("scooper_api_response_bytes", "response_bytes", "Response bytes"),
+        ):
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"# HELP {name} {help_text}.")
+            for key, stats in calls:
+                lines.append(
+                    f"{name}_total{{{labels(key)}}} {getattr(stats, attribute)}"
+                )
+
+        name = "scooper_api_call_duration_seconds"
+        lines.append(f"# TYPE {name} histogram")
+        lines.append(f"# UNIT {name} seconds")
+        lines.append(f"# HELP {name} API call latency.")
+        for key, stats in calls:
+            cumulative = 0
+            for le, count in zip((*LATENCY_BUCKETS, "+Inf"), stats.latency_buckets):
+                cumulative += count
+                lines.append(f"{name}_bucket{{{labels(key, le=le)}}} {cumulative}")
+            lines.append(f"{name}_count{{{labels(key)}}} {stats.calls}")
+            lines.append(f"{name}_sum{{{labels(key)}}} {stats.latency_sum}")
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: Path = Path("out")) -> None:
+        """Write metrics as JSON and OpenMetrics text to given directory."""
+        directory.mkdir(parents=True, exist_ok=True)
+
+        json_path = directory / "metrics.json"
+        json_path.write_text(dumps(self.to_dict(), indent=2))
+        openmetrics_path = directory / "metrics.prom"
+        openmetrics_path.write_text(self.to_openmetrics())
+
+        _logger.info("Metrics written to %s and %s", json_path, openmetrics_path)
+
+
+API_METRICS = ApiMetrics()
+
+
+def instrument(client: BaseClient, account_id: Optional[str] = None) -> BaseClient:
+    """Instrument boto3 client created by Scooper, labelling its calls with `account_id`.
+
+    Instrumented clients are also recorded to or replayed from the API cassette, if any.
+    """
+    return CASSETTE.attach(API_METRICS.instrument(client, account_id), account_id)
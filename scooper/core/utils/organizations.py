@@ -22,23 +22,122 @@ Notwithstanding the foregoing, third party components included herein are subjec
 noted in the files associated with those components.
 """
 
-from typing import Any
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from json import load
+from pathlib import Path
+from typing import Any, Iterable, Optional
 
 from boto3 import client
-from botocore.exceptions import ClientError
 
+from scooper.core.utils.io import write_dict_to_file
+from scooper.core.utils.logger import get_logger
+from scooper.core.utils.metrics import instrument
 from scooper.core.utils.paginate import paginate
 
-ORG_CLIENT = client("organizations")
+ORG_CLIENT = instrument(client("organizations"))
+INVENTORY_PATH = Path("out/cache/organization.json")
+INVENTORY_TTL = timedelta(hours=1)
+
+_logger = get_logger()
+
+
+@dataclass
+class OrganizationInventory:
+    org_id: Optional[str]
+    accounts: list[dict[str, Any]]
+    fetched_at: datetime = field(default_factory=lambda: datetime.now(tz=timezone.utc))
+
+    @classmethod
+    def walk(cls, org_id: Optional[str] = None) -> OrganizationInventory:
+        """Walk organization tree from its root(s), recording each account's OU path.
+
+        Raises the `ClientError` of any listing that fails, e.g. when throttled, rather
+        than returning a partial inventory.
+        """
+        _logger.info("Walking organization tree...")
+        accounts = []
 
+        parents = [
+            (root["Id"], [root["Id"]])
+            for root in paginate(ORG_CLIENT, "list_roots", "Roots", raise_errors=True)
+        ]
 
-def get_all_accounts() -> list[dict[str, Any]]:
-    """Get list of all accounts in organization."""
-    try:
-        return paginate(
-            ORG_CLIENT,
-            "list_accounts",
-            "Accounts",
+        while parents:
+            parent_id, path = parents.pop()
+            for account in paginate(
+                ORG_CLIENT,
+                "list_accounts_for_parent",
+                "Accounts",
+                raise_errors=True,
+                ParentId=parent_id,
+            ):
+                account["ParentPath"] = path
+                accounts.append(account)
+            for ou in paginate(
+                ORG_CLIENT,
+                "list_organizational_units_for_parent",
+                "OrganizationalUnits",
+                raise_errors=True,
+                ParentId=parent_id,
+            ):
+                parents.append((ou["Id"], path + [ou["Id"]]))
+
+        return cls(org_id=org_id, accounts=accounts)
+
+    @classmethod
+    def load(
+        cls,
+        org_id: Optional[str] = None,
+        path: Path = INVENTORY_PATH,
+        ttl: timedelta = INVENTORY_TTL,
+    ) -> OrganizationInventory:
+        """Load cached organization inventory, walking the organization again if it's stale.
+
+        Only complete walks are cached, so a failed one is retried by the next run.
+        """
+        if path.exists():
+            with path.open("r") as f:
+                cached = load(f)
+            fetched_at = datetime.fromisoformat(cached["fetched_at"])
+            if (
+                cached["org_id"] == org_id
+                and datetime.now(tz=timezone.utc) - fetched_at < ttl
+            ):
+                _logger.info("Using cached organization inventory from %s", path)
+                return cls(
+                    org_id=org_id, accounts=cached["accounts"], fetched_at=fetched_at
+                )
+
+        inventory = cls.walk(org_id)
+        write_dict_to_file(
+            {
+                "org_id": inventory.org_id,
+                "fetched_at": inventory.fetched_at,
+                "accounts": inventory.accounts,
+            },
+            path,
         )
-    except ClientError:
-        return []
+        return inventory
+
+    def filter(
+        self,
+        account_ids: Iterable[str] = (),
+        ou_ids: Iterable[str] = (),
+        exclude: Iterable[str] = (),
+    ) -> list[dict[str, Any]]:
+        """Get accounts matching given account IDs or belonging to given OU subtrees, minus `exclude`."""
+        account_ids, ou_ids, exclude = set(account_ids), set(ou_ids), set(exclude)
+
+        return [
+            account
+            for account in self.accounts
+            if account["Id"] not in exclude
+            and (
+                not (account_ids or ou_ids)
+                or account["Id"] in account_ids
+                or ou_ids.intersection(account["ParentPath"])
+            )
+        ]
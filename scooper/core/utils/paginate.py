@@ -22,29 +22,57 @@ Notwithstanding the foregoing, third party components included herein are subjec
 noted in the files associated with those components.
 """
 
-from typing import Any
+from typing import Any, Iterator
 
 from botocore.client import BaseClient
-from tqdm import tqdm
 
 from scooper.core.utils.logger import get_logger
+from scooper.core.utils.progress import PROGRESS
+from scooper.core.utils.tracing import TRACER
 
 _logger = get_logger()
 
 
-def paginate(client: BaseClient, command: str, array: str, **kwargs) -> list[Any]:
+def iter_pages(
+    client: BaseClient, command: str, array: str, raise_errors: bool = False, **kwargs
+) -> Iterator[list[Any]]:
+    """Paginate given boto3 command, yielding each page's elements as it arrives.
+
+    Failures are logged and end pagination early, unless `raise_errors` is set for
+    callers that can't use partial results.
+    """
+    paginator = client.get_paginator(command)
+    service_name = client.meta.service_model.service_name
+
+    stage = f"{service_name}.{command}"
+
+    pages = iter(paginator.paginate(**kwargs))
+
+    while True:
+        try:
+            # Only trace fetching each page, not the caller's processing of it
+            with TRACER.span(stage, "paginate"):
+                page = next(pages, None)
+        except Exception as e:
+            _logger.error("Pagination failed: %s", e)
+            if raise_errors:
+                raise
+            return
+        if page is None:
+            return
+
+        elements = page.get(array, [])
+        PROGRESS.update(stage, pages=1, items=len(elements))
+        yield elements
+
+
+def paginate(
+    client: BaseClient, command: str, array: str, raise_errors: bool = False, **kwargs
+) -> list[Any]:
     """Paginate given boto3 command."""
     elements = []
-    paginator = client.get_paginator(command)
 
-    try:
-        with tqdm(
-            desc=f"Getting {client.meta.service_model.service_name} data", leave=False
-        ) as pbar:
-            for page in paginator.paginate(**kwargs):
-                elements.extend(page.get(array, []))
-                pbar.update()
-    except Exception as e:
-        _logger.error("Pagination failed: %s", e)
+    for page in iter_pages(client, command, array, raise_errors, **kwargs):
+        elements.extend(page)
 
     return elements
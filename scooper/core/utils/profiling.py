@@ -0,0 +1,201 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from __future__ import annotations
+
+import tracemalloc
+from contextlib import contextmanager
+from cProfile import Profile
+from dataclasses import dataclass, field
+from functools import wraps
+from io import StringIO
+from json import dumps
+from pathlib import Path
+from pstats import SortKey, Stats
+from threading import Lock, local
+from time import perf_counter
+from typing import Any, Callable, Iterator, Optional
+
+from scooper.core.utils.logger import get_logger
+
+TOP_ALLOCATORS = 10
+TOP_FUNCTIONS = 40
+
+_logger = get_logger()
+
+
+@dataclass
+class PhaseProfile:
+    name: str
+    profile: Profile = field(default_factory=Profile)
+    wall_seconds: float = 0.0
+    peak_bytes: int = 0
+    top_allocators: list[dict[str, Any]] = field(default_factory=list)
+
+    # Entries of the phase open across threads
+    _open: int = 0
+
+
+@dataclass
+class _PhaseEntry:
+    phase: PhaseProfile
+    start_time: float
+    # Only set for the entry profiling the phase, the first one open
+    start_snapshot: Optional[tracemalloc.Snapshot] = None
+
+
+class Profiler:
+    """Per-phase CPU (cProfile) and memory (tracemalloc) profiler of a Scooper run.
+
+    Phases may nest, in which case the enclosing phase's CPU profile is paused so each
+    profile only holds its own phase's calls, while memory figures include nested
+    phases. cProfile only sees the thread a phase runs on; tracemalloc sees all threads.
+
+    Phases may be entered from several threads, each nesting its own. A phase entered
+    on several threads at once is only profiled by the first, while the wall time of
+    every entry is added up.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._phases: dict[str, PhaseProfile] = {}
+        self._local = local()
+        self._lock = Lock()
+
+    @property
+    def _stack(self) -> list[_PhaseEntry]:
+        """Phases open on the current thread, innermost last."""
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def enable(self) -> None:
+        self.enabled = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def begin(self, name: str) -> None:
+        """Begin profiling phase `name`, pausing the enclosing phase's CPU profile."""
+        if not self.enabled:
+            return
+
+        stack = self._stack
+        with self._lock:
+            if stack:
+                parent = stack[-1]
+                if parent.start_snapshot is not None:
+                    parent.phase.profile.disable()
+                parent.phase.peak_bytes = max(
+                    parent.phase.peak_bytes, tracemalloc.get_traced_memory()[1]
+                )
+
+            phase = self._phases.setdefault(name, PhaseProfile(name))
+            entry = _PhaseEntry(phase, perf_counter())
+            phase._open += 1
+            if phase._open == 1:
+                entry.start_snapshot = tracemalloc.take_snapshot()
+                tracemalloc.reset_peak()
+            stack.append(entry)
+            if entry.start_snapshot is not None:
+                phase.profile.enable()
+
+    def end(self, name: str) -> None:
+        """End profiling phase `name`, resuming the enclosing phase's CPU profile."""
+        stack = self._stack
+        if not self.enabled or not stack or stack[-1].phase.name != name:
+            return
+
+        with self._lock:
+            entry = stack.pop()
+            phase = entry.phase
+            phase._open -= 1
+            phase.wall_seconds += perf_counter() - entry.start_time
+            phase.peak_bytes = max(phase.peak_bytes, tracemalloc.get_traced_memory()[1])
+            if entry.start_snapshot is not None:
+                phase.profile.disable()
+                phase.top_allocators = [
+                    {
+                        "location": str(stat.traceback),
+                        "size_diff_bytes": stat.size_diff,
+                        "count_diff": stat.count_diff,
+                    }
+                    for stat in tracemalloc.take_snapshot().compare_to(
+                        entry.start_snapshot, "lineno"
+                    )[:TOP_ALLOCATORS]
+                ]
+
+            if stack:
+                parent = stack[-1]
+                parent.phase.peak_bytes = max(parent.phase.peak_bytes, phase.peak_bytes)
+                if parent.start_snapshot is not None:
+                    parent.phase.profile.enable()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def write(self, directory: Path = Path("out/profile")) -> None:
+        """Write each phase's cProfile stats, readable top functions, and a memory summary."""
+        if not self.enabled:
+            return
+
+        directory.mkdir(parents=True, exist_ok=True)
+        summary = {}
+
+        for name, phase in self._phases.items():
+            file_name = name.replace("/", "_")
+            phase.profile.dump_stats(directory / f"{file_name}.prof")
+
+            stats_text = StringIO()
+            Stats(phase.profile, stream=stats_text).sort_stats(
+                SortKey.CUMULATIVE
+            ).print_stats(TOP_FUNCTIONS)
+            (directory / f"{file_name}.txt").write_text(stats_text.getvalue())
+
+            summary[name] = {
+                "wall_seconds": phase.wall_seconds,
+                "peak_bytes": phase.peak_bytes,
+                "top_allocators": phase.top_allocators,
+            }
+
+        (directory / "summary.json").write_text(dumps(summary, indent=2))
+        _logger.info("Profiles written to %s", directory)
+
+
+PROFILER = Profiler()
+
+
+def profiled(func: Callable) -> Callable:
+    """Profile decorated method as phase `{class name}.{method name}`."""
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs) -> Any:
+        with PROFILER.phase(f"{self.__class__.__name__}.{func.__name__}"):
+            return func(self, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,164 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass, field
+from threading import Lock
+from time import monotonic
+from typing import Any, Optional, TextIO
+
+from tqdm import tqdm
+
+from scooper.core.utils.logger import get_logger
+
+LOG_INTERVAL_SECONDS = 30.0
+
+_logger = get_logger()
+
+
+@dataclass
+class StageProgress:
+    started_at: float = field(default_factory=monotonic)
+    pages: int = 0
+    items: int = 0
+    # Seconds of a time range covered so far, for stages working through one
+    covered_seconds: float = 0.0
+    total_seconds: Optional[float] = None
+
+    def to_dict(self, now: float) -> dict[str, Any]:
+        elapsed = max(now - self.started_at, 1e-9)
+        progress = {
+            "pages": self.pages,
+            "items": self.items,
+            "pages_per_second": round(self.pages / elapsed, 2),
+            "items_per_second": round(self.items / elapsed, 2),
+        }
+        if self.total_seconds:
+            covered = min(self.covered_seconds / self.total_seconds, 1.0)
+            progress["covered_fraction"] = round(covered, 4)
+            progress["eta_seconds"] = (
+                round(elapsed * (1 - covered) / covered) if covered else None
+            )
+        return progress
+
+
+class ProgressReporter:
+    """Thread-safe aggregate of progress reported by all workers of a run.
+
+    Renders a single progress bar on a TTY, and otherwise logs structured progress
+    lines every `log_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        log_interval: float = LOG_INTERVAL_SECONDS,
+        stream: TextIO = sys.stderr,
+    ) -> None:
+        self._log_interval = log_interval
+        self._stream = stream
+        self._stages: dict[str, StageProgress] = {}
+        self._lock = Lock()
+        self._bar: Optional[tqdm] = None
+        self._last_logged_at = monotonic()
+
+    @property
+    def _is_tty(self) -> bool:
+        return hasattr(self._stream, "isatty") and self._stream.isatty()
+
+    def _stage(self, name: str) -> StageProgress:
+        return self._stages.setdefault(name, StageProgress())
+
+    def cover(self, stage: str, total_seconds: float) -> None:
+        """Declare that `stage` works through a time range `total_seconds` long."""
+        with self._lock:
+            self._stage(stage).total_seconds = total_seconds
+
+    def update(
+        self, stage: str, pages: int = 0, items: int = 0, covered_seconds: float = 0.0
+    ) -> None:
+        with self._lock:
+            progress = self._stage(stage)
+            progress.pages += pages
+            progress.items += items
+            progress.covered_seconds += covered_seconds
+            self._report(stage)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Progress of each stage, and overall."""
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> dict[str, dict[str, Any]]:
+        now = monotonic()
+        stages = {
+            name: progress.to_dict(now) for name, progress in self._stages.items()
+        }
+        if self._stages:
+            overall = StageProgress(
+                started_at=min(
+                    progress.started_at for progress in self._stages.values()
+                ),
+                pages=sum(progress.pages for progress in self._stages.values()),
+                items=sum(progress.items for progress in self._stages.values()),
+            )
+            stages["overall"] = overall.to_dict(now)
+        return stages
+
+    def _report(self, stage: str) -> None:
+        progress = self._stages[stage].to_dict(monotonic())
+
+        if self._is_tty:
+            if self._bar is None:
+                self._bar = tqdm(file=self._stream, unit=" items", dynamic_ncols=True)
+            postfix = f"{progress['items_per_second']} items/s"
+            if progress.get("eta_seconds") is not None:
+                postfix += f", {progress['covered_fraction']:.0%} covered, ETA {progress['eta_seconds']}s"
+            self._bar.set_description(stage, refresh=False)
+            self._bar.set_postfix_str(postfix, refresh=False)
+            self._bar.n = sum(progress.items for progress in self._stages.values())
+            self._bar.refresh()
+        elif monotonic() - self._last_logged_at >= self._log_interval:
+            self._last_logged_at = monotonic()
+            self._log()
+
+    def _log(self) -> None:
+        for name, progress in self._snapshot().items():
+            _logger.info(
+                "progress stage=%s %s",
+                name,
+                " ".join(f"{key}={value}" for key, value in progress.items()),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._bar is not None:
+                self._bar.close()
+                self._bar = None
+            if self._stages:
+                self._log()
+
+
+PROGRESS = ProgressReporter()
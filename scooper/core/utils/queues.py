@@ -0,0 +1,154 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from itertools import count
+from json import dumps
+from pathlib import Path
+from time import monotonic, sleep, time_ns
+from typing import Optional
+
+from boto3 import client
+from botocore.client import BaseClient
+
+from scooper.core.utils.metrics import instrument
+
+SQS_MAX_MESSAGES = 10
+SQS_MAX_WAIT_SECONDS = 20
+# Matching the queue deployed by --watch-queue
+VISIBILITY_TIMEOUT_SECONDS = 300
+MAX_RECEIVE_COUNT = 5
+
+
+@dataclass(frozen=True)
+class Message:
+    body: str
+    receipt: str
+
+
+class Queue(ABC):
+    @abstractmethod
+    def receive(self, wait_seconds: int = SQS_MAX_WAIT_SECONDS) -> list[Message]:
+        """Receive a batch of messages, waiting up to `wait_seconds` for one to arrive."""
+        pass
+
+    @abstractmethod
+    def delete(self, message: Message) -> None:
+        """Delete processed message, so it isn't received again."""
+        pass
+
+
+class SQSQueue(Queue):
+    def __init__(self, queue_url: str, sqs_client: Optional[BaseClient] = None) -> None:
+        self.queue_url = queue_url
+        self._client = sqs_client or instrument(client("sqs"))
+
+    def receive(self, wait_seconds: int = SQS_MAX_WAIT_SECONDS) -> list[Message]:
+        response = self._client.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=SQS_MAX_MESSAGES,
+            WaitTimeSeconds=min(wait_seconds, SQS_MAX_WAIT_SECONDS),
+        )
+        return [
+            Message(message["Body"], message["ReceiptHandle"])
+            for message in response.get("Messages", [])
+        ]
+
+    def delete(self, message: Message) -> None:
+        self._client.delete_message(
+            QueueUrl=self.queue_url, ReceiptHandle=message.receipt
+        )
+
+
+class LocalQueue(Queue):
+    """Offline stand-in for an SQS queue, holding one JSON file per message in `directory`.
+
+    Messages are received in the order they were sent, and stay in the queue until
+    deleted. Like SQS, a received message is hidden for `visibility_timeout` seconds,
+    so a consumer that fails on one receives the messages behind it first, and is moved
+    to `directory/dead-letter` once received `max_receive_count` times.
+    """
+
+    _sequence = count()
+
+    def __init__(
+        self,
+        directory: Path,
+        visibility_timeout: float = VISIBILITY_TIMEOUT_SECONDS,
+        max_receive_count: int = MAX_RECEIVE_COUNT,
+    ) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self.dead_letter_directory = directory / "dead-letter"
+        self.visibility_timeout = visibility_timeout
+        self.max_receive_count = max_receive_count
+        # Receive counts and visibility are only tracked for this consumer's lifetime
+        self._receive_counts: dict[str, int] = {}
+        self._visible_at: dict[str, float] = {}
+
+    def send(self, body: dict) -> Path:
+        path = self.directory / f"{time_ns():020d}-{next(self._sequence):06d}.json"
+        path.write_text(dumps(body))
+        return path
+
+    def _receive_visible(self) -> list[Message]:
+        messages = []
+        now = monotonic()
+        for path in sorted(self.directory.glob("*.json")):
+            if self._visible_at.get(path.name, 0) > now:
+                continue
+            if self._receive_counts.get(path.name, 0) >= self.max_receive_count:
+                self._dead_letter(path)
+                continue
+            messages.append(Message(path.read_text(), str(path)))
+            self._receive_counts[path.name] = self._receive_counts.get(path.name, 0) + 1
+            self._visible_at[path.name] = now + self.visibility_timeout
+            if len(messages) == SQS_MAX_MESSAGES:
+                break
+        return messages
+
+    def _dead_letter(self, path: Path) -> None:
+        self.dead_letter_directory.mkdir(exist_ok=True)
+        path.replace(self.dead_letter_directory / path.name)
+        self._forget(path.name)
+
+    def _forget(self, name: str) -> None:
+        self._receive_counts.pop(name, None)
+        self._visible_at.pop(name, None)
+
+    def receive(self, wait_seconds: int = SQS_MAX_WAIT_SECONDS) -> list[Message]:
+        for waited in range(wait_seconds + 1):
+            if messages := self._receive_visible():
+                return messages
+            if waited < wait_seconds:
+                sleep(1)
+        return []
+
+    def delete(self, message: Message) -> None:
+        path = Path(message.receipt)
+        path.unlink(missing_ok=True)
+        self._forget(path.name)
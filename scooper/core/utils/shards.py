@@ -0,0 +1,269 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from hashlib import sha256
+from json import load
+from pathlib import Path
+from shutil import copyfile, copyfileobj
+from typing import Any, Optional
+
+from scooper.core.utils.io import (
+    S3_CLIENT,
+    download_file_from_s3,
+    upload_file_to_s3,
+    write_dict_to_file,
+)
+from scooper.core.utils.logger import get_logger
+from scooper.core.utils.paginate import paginate
+
+SHARDS_ROOT = Path("out/shards")
+SHARDS_PREFIX = "scooper/shards"
+MANIFEST = "shard.json"
+
+_logger = get_logger()
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Shard `index` (0-based) of a run split into `count` shards by account ID hash."""
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, value: str) -> Shard:
+        """Parse shard from `i/N` form."""
+        index, _, count = value.partition("/")
+        shard = cls(int(index), int(count))
+        if not 0 <= shard.index < shard.count:
+            raise ValueError(f"Shard index must be between 0 and {shard.count - 1}")
+        return shard
+
+    @property
+    def name(self) -> str:
+        return f"{self.index}-of-{self.count}"
+
+    @property
+    def directory(self) -> Path:
+        return SHARDS_ROOT / self.name
+
+    @property
+    def is_first(self) -> bool:
+        return self.index == 0
+
+    def contains(self, account_id: str) -> bool:
+        # `hash` is salted per process, so shards must agree on a stable hash instead
+        digest = sha256(account_id.encode()).digest()
+        return int.from_bytes(digest[:8], "big") % self.count == self.index
+
+    def write_manifest(self, run_id: str, **metadata) -> Path:
+        """Write shard's manifest, tagged with the `run_id` every shard of its run shares."""
+        path = self.directory / MANIFEST
+        write_dict_to_file(
+            {"index": self.index, "count": self.count, "run_id": run_id, **metadata},
+            path,
+        )
+        return path
+
+    def upload(self, bucket_name: str) -> None:
+        """Upload shard's outputs for a merge from another host."""
+        for path in sorted(self.directory.rglob("*")):
+            if path.is_file():
+                upload_file_to_s3(
+                    path,
+                    bucket_name,
+                    f"{SHARDS_PREFIX}/{path.relative_to(SHARDS_ROOT).as_posix()}",
+                )
+
+
+def download_shards(bucket_name: str, root: Path = SHARDS_ROOT) -> None:
+    """Download outputs of every shard uploaded to `bucket_name`."""
+    for obj in paginate(
+        S3_CLIENT,
+        "list_objects_v2",
+        "Contents",
+        Bucket=bucket_name,
+        Prefix=SHARDS_PREFIX,
+    ):
+        download_file_from_s3(
+            bucket_name,
+            obj["Key"],
+            root / obj["Key"][len(SHARDS_PREFIX) + 1 :],
+        )
+
+
+def _shard_directories(root: Path) -> list[Path]:
+    """Get output directories of each shard of a run, in shard order."""
+    directories: dict[tuple[int, int], Path] = {}
+    run_ids: set[Optional[str]] = set()
+    for manifest_path in root.glob(f"*/{MANIFEST}"):
+        with manifest_path.open() as f:
+            manifest = load(f)
+        directories[(manifest["index"], manifest["count"])] = manifest_path.parent
+        run_ids.add(manifest.get("run_id"))
+
+    if not directories:
+        raise ValueError(f"No shards found under {root}")
+
+    # Shards of an earlier run split the same number of ways would otherwise merge silently
+    if len(run_ids) > 1:
+        raise ValueError(
+            f"Shards of runs {sorted(map(str, run_ids))} found under {root}, remove those of stale runs"
+        )
+
+    counts = {count for _, count in directories}
+    if len(counts) > 1:
+        raise ValueError(
+            f"Shards of runs split {sorted(counts)} ways found under {root}, remove those of stale runs"
+        )
+    count = counts.pop()
+    if missing := sorted(set(range(count)) - {index for index, _ in directories}):
+        raise ValueError(f"Missing shard(s) {missing} of {count} under {root}")
+
+    return [directories[(index, count)] for index in range(count)]
+
+
+def _merge_account_shards(
+    title: str, directories: list[Path], out: Path
+) -> Optional[str]:
+    """Gather per-account files of report `title` from each shard under a single index,
+    returning its path relative to `out`.
+    """
+    index_paths = [
+        directory / title / "index.json"
+        for directory in directories
+        if (directory / title / "index.json").exists()
+    ]
+    if not index_paths:
+        return None
+
+    metadata: dict[str, Any] = {}
+    shards: dict[str, dict[str, Any]] = {}
+    (out / title).mkdir(parents=True, exist_ok=True)
+
+    for index_path in index_paths:
+        with index_path.open() as f:
+            index = load(f)
+        for account_id in index.pop("shards"):
+            path = out / title / f"{account_id}.json"
+            copyfile(index_path.parent / path.name, path)
+            shards[account_id] = {
+                "path": path.relative_to(out).as_posix(),
+                "bytes": path.stat().st_size,
+            }
+        metadata.update(index)
+
+    merged_index_path = out / title / "index.json"
+    write_dict_to_file(
+        {**metadata, "shards": dict(sorted(shards.items()))}, merged_index_path
+    )
+
+    return merged_index_path.relative_to(out).as_posix()
+
+
+def _merge_details(
+    details: list[dict[str, Any]], index_path: Optional[str]
+) -> dict[str, Any]:
+    """Merge shards' report details, uniting per-account mappings and concatenating lists."""
+    merged: dict[str, Any] = {}
+
+    for shard_details in details:
+        for key, value in shard_details.items():
+            if key == "shards" and index_path is not None:
+                merged[key] = index_path
+            elif key not in merged:
+                merged[key] = value
+            elif isinstance(value, dict) and isinstance(merged[key], dict):
+                merged[key] = {**merged[key], **value}
+            elif isinstance(value, list) and isinstance(merged[key], list):
+                merged[key] = merged[key] + value
+
+    return merged
+
+
+def _merge_reports(
+    reports: dict[str, dict[str, Any]], index_path: Optional[str]
+) -> dict[str, Any]:
+    if "details" not in next(iter(reports.values())):
+        return _merge_details(list(reports.values()), index_path)
+
+    # Logging reports
+    merged = {
+        **next(iter(reports.values())),
+        "details": _merge_details(
+            [report["details"] for report in reports.values()], index_path
+        ),
+        "logging_enabled": any(r["logging_enabled"] for r in reports.values()),
+        "owned_by_scooper": any(r.get("owned_by_scooper") for r in reports.values()),
+        "event_time": max(r["event_time"] for r in reports.values()),
+    }
+    if len(reports) > 1:
+        merged["timings"] = {
+            "shards": {name: r.get("timings", {}) for name, r in reports.items()}
+        }
+
+    return merged
+
+
+def merge_shards(root: Path = SHARDS_ROOT, out: Path = Path("out")) -> list[Path]:
+    """Merge outputs of every shard of a run under `root` into the report files of an unsharded run."""
+    directories = _shard_directories(root)
+    written = []
+
+    for name in sorted(
+        {path.name for directory in directories for path in directory.glob("*.ndjson")}
+    ):
+        path = out / name
+        with path.open("wb") as merged:
+            for directory in directories:
+                if (directory / name).exists():
+                    with (directory / name).open("rb") as f:
+                        copyfileobj(f, merged)
+        written.append(path)
+
+    for title in sorted(
+        {
+            path.stem
+            for directory in directories
+            for path in directory.glob("*.json")
+            if path.name != MANIFEST
+        }
+    ):
+        reports = {}
+        for directory in directories:
+            if (directory / f"{title}.json").exists():
+                with (directory / f"{title}.json").open() as f:
+                    reports[directory.name] = load(f)
+
+        index_path = _merge_account_shards(title, directories, out)
+        path = out / f"{title}.json"
+        write_dict_to_file(_merge_reports(reports, index_path), path)
+        written.append(path)
+
+    _logger.info("Merged %d shards into %s", len(directories), out)
+
+    return written
@@ -0,0 +1,232 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import asdict, is_dataclass
+from datetime import datetime, timezone
+from json import load
+from pathlib import Path
+from struct import Struct
+from typing import Any, BinaryIO, Optional
+
+from msgpack import Timestamp, packb, unpackb
+
+from scooper.core.utils.io import ShardedReportWriter
+from scooper.core.utils.logger import get_logger
+
+try:
+    import zstandard
+except ImportError:  # Optional, snapshots are written uncompressed without it
+    zstandard = None
+
+MAGIC = b"SCOOPSNP"
+SNAPSHOT_VERSION = 1
+ZSTD = "zstd"
+DEFAULT_COMPRESSION = ZSTD if zstandard is not None else None
+
+# Magic and version open the file, the index's offset and length close it
+_PREAMBLE = Struct(">8sB")
+_TRAILER = Struct(">QQ")
+
+_logger = get_logger()
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        if obj.tzinfo is None:
+            obj = obj.replace(tzinfo=timezone.utc)
+        return Timestamp.from_datetime(obj)
+    elif isinstance(obj, set):
+        return list(obj)
+    elif isinstance(obj, Path):
+        return str(obj)
+    elif isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Can't snapshot {type(obj).__name__} object")
+
+
+def _pack(obj: Any) -> bytes:
+    return packb(obj, default=_default)
+
+
+def _unpack(data: bytes) -> Any:
+    # Timestamps are loaded back as timezone-aware datetimes
+    return unpackb(data, timestamp=3, strict_map_key=False)
+
+
+class SnapshotWriter:
+    """Writer of a compact binary snapshot of named sections.
+
+    Each section is msgpack-encoded, and zstd-compressed if asked, on its own, so it
+    can be read back without decoding any other. Sections are streamed to the file as
+    they are written, and an index of their offsets is appended on close.
+    """
+
+    def __init__(self, path: Path, compression: Optional[str] = None) -> None:
+        if compression == ZSTD and zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+        elif compression not in (None, ZSTD):
+            raise ValueError(f"Unsupported snapshot compression {compression}")
+
+        if not path.parent.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.path = path
+        self.compression = compression
+        self._compressor = zstandard.ZstdCompressor() if compression else None
+        self._sections: dict[str, tuple[int, int]] = {}
+        self._file = path.open("wb")
+        self._file.write(_PREAMBLE.pack(MAGIC, SNAPSHOT_VERSION))
+
+    def __enter__(self) -> SnapshotWriter:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def write(self, name: str, obj: Any) -> None:
+        if name in self._sections:
+            raise ValueError(f"Section {name} already written")
+
+        data = _pack(obj)
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
+        self._sections[name] = (self._file.tell(), len(data))
+        self._file.write(data)
+
+    def close(self) -> None:
+        index = _pack(
+            {
+                "version": SNAPSHOT_VERSION,
+                "compression": self.compression,
+                "created": datetime.now(tz=timezone.utc),
+                "sections": self._sections,
+            }
+        )
+        offset = self._file.tell()
+        self._file.write(index)
+        self._file.write(_TRAILER.pack(offset, len(index)))
+        self._file.close()
+
+        _logger.info(
+            "Snapshot of %d sections written to %s", len(self._sections), self.path
+        )
+
+
+class Snapshot:
+    """Lazily loaded snapshot written by `SnapshotWriter`.
+
+    Opening a snapshot only reads its index; each section is read and decoded when
+    loaded, e.g. the CloudWatch details of one account without the rest of the run.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file: BinaryIO = path.open("rb")
+
+        try:
+            magic, version = _PREAMBLE.unpack(self._file.read(_PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a Scooper snapshot")
+            if version != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported snapshot version {version}")
+
+            self._file.seek(-_TRAILER.size, 2)
+            offset, length = _TRAILER.unpack(self._file.read(_TRAILER.size))
+            self._file.seek(offset)
+            index = _unpack(self._file.read(length))
+        except Exception:
+            self._file.close()
+            raise
+
+        self.compression: Optional[str] = index["compression"]
+        self.created: datetime = index["created"]
+        self._sections: dict[str, tuple[int, int]] = index["sections"]
+
+        if self.compression == ZSTD and zstandard is None:
+            self._file.close()
+            raise ValueError(f"Reading {path} requires the zstandard package")
+        self._decompressor = zstandard.ZstdDecompressor() if self.compression else None
+
+    def __enter__(self) -> Snapshot:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    @property
+    def sections(self) -> list[str]:
+        return list(self._sections)
+
+    def load(self, name: str) -> Any:
+        """Read and decode section `name` only."""
+        try:
+            offset, length = self._sections[name]
+        except KeyError:
+            raise KeyError(f"No section {name} in snapshot {self.path}") from None
+
+        self._file.seek(offset)
+        data = self._file.read(length)
+        if self._decompressor is not None:
+            data = self._decompressor.decompress(data)
+        return _unpack(data)
+
+    def accounts(self, title: str) -> list[str]:
+        """IDs of accounts with a section of their own in report `title`."""
+        prefix = f"{title}/"
+        return [
+            name[len(prefix) :] for name in self._sections if name.startswith(prefix)
+        ]
+
+    def account(self, title: str, account_id: str) -> Any:
+        """Load report `title`'s section of account `account_id` only."""
+        return self.load(f"{title}/{account_id}")
+
+
+def write_report_snapshot(
+    reports: dict[str, Any],
+    path: Path,
+    shard_writers: Optional[dict[str, ShardedReportWriter]] = None,
+    compression: Optional[str] = None,
+) -> Path:
+    """Snapshot each report as section `{title}`, and per-account shards of reports
+    written with a `ShardedReportWriter` as sections `{title}/{account_id}`.
+    """
+    with SnapshotWriter(path, compression) as writer:
+        for title, report in reports.items():
+            writer.write(title, asdict(report) if is_dataclass(report) else report)
+
+            if title in (shard_writers or {}):
+                for file_name, shard_path in sorted(shard_writers[title].paths.items()):
+                    if shard_path == shard_writers[title].index_path:
+                        continue
+                    with shard_path.open() as f:
+                        writer.write(f"{title}/{Path(file_name).stem}", load(f))
+
+    return path
@@ -29,8 +29,9 @@ from botocore.client import BaseClient
 from botocore.exceptions import ClientError
 
 from scooper.core.utils.logger import get_logger
+from scooper.core.utils.metrics import instrument
 
-STS_CLIENT = client("sts")
+STS_CLIENT = instrument(client("sts"))
 _logger = get_logger()
 
 
@@ -49,9 +50,12 @@ def assume_role(
 
     credentials = response["Credentials"]
 
-    return client(
-        service,
-        aws_access_key_id=credentials["AccessKeyId"],
-        aws_secret_access_key=credentials["SecretAccessKey"],
-        aws_session_token=credentials["SessionToken"],
+    return instrument(
+        client(
+            service,
+            aws_access_key_id=credentials["AccessKeyId"],
+            aws_secret_access_key=credentials["SecretAccessKey"],
+            aws_session_token=credentials["SessionToken"],
+        ),
+        account_id=role_arn.split(":")[4],
     )
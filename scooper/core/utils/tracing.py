@@ -0,0 +1,114 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from json import dump
+from os import getpid
+from pathlib import Path
+from threading import Lock, current_thread, get_ident
+from time import perf_counter_ns
+from typing import Any, Iterator
+
+from scooper.core.utils.logger import get_logger
+
+_logger = get_logger()
+
+
+class Tracer:
+    """Thread-safe recorder of spans, exported as Chrome trace events.
+
+    The exported file can be opened offline in Perfetto (https://ui.perfetto.dev) or
+    `about:tracing`, with one track per thread.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._events: list[dict[str, Any]] = []
+        self._thread_names: dict[int, str] = {}
+        self._lock = Lock()
+        self._pid = getpid()
+        self._origin_ns = perf_counter_ns()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    @contextmanager
+    def span(self, name: str, category: str, **args) -> Iterator[None]:
+        """Record a complete event spanning the context, on the current thread's track."""
+        if not self.enabled:
+            yield
+            return
+
+        start_ns = perf_counter_ns()
+        try:
+            yield
+        finally:
+            end_ns = perf_counter_ns()
+            thread_id = get_ident()
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start_ns - self._origin_ns) / 1000,
+                "dur": (end_ns - start_ns) / 1000,
+                "pid": self._pid,
+                "tid": thread_id,
+                "args": {key: str(value) for key, value in args.items()},
+            }
+            with self._lock:
+                self._events.append(event)
+                self._thread_names.setdefault(thread_id, current_thread().name)
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            thread_names = [
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self._pid,
+                    "tid": thread_id,
+                    "args": {"name": thread_name},
+                }
+                for thread_id, thread_name in self._thread_names.items()
+            ]
+            return {
+                "traceEvents": thread_names
+                + sorted(self._events, key=lambda event: event["ts"]),
+                "displayTimeUnit": "ms",
+            }
+
+    def write(self, path: Path = Path("out/trace.json")) -> None:
+        if not self.enabled:
+            return
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w") as f:
+            dump(self.to_dict(), f)
+
+        _logger.info("Trace written to %s", path)
+
+
+TRACER = Tracer()
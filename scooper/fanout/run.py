@@ -0,0 +1,180 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from json import dumps, loads
+from pathlib import PurePosixPath
+from time import sleep
+from typing import Any, Iterator, Optional
+
+from boto3 import client
+from botocore.client import BaseClient
+
+from scooper.core.constants import FANOUT_MAX_CONCURRENCY
+from scooper.core.utils.io import S3_CLIENT, ShardedReportWriter, write_bytes_to_s3
+from scooper.core.utils.logger import get_logger
+from scooper.core.utils.metrics import instrument
+from scooper.core.utils.paginate import paginate
+
+FANOUT_STACK = "ScooperFanOut"
+RUNS_PREFIX = "scooper/runs"
+POLL_SECONDS = 10
+NUM_WORKERS = 16
+
+_logger = get_logger()
+
+
+class FanOutRun:
+    """Run of the fan-out stack's state machine over a list of organization accounts.
+
+    The account list is written to the Scooper bucket for the distributed map to read,
+    and each account's shard of each source is read back from the bucket once done.
+    """
+
+    def __init__(
+        self,
+        bucket_name: str,
+        state_machine_arn: str,
+        sfn_client: Optional[BaseClient] = None,
+        s3_client: Optional[BaseClient] = None,
+    ) -> None:
+        self.bucket_name = bucket_name
+        self.state_machine_arn = state_machine_arn
+        self.run_id = datetime.now(tz=timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        self.prefix = f"{RUNS_PREFIX}/{self.run_id}"
+        self.execution_arn: Optional[str] = None
+        self.account_ids: list[str] = []
+        self._sfn_client = sfn_client or instrument(client("stepfunctions"))
+        self._s3_client = s3_client or S3_CLIENT
+
+    @classmethod
+    def from_stack(
+        cls,
+        stack_name: str = FANOUT_STACK,
+        cloudformation_client: Optional[BaseClient] = None,
+    ) -> FanOutRun:
+        """Run of the state machine deployed by stack `stack_name`."""
+        cloudformation_client = cloudformation_client or instrument(
+            client("cloudformation")
+        )
+        stack = cloudformation_client.describe_stacks(StackName=stack_name)["Stacks"][0]
+        outputs = {
+            output["OutputKey"]: output["OutputValue"]
+            for output in stack.get("Outputs", [])
+        }
+
+        return cls(outputs["BucketName"], outputs["StateMachineArn"])
+
+    def start(
+        self,
+        account_ids: list[str],
+        max_concurrency: int = FANOUT_MAX_CONCURRENCY,
+        cloudwatch_summary: bool = False,
+    ) -> str:
+        self.account_ids = account_ids
+        accounts_key = f"{self.prefix}/accounts.json"
+        write_bytes_to_s3(
+            dumps(account_ids).encode(),
+            self.bucket_name,
+            accounts_key,
+            self._s3_client,
+        )
+
+        self.execution_arn = self._sfn_client.start_execution(
+            stateMachineArn=self.state_machine_arn,
+            name=self.run_id,
+            input=dumps(
+                {
+                    "accounts_key": accounts_key,
+                    "run_prefix": self.prefix,
+                    "max_concurrency": max_concurrency,
+                    "cloudwatch_summary": cloudwatch_summary,
+                }
+            ),
+        )["executionArn"]
+        _logger.info(
+            "Started fan-out of %d accounts as %s", len(account_ids), self.execution_arn
+        )
+
+        return self.execution_arn
+
+    def wait(self, poll_seconds: float = POLL_SECONDS) -> None:
+        """Wait for the run to finish, raising `RuntimeError` if it didn't succeed."""
+        while True:
+            execution = self._sfn_client.describe_execution(
+                executionArn=self.execution_arn
+            )
+            if execution["status"] != "RUNNING":
+                break
+            sleep(poll_seconds)
+
+        if execution["status"] != "SUCCEEDED":
+            raise RuntimeError(
+                f"Fan-out {self.execution_arn} {execution['status'].lower()}: {execution.get('cause', '')}"
+            )
+
+    def _read(self, object_key: str) -> tuple[str, Any]:
+        body = self._s3_client.get_object(Bucket=self.bucket_name, Key=object_key)[
+            "Body"
+        ].read()
+        return PurePosixPath(object_key).stem, loads(body)
+
+    def collect(
+        self, title: str, writer: ShardedReportWriter
+    ) -> Iterator[tuple[str, Any]]:
+        """Write each account's shard of source `title` with `writer` as it's read back,
+        yielding account IDs and shards.
+
+        Workers write no shard of accounts that failed to enumerate, which are warned
+        about once every shard was read.
+        """
+        object_keys = [
+            obj["Key"]
+            for obj in paginate(
+                self._s3_client,
+                "list_objects_v2",
+                "Contents",
+                Bucket=self.bucket_name,
+                Prefix=f"{self.prefix}/{title}/",
+            )
+        ]
+
+        collected = set()
+
+        with ThreadPoolExecutor(max_workers=NUM_WORKERS) as executor:
+            for account_id, shard in executor.map(self._read, object_keys):
+                writer.write(account_id, shard)
+                collected.add(account_id)
+                yield account_id, shard
+
+        if missing := sorted(set(self.account_ids) - collected):
+            _logger.warning(
+                "No %s shard of %d account(s), missing from the report, see the fan-out workers' logs: %s",
+                title,
+                len(missing),
+                ", ".join(missing),
+            )
@@ -0,0 +1,104 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+import os
+from string import Template
+from typing import Any, Callable
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from scooper.core.config import ScooperConfig
+from scooper.core.constants import ACCOUNT, ORG
+from scooper.core.utils.io import write_dict_to_s3
+from scooper.core.utils.logger import get_logger
+from scooper.sources.native.cloudwatch import CloudWatch
+
+BUCKET_NAME_VARIABLE = "SCOOPER_BUCKET_NAME"
+ROLE_NAME_VARIABLE = "SCOOPER_ROLE_NAME"
+SOURCES_VARIABLE = "SCOOPER_SOURCES"
+
+_logger = get_logger()
+
+
+def _enumerate_cloudwatch(
+    account_id: str, scooper_config: ScooperConfig, event: dict[str, Any]
+) -> Any:
+    return CloudWatch(
+        ORG, scooper_config, summary=event.get("cloudwatch_summary", False)
+    ).enumerate_account(account_id)
+
+
+def _enumerate_iam_metadata(
+    account_id: str, scooper_config: ScooperConfig, _: dict[str, Any]
+) -> Any:
+    # Needs the CBS Common layer, so only imported once asked for
+    from scooper.sources.custom import IAMMetadata
+
+    return IAMMetadata(
+        ORG,
+        organizational_account_access_role_template=Template(
+            f"arn:aws:iam::$account:role/{scooper_config.org_role_name}"
+        ),
+        account_ids=[account_id],
+        max_workers=1,
+    ).get_report()
+
+
+ENUMERATORS: dict[str, Callable[[str, ScooperConfig, dict[str, Any]], Any]] = {
+    "cloudwatch": _enumerate_cloudwatch,
+    "iam_metadata": _enumerate_iam_metadata,
+}
+
+
+def handler(event: dict[str, Any], _context: Any) -> dict[str, Any]:
+    """Enumerate account `event["account_id"]`, writing each source's shard of it to
+    `{event["run_prefix"]}/{source}/{account_id}.json` in the Scooper bucket.
+    """
+    account_id = event["account_id"]
+    bucket_name = os.environ[BUCKET_NAME_VARIABLE]
+    scooper_config = ScooperConfig(
+        ACCOUNT, org_role_name=os.environ[ROLE_NAME_VARIABLE]
+    )
+    results = {}
+
+    for title in os.getenv(SOURCES_VARIABLE, ",".join(ENUMERATORS)).split(","):
+        try:
+            shard = ENUMERATORS[title](account_id, scooper_config, event)
+        except (BotoCoreError, ClientError) as e:
+            _logger.error(
+                "Failed to enumerate %s of account '%s': %s", title, account_id, e
+            )
+            results[title] = {"Error": str(e)}
+            continue
+
+        if shard is None:
+            # The account's role couldn't be assumed, which was logged
+            results[title] = None
+            continue
+
+        object_key = f"{event['run_prefix']}/{title}/{account_id}.json"
+        write_dict_to_s3(shard, bucket_name, object_key)
+        results[title] = object_key
+
+    return {"account_id": account_id, "results": results}
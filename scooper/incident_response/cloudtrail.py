@@ -22,36 +22,323 @@ Notwithstanding the foregoing, third party components included herein are subjec
 noted in the files associated with those components.
 """
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
-from datetime import datetime
+import gzip
+import re
+import sys
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import closing, contextmanager, nullcontext
+from contextvars import copy_context
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from itertools import islice
 from json import loads
+from multiprocessing import get_all_start_methods, get_context
+from pathlib import Path
+from queue import Full, Queue
+from threading import Event
+from time import perf_counter
+from typing import IO, Any, Callable, Iterable, Iterator, Optional, Union
 
 from boto3 import Session, client
+from botocore.client import BaseClient
 from botocore.config import Config
 
-from scooper.core.utils.io import write_dict_to_s3
+from scooper.core.constants import INSIGHT, LOOKUP_ATTRIBUTE_KEYS, MANAGEMENT
+from scooper.core.utils.io import (
+    dict_to_json_bytes,
+    upload_file_to_s3,
+    write_bytes_to_s3,
+    write_dict_to_s3,
+)
 from scooper.core.utils.logger import get_logger
-from scooper.core.utils.paginate import paginate
+from scooper.core.utils.metrics import instrument
+from scooper.core.utils.organizations import ORG_CLIENT
+from scooper.core.utils.paginate import iter_pages, paginate
+from scooper.core.utils.profiling import PROFILER
+from scooper.core.utils.progress import PROGRESS
 from scooper.core.utils.sts import STS_CLIENT
+from scooper.core.utils.tracing import TRACER
+from scooper.incident_response.manifest import ObjectSummary, ScoopManifest
+from scooper.incident_response.partitions import Partition, PartitionLayout
+from scooper.incident_response.spill import SpillBuffer
 
 NUM_WORKERS = 2  # We get throttled beyond this :(
+LOOKUP_EVENTS_STAGE = "cloudtrail.lookup_events"
+TRAIL_LOG_WORKERS = 16
+# Log files downloaded ahead of the one being parsed
+TRAIL_LOG_WINDOW = 2 * TRAIL_LOG_WORKERS
+TRAIL_LOGS_STAGE = "cloudtrail.trail_logs"
+# CloudTrail delivers log files within about 15 minutes of their events
+TRAIL_LOG_DELIVERY_DELAY = timedelta(hours=1)
+TRAIL_LOG_TIMESTAMP = re.compile(r"_(\d{8}T\d{4})Z_")
+TRAIL_EVENT_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+SCOOP_CHUNK_SIZE = 2000  # Looked up events per worker process task
+# Encoding tasks submitted ahead of the one being collected
+ENCODE_WINDOW = 32
+# Longest time slice looked up at once by scoops with a memory budget, bounding the
+# event IDs kept to tell apart events matching several looked up values
+LOOKUP_SLICE = timedelta(hours=1)
+# Seconds lookups wait for room for a page before checking whether to stop
+LOOKUP_PUT_SECONDS = 0.1
 
 config = Config(retries={"mode": "adaptive", "max_attempts": 16})
 _logger = get_logger()
 
 
+try:
+    from resource import RUSAGE_SELF, getrusage
+except ImportError:  # Not available on Windows
+    getrusage = None
+
+
+def _peak_rss_bytes() -> int:
+    if getrusage is None:
+        return 0
+    max_rss = getrusage(RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, kilobytes elsewhere
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+@dataclass
+class StageStats:
+    seconds: float = 0.0
+    items: int = 0
+    bytes: int = 0
+    peak_rss_bytes: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            **asdict(self),
+            "items_per_second": self.items / self.seconds if self.seconds else 0.0,
+            "bytes_per_second": self.bytes / self.seconds if self.seconds else 0.0,
+        }
+
+
+@dataclass
+class ScoopStats:
+    """Throughput and peak RSS of each stage of a CloudTrail scoop.
+
+    Peak RSS is the process' high-water mark at the end of each stage, so it only grows
+    from one stage to the next.
+    """
+
+    stages: dict[str, StageStats] = field(default_factory=dict)
+
+    @contextmanager
+    def stage(self, name: str, profiled: bool = True) -> Iterator[StageStats]:
+        """Time stage `name`, accumulating across entries.
+
+        Stages are also profiled as phase `scoop.{name}`, unless entered once per
+        object, whose callers profile them as a whole instead, as each phase takes heap
+        snapshots.
+        """
+        stats = self.stages.setdefault(name, StageStats())
+        start_time = perf_counter()
+
+        with PROFILER.phase(f"scoop.{name}") if profiled else nullcontext():
+            try:
+                yield stats
+            finally:
+                stats.seconds += perf_counter() - start_time
+                stats.peak_rss_bytes = _peak_rss_bytes()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {name: stats.to_dict() for name, stats in self.stages.items()}
+
+
 @dataclass
 class TimeRange:
     start: datetime
     end: datetime
 
 
-def get_cloudtrail_events(start_time: datetime, end_time: datetime) -> list[dict]:
-    """Get CloudTrail events between `start_time` and `end_time` in current account and region."""
-    cloudtrail_client = client("cloudtrail", config=config)
+def _lookup_event_attribute(event: dict, key: str) -> list[Optional[str]]:
+    if key == "ResourceName":
+        return [resource.get("ResourceName") for resource in event.get("Resources", [])]
+    return [event.get(key)]
+
+
+def _record_attribute(record: dict, key: str) -> list[Optional[str]]:
+    """Get LookupEvents attribute `key` of trail log record `record`."""
+    identity = record.get("userIdentity") or {}
+
+    if key == "EventName":
+        return [record.get("eventName")]
+    elif key == "EventSource":
+        return [record.get("eventSource")]
+    elif key == "AccessKeyId":
+        return [identity.get("accessKeyId")]
+    elif key == "Username":
+        # Name of IAM users, and session name of assumed roles, as LookupEvents has them
+        return [identity.get("userName"), identity.get("arn", "").rsplit("/", 1)[-1]]
+
+    # Resources are named by their ARN, or the last part of it
+    names = []
+    for resource in record.get("resources") or []:
+        arn = resource.get("ARN", "")
+        names.extend((arn, re.split(r"[:/]", arn)[-1]))
+    return names
+
+
+@dataclass(frozen=True)
+class EventFilter:
+    """Filter of scooped events, on LookupEvents attributes and event category.
+
+    Events must match any value given of each attribute, for every attribute given.
+    LookupEvents only accepts one attribute per call, so events are looked up once per
+    value of the most selective attribute, and the others are matched client-side,
+    before events are parsed.
+    """
+
+    attributes: tuple[tuple[str, str], ...] = ()
+    event_category: str = MANAGEMENT
+    # Values of each attribute, from most to least selective
+    _values: tuple[tuple[str, frozenset[str]], ...] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        for key, _ in self.attributes:
+            if key not in LOOKUP_ATTRIBUTE_KEYS:
+                raise ValueError(f"Unsupported lookup attribute {key}")
+        values = tuple(
+            (key, frozenset(value for k, value in self.attributes if k == key))
+            for key in LOOKUP_ATTRIBUTE_KEYS
+            if any(k == key for k, _ in self.attributes)
+        )
+        object.__setattr__(self, "_values", values)
+
+    @property
+    def lookups(self) -> list[dict[str, Any]]:
+        """Keyword arguments of each LookupEvents call covering the filter."""
+        kwargs = {"EventCategory": INSIGHT} if self.event_category == INSIGHT else {}
+        if not self._values:
+            return [kwargs]
+
+        key, values = self._values[0]
+        return [
+            {
+                **kwargs,
+                "LookupAttributes": [{"AttributeKey": key, "AttributeValue": value}],
+            }
+            for value in sorted(values)
+        ]
+
+    def matches_lookup_event(self, event: dict) -> bool:
+        """Match LookupEvents `event` on the attributes it wasn't looked up by."""
+        return all(
+            not values.isdisjoint(_lookup_event_attribute(event, key))
+            for key, values in self._values[1:]
+        )
+
+    def matches_record(self, record: dict) -> bool:
+        """Match trail log record `record` on every attribute."""
+        return all(
+            not values.isdisjoint(_record_attribute(record, key))
+            for key, values in self._values
+        )
+
+
+def _lookup_events(
+    cloudtrail_client: BaseClient,
+    period: TimeRange,
+    event_filter: EventFilter,
+    lookup: dict[str, Any],
+    end_time: datetime,
+) -> Iterator[list[dict]]:
+    """Look up events of `period`, page by page.
+
+    LookupEvents includes both ends of a time range, so events at the end of a period
+    are left to the next one, unless the period ends the scoop at `end_time`.
+    """
+    covered_until = period.end
+
+    with TRACER.span("time_slice", "scoop", start=period.start, end=period.end):
+        for page in iter_pages(
+            cloudtrail_client,
+            "lookup_events",
+            "Events",
+            StartTime=period.start,
+            EndTime=period.end,
+            **lookup,
+        ):
+            if page:
+                # Events come newest first, so the period is covered down to the page's oldest
+                oldest_event_time = min(page[-1]["EventTime"], covered_until)
+                PROGRESS.update(
+                    LOOKUP_EVENTS_STAGE,
+                    covered_seconds=(covered_until - oldest_event_time).total_seconds(),
+                )
+                covered_until = oldest_event_time
+            if events := [
+                event
+                for event in page
+                if (event["EventTime"] < period.end or period.end == end_time)
+                and event_filter.matches_lookup_event(event)
+            ]:
+                yield events
+
+    PROGRESS.update(
+        LOOKUP_EVENTS_STAGE,
+        covered_seconds=(covered_until - period.start).total_seconds(),
+    )
+
+
+def _put(pages: Queue, closed: Event, item: Any) -> bool:
+    """Put `item` on `pages` once there's room, unless their consumer is `closed`."""
+    while not closed.is_set():
+        try:
+            pages.put(item, timeout=LOOKUP_PUT_SECONDS)
+            return True
+        except Full:
+            pass
+    return False
+
+
+def _produce_lookup_events(pages: Queue, closed: Event, task: int, *args: Any) -> None:
+    """Put each page of events of lookup `task` on `pages`, then `None` once done."""
+    try:
+        with closing(_lookup_events(*args)) as events:
+            for page in events:
+                if not _put(pages, closed, (task, page)):
+                    return
+    finally:
+        _put(pages, closed, (task, None))
+
+
+def iter_cloudtrail_events(
+    start_time: datetime,
+    end_time: datetime,
+    cloudtrail_client: Optional[BaseClient] = None,
+    event_filter: Optional[EventFilter] = None,
+    slice_duration: Optional[timedelta] = None,
+) -> Iterator[list[dict]]:
+    """Look up CloudTrail events between `start_time` and `end_time` in current account and region.
+
+    The time range is split in a period per worker, or in periods of at most
+    `slice_duration`, and each period, and value of a filter's looked up attribute, is
+    looked up in parallel. Events are yielded page by page as they're looked up, and
+    only a page per worker is held ahead of the consumer, however slowly it consumes.
+    """
+    if cloudtrail_client is None:
+        cloudtrail_client = instrument(client("cloudtrail", config=config))
+    event_filter = event_filter or EventFilter()
+    lookups = event_filter.lookups
+    PROGRESS.cover(
+        LOOKUP_EVENTS_STAGE, (end_time - start_time).total_seconds() * len(lookups)
+    )
 
     time_interval = (end_time - start_time) / NUM_WORKERS
+    if slice_duration is not None:
+        time_interval = min(time_interval, slice_duration)
     periods: list[TimeRange] = []
     period_start = start_time
 
@@ -60,25 +347,262 @@ def get_cloudtrail_events(start_time: datetime, end_time: datetime) -> list[dict
         periods.append(TimeRange(start=period_start, end=period_end))
         period_start = period_end
 
-    cloudtrail_scoops = []
+    # Lookups are started period by period, and events matching several looked up
+    # values only need to be told apart within their period while its lookups run
+    tasks = enumerate((i, lookup) for i in range(len(periods)) for lookup in lookups)
+    pages: Queue = Queue(maxsize=NUM_WORKERS)
+    closed = Event()
+    running: dict[int, tuple[int, Future]] = {}
+    event_ids: dict[int, set[str]] = {}
+    lookups_done: dict[int, int] = {}
 
     with ThreadPoolExecutor(max_workers=NUM_WORKERS) as executor:
-        futures = []
-        for period in periods:
-            futures.append(
-                executor.submit(
-                    paginate,
-                    cloudtrail_client,
-                    "lookup_events",
-                    "Events",
-                    StartTime=period.start,
-                    EndTime=period.end,
-                )
+
+        def look_up() -> None:
+            if (task := next(tasks, None)) is None:
+                return
+            index, (period, lookup) = task
+            running[index] = period, executor.submit(
+                copy_context().run,
+                _produce_lookup_events,
+                pages,
+                closed,
+                index,
+                cloudtrail_client,
+                periods[period],
+                event_filter,
+                lookup,
+                end_time,
             )
-        for future in as_completed(futures):
-            cloudtrail_scoops.extend(future.result())
 
-    return cloudtrail_scoops
+        for _ in range(NUM_WORKERS):
+            look_up()
+
+        try:
+            while running:
+                index, events = pages.get()
+                period = running[index][0]
+                if events is None:
+                    running.pop(index)[1].result()
+                    lookups_done[period] = lookups_done.get(period, 0) + 1
+                    if lookups_done[period] == len(lookups):
+                        del lookups_done[period]
+                        event_ids.pop(period, None)
+                    look_up()
+                    continue
+
+                if len(lookups) > 1:
+                    period_event_ids = event_ids.setdefault(period, set())
+                    unique_events = []
+                    for event in events:
+                        if event["EventId"] not in period_event_ids:
+                            period_event_ids.add(event["EventId"])
+                            unique_events.append(event)
+                    events = unique_events
+                yield events
+        finally:
+            # Let lookups still running return rather than wait for room forever
+            closed.set()
+
+
+def get_cloudtrail_events(
+    start_time: datetime,
+    end_time: datetime,
+    cloudtrail_client: Optional[BaseClient] = None,
+    event_filter: Optional[EventFilter] = None,
+) -> list[dict]:
+    """Get CloudTrail events between `start_time` and `end_time` in current account and region."""
+    return [
+        event
+        for events in iter_cloudtrail_events(
+            start_time, end_time, cloudtrail_client, event_filter
+        )
+        for event in events
+    ]
+
+
+def select_trail(trails: list[dict], region: str) -> Optional[dict]:
+    """Select trail delivering logs of `region` to S3, preferring organization then multi-region trails."""
+    candidates = [
+        trail
+        for trail in trails
+        if trail.get("S3BucketName")
+        and (trail["IsMultiRegionTrail"] or trail["HomeRegion"] == region)
+    ]
+
+    return max(
+        candidates,
+        key=lambda trail: (trail["IsOrganizationTrail"], trail["IsMultiRegionTrail"]),
+        default=None,
+    )
+
+
+def _trail_log_prefix(
+    trail: dict, account_id: str, region: str, event_category: str = MANAGEMENT
+) -> str:
+    prefix = f"{trail['S3KeyPrefix']}/" if trail.get("S3KeyPrefix") else ""
+    if trail["IsOrganizationTrail"]:
+        org_id = ORG_CLIENT.describe_organization()["Organization"]["Id"]
+        prefix += f"AWSLogs/{org_id}/{account_id}"
+    else:
+        prefix += f"AWSLogs/{account_id}"
+
+    # Insights events are delivered apart from the trail's other events
+    log_type = "CloudTrail-Insight" if event_category == INSIGHT else "CloudTrail"
+
+    return f"{prefix}/{log_type}/{region}"
+
+
+def _list_trail_logs(
+    s3_client: BaseClient,
+    bucket_name: str,
+    prefix: str,
+    start_time: datetime,
+    end_time: datetime,
+) -> list[str]:
+    """List keys of trail log files under `prefix` that may hold events in the time range."""
+    keys = []
+    last_delivery_time = end_time + TRAIL_LOG_DELIVERY_DELAY
+    day = start_time.astimezone(timezone.utc).date()
+
+    while day <= last_delivery_time.astimezone(timezone.utc).date():
+        for log in paginate(
+            s3_client,
+            "list_objects_v2",
+            "Contents",
+            Bucket=bucket_name,
+            Prefix=f"{prefix}/{day.strftime('%Y/%m/%d')}/",
+        ):
+            # Log files are named after the time they were delivered
+            if match := TRAIL_LOG_TIMESTAMP.search(log["Key"]):
+                delivery_time = datetime.strptime(
+                    match.group(1), "%Y%m%dT%H%M"
+                ).replace(tzinfo=timezone.utc)
+                if not start_time <= delivery_time <= last_delivery_time:
+                    continue
+            keys.append(log["Key"])
+        day += timedelta(days=1)
+
+    return keys
+
+
+def _download_trail_log(s3_client: BaseClient, bucket_name: str, key: str) -> bytes:
+    with TRACER.span(key, "download", bucket=bucket_name):
+        return s3_client.get_object(Bucket=bucket_name, Key=key)["Body"].read()
+
+
+def _parse_trail_log(
+    log: bytes,
+    start_time: datetime,
+    end_time: datetime,
+    event_filter: Optional[EventFilter] = None,
+) -> list[tuple[datetime, dict]]:
+    events = []
+
+    for record in loads(gzip.decompress(log))["Records"]:
+        if event_filter is not None and not event_filter.matches_record(record):
+            continue
+        event_time = datetime.strptime(
+            record["eventTime"], TRAIL_EVENT_TIME_FORMAT
+        ).replace(tzinfo=timezone.utc)
+        if start_time <= event_time < end_time:
+            events.append((event_time, record))
+
+    return events
+
+
+def _iter_trail_logs(
+    trail: dict,
+    account_id: str,
+    region: str,
+    start_time: datetime,
+    end_time: datetime,
+    stats: ScoopStats,
+    s3_client: Optional[BaseClient] = None,
+    event_category: str = MANAGEMENT,
+) -> Iterator[bytes]:
+    """Download `trail`'s log files that may hold events in the time range, yielding each as it arrives."""
+    if s3_client is None:
+        s3_client = instrument(
+            client("s3", config=Config(max_pool_connections=TRAIL_LOG_WORKERS))
+        )
+    bucket_name = trail["S3BucketName"]
+
+    with stats.stage("fetch") as fetch:
+        keys = _list_trail_logs(
+            s3_client,
+            bucket_name,
+            _trail_log_prefix(trail, account_id, region, event_category),
+            start_time,
+            end_time,
+        )
+        _logger.info(
+            "Reading %d log files of trail '%s' from bucket '%s'...",
+            len(keys),
+            trail["Name"],
+            bucket_name,
+        )
+
+        with ThreadPoolExecutor(max_workers=TRAIL_LOG_WORKERS) as executor:
+
+            def download(key: str) -> Future:
+                return executor.submit(
+                    copy_context().run, _download_trail_log, s3_client, bucket_name, key
+                )
+
+            # Only a window of log files is downloaded ahead, however slowly they're parsed
+            remaining = iter(keys)
+            pending = {download(key) for key in islice(remaining, TRAIL_LOG_WINDOW)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    log = future.result()
+                    fetch.items += 1
+                    fetch.bytes += len(log)
+                    PROGRESS.update(TRAIL_LOGS_STAGE, pages=1, items=1)
+                    if (key := next(remaining, None)) is not None:
+                        pending.add(download(key))
+                    yield log
+
+
+def get_trail_events(
+    trail: dict,
+    account_id: str,
+    region: str,
+    start_time: datetime,
+    end_time: datetime,
+    stats: ScoopStats,
+    s3_client: Optional[BaseClient] = None,
+    event_filter: Optional[EventFilter] = None,
+) -> list[tuple[datetime, dict]]:
+    """Get CloudTrail events between `start_time` and `end_time` from `trail`'s S3 log files.
+
+    Unlike LookupEvents, log files hold every event the trail logged, for as long as
+    they are retained. Log files are downloaded in parallel and parsed as they arrive,
+    so the `fetch` stage's time includes that of the `parse` stage.
+    """
+    events = []
+    parse = stats.stages.setdefault("parse", StageStats())
+
+    for log in _iter_trail_logs(
+        trail,
+        account_id,
+        region,
+        start_time,
+        end_time,
+        stats,
+        s3_client,
+        (event_filter or EventFilter()).event_category,
+    ):
+        start = perf_counter()
+        log_events = _parse_trail_log(log, start_time, end_time, event_filter)
+        parse.seconds += perf_counter() - start
+        parse.items += len(log_events)
+        events.extend(log_events)
+
+    parse.peak_rss_bytes = _peak_rss_bytes()
+
+    return events
 
 
 class CloudTrailDump:
@@ -88,13 +612,25 @@ class CloudTrailDump:
     def __len__(self) -> int:
         return len(self._data)
 
+    def parse(self) -> list[tuple[datetime, dict]]:
+        """Parse CloudTrail data into the time and body of each event."""
+        return [
+            (datum["EventTime"], loads(datum["CloudTrailEvent"]))
+            for datum in self._data
+        ]
+
     def partition(self) -> dict[datetime, list[dict]]:
         """Partition CloudTrail data by hour the events occurred."""
+        return self.partition_events(self.parse())
+
+    @staticmethod
+    def partition_events(
+        events: Iterable[tuple[datetime, dict]]
+    ) -> dict[datetime, list[dict]]:
+        """Partition parsed CloudTrail events by hour they occurred."""
         partitions: dict[datetime, list[dict]] = {}
 
-        for datum in self._data:
-            event: dict = loads(datum["CloudTrailEvent"])
-            event_time: datetime = datum["EventTime"]
+        for event_time, event in events:
             # Round time down to nearest hour
             event_time = event_time.replace(minute=0, second=0, microsecond=0)
             # Group events by hour
@@ -106,24 +642,372 @@ class CloudTrailDump:
         return partitions
 
 
-def write_cloudtrail_scoop_to_s3(
-    start_time: datetime, end_time: datetime, bucket_name: str
+def _encode_events(
+    events: Iterable[tuple[datetime, dict]], layout: PartitionLayout
+) -> dict[Partition, list[tuple[ObjectSummary, bytes]]]:
+    """Partition events, encoding each object's worth of a partition as the elements of a JSON array.
+
+    Joined in order, a partition's fragments are the exact bytes its whole partition
+    would have been serialized as in-process. Each fragment comes with the manifest
+    summary of its events.
+    """
+    return {
+        key: [
+            (ObjectSummary.of_events(chunk), dict_to_json_bytes(chunk)[2:-2])
+            for chunk in layout.chunks(partition)
+        ]
+        for key, partition in layout.partition(events).items()
+    }
+
+
+def _encode_lookup_events(
+    data: list[tuple[datetime, str]], layout: PartitionLayout
+) -> dict[Partition, list[tuple[ObjectSummary, bytes]]]:
+    return _encode_events(
+        ((event_time, loads(event)) for event_time, event in data), layout
+    )
+
+
+def _encode_trail_log(
+    log: bytes,
+    start_time: datetime,
+    end_time: datetime,
+    event_filter: Optional[EventFilter],
+    layout: PartitionLayout,
+) -> dict[Partition, list[tuple[ObjectSummary, bytes]]]:
+    return _encode_events(
+        _parse_trail_log(log, start_time, end_time, event_filter), layout
+    )
+
+
+def _close_object(
+    obj: IO[bytes], summary: ObjectSummary
+) -> tuple[IO[bytes], ObjectSummary]:
+    obj.write(b"\n]")
+    summary.bytes = obj.tell()
+    return obj, summary
+
+
+def _pack_fragments(
+    fragments: Iterable[tuple[ObjectSummary, bytes]],
+    max_events: Optional[int],
+    open_object: Callable[[], IO[bytes]] = BytesIO,
+) -> Iterator[tuple[IO[bytes], ObjectSummary]]:
+    """Join a partition's fragments into objects of at most `max_events` events, merging their summaries.
+
+    Objects are written to what `open_object` opens, fragment by fragment, so
+    partitions needn't be held in memory to be written to temporary files.
+    """
+    obj: Optional[IO[bytes]] = None
+    summary = ObjectSummary()
+
+    for fragment_summary, fragment in fragments:
+        if (
+            obj is not None
+            and max_events is not None
+            and summary.events + fragment_summary.events > max_events
+        ):
+            yield _close_object(obj, summary)
+            obj, summary = None, ObjectSummary()
+        if obj is None:
+            obj = open_object()
+            obj.write(b"[\n")
+        else:
+            obj.write(b",\n")
+        obj.write(fragment)
+        summary.merge(fragment_summary)
+
+    if obj is not None:
+        yield _close_object(obj, summary)
+
+
+def _process_pool(processes: int) -> Optional[ProcessPoolExecutor]:
+    # Spawned workers would re-run Scooper's entry point, so only forking is supported
+    if "fork" not in get_all_start_methods():
+        _logger.warning(
+            "Worker processes aren't supported on this platform, encoding in-process"
+        )
+        return None
+
+    pool = ProcessPoolExecutor(
+        max_workers=processes or None, mp_context=get_context("fork")
+    )
+    # Workers are only forked on first submit, so fork them before any thread starts,
+    # as forking a multithreaded process can deadlock on locks its threads hold
+    pool.submit(int).result()
+    return pool
+
+
+def _partition(
+    start_time: datetime,
+    end_time: datetime,
+    account_id: str,
+    region: str,
+    stats: ScoopStats,
+    trail: Optional[dict],
+    cloudtrail_client: Optional[BaseClient],
+    s3_client: Optional[BaseClient],
+    event_filter: EventFilter,
+    layout: PartitionLayout,
+) -> dict[Partition, list[dict]]:
+    if trail is not None:
+        events = get_trail_events(
+            trail,
+            account_id,
+            region,
+            start_time,
+            end_time,
+            stats,
+            s3_client,
+            event_filter,
+        )
+    else:
+        with stats.stage("fetch") as stage:
+            data = get_cloudtrail_events(
+                start_time, end_time, cloudtrail_client, event_filter
+            )
+            stage.items = len(data)
+        with stats.stage("parse") as stage:
+            events = CloudTrailDump(data).parse()
+            stage.items = len(events)
+        del data
+
+    with stats.stage("partition") as stage:
+        partitions = layout.partition(events)
+        stage.items = len(events)
+
+    return partitions
+
+
+def _serialize(
+    partitions: dict[Partition, list[dict]], stats: ScoopStats, layout: PartitionLayout
+) -> Iterator[tuple[Partition, int, bytes, ObjectSummary]]:
+    # Serialize one object at a time so only one is ever held encoded
+    for key, partition in partitions.items():
+        for part, chunk in enumerate(layout.chunks(partition)):
+            with stats.stage("serialize", profiled=False) as stage:
+                body = dict_to_json_bytes(chunk)
+                summary = ObjectSummary.of_events(chunk)
+                summary.bytes = len(body)
+                stage.items += len(chunk)
+                stage.bytes += len(body)
+            yield key, part, body, summary
+
+
+def _encode_fragments(
+    pool: Optional[ProcessPoolExecutor],
+    start_time: datetime,
+    end_time: datetime,
+    account_id: str,
+    region: str,
+    stats: ScoopStats,
+    trail: Optional[dict],
+    cloudtrail_client: Optional[BaseClient],
+    s3_client: Optional[BaseClient],
+    event_filter: EventFilter,
+    layout: PartitionLayout,
+    buffer: SpillBuffer,
 ) -> None:
-    """Write historical CloudTrail data to given `bucket_name`."""
+    """Encode events into partitions' fragments as they're fetched, in `pool` if given, adding them to `buffer`.
+
+    Only a window of tasks is encoded ahead of the one being collected, and tasks are
+    collected in the order they were submitted, so partitions keep the order of their
+    events and results don't pile up however fast events are fetched.
+    """
+    if trail is not None:
+        # Log files are encoded as they arrive, overlapping fetch and encode
+        tasks = (
+            (_encode_trail_log, log, start_time, end_time, event_filter, layout)
+            for log in _iter_trail_logs(
+                trail,
+                account_id,
+                region,
+                start_time,
+                end_time,
+                stats,
+                s3_client,
+                event_filter.event_category,
+            )
+        )
+    else:
+        tasks = _lookup_encode_tasks(
+            start_time, end_time, stats, cloudtrail_client, event_filter, layout, buffer
+        )
+
+    encode = stats.stages.setdefault("encode", StageStats())
+    pending: deque = deque()
+
+    def collect() -> None:
+        start = perf_counter()
+        fragments = pending.popleft()
+        if isinstance(fragments, Future):
+            fragments = fragments.result()
+        for key, key_fragments in fragments.items():
+            buffer.add(key, key_fragments)
+            for summary, fragment in key_fragments:
+                encode.items += summary.events
+                encode.bytes += len(fragment)
+        encode.seconds += perf_counter() - start
+
+    for task in tasks:
+        if pool is None:
+            start = perf_counter()
+            pending.append(task[0](*task[1:]))
+            encode.seconds += perf_counter() - start
+        else:
+            pending.append(pool.submit(*task))
+        while pending and (
+            len(pending) > ENCODE_WINDOW
+            or not isinstance(pending[0], Future)
+            or pending[0].done()
+        ):
+            collect()
+
+    while pending:
+        collect()
+    encode.peak_rss_bytes = _peak_rss_bytes()
+
+
+def _lookup_encode_tasks(
+    start_time: datetime,
+    end_time: datetime,
+    stats: ScoopStats,
+    cloudtrail_client: Optional[BaseClient],
+    event_filter: EventFilter,
+    layout: PartitionLayout,
+    buffer: SpillBuffer,
+) -> Iterator[tuple]:
+    fetch = stats.stages.setdefault("fetch", StageStats())
+    start = perf_counter()
+
+    # Only pickle what workers need of each event, in chunks of pages handed on as
+    # they're looked up, so only a chunk of events is ever held before it's encoded
+    chunk: list[tuple[datetime, str]] = []
+    for events in iter_cloudtrail_events(
+        start_time,
+        end_time,
+        cloudtrail_client,
+        event_filter,
+        LOOKUP_SLICE if buffer.max_memory is not None else None,
+    ):
+        fetch.seconds += perf_counter() - start
+        fetch.items += len(events)
+        chunk.extend((event["EventTime"], event["CloudTrailEvent"]) for event in events)
+        if len(chunk) >= SCOOP_CHUNK_SIZE:
+            yield _encode_lookup_events, chunk, layout
+            chunk = []
+        start = perf_counter()
+
+    if chunk:
+        yield _encode_lookup_events, chunk, layout
+    fetch.peak_rss_bytes = _peak_rss_bytes()
+
+
+def _flush(
+    buffer: SpillBuffer, layout: PartitionLayout
+) -> Iterator[tuple[Partition, int, Union[bytes, Path], ObjectSummary]]:
+    """Pack buffered partitions into objects, written to temporary files if they spilled."""
+    for key, spilled, fragments in buffer.partitions():
+        open_object = buffer.open_object if spilled else BytesIO
+        for part, (obj, summary) in enumerate(
+            _pack_fragments(fragments, layout.max_events, open_object)
+        ):
+            if isinstance(obj, BytesIO):
+                yield key, part, obj.getvalue(), summary
+            else:
+                obj.close()
+                yield key, part, Path(obj.name), summary
+
+
+def write_cloudtrail_scoop_to_s3(
+    start_time: datetime,
+    end_time: datetime,
+    bucket_name: str,
+    trail: Optional[dict] = None,
+    cloudtrail_client: Optional[BaseClient] = None,
+    s3_client: Optional[BaseClient] = None,
+    processes: int = 1,
+    event_filter: Optional[EventFilter] = None,
+    layout: Optional[PartitionLayout] = None,
+    max_memory: Optional[int] = None,
+) -> ScoopStats:
+    """Write historical CloudTrail data to given `bucket_name`, in objects laid out by `layout`.
+
+    Events are read from `trail`'s S3 log files if given, or looked up otherwise, and
+    only kept if they match `event_filter`. With more than one process (`0` for one
+    per CPU), events are decoded, partitioned and encoded in chunks by worker
+    processes, reported as a single `encode` stage.
+
+    With a `max_memory` budget, events are encoded as they're fetched, and buffered
+    partitions past the budget are spilled to temporary files, reported as a `spill`
+    stage. Objects of spilled partitions are also written to temporary files before
+    being uploaded, so memory stays bounded however many events a partition holds.
+
+    Objects are summarized as they're encoded, and their summaries written last, to
+    the scoop's manifest.
+    """
+    layout = layout or PartitionLayout()
     session = Session()
     region = session.region_name
     account_id = STS_CLIENT.get_caller_identity()["Account"]
+    stats = ScoopStats()
+    manifest = ScoopManifest(account_id, region, start_time, end_time, layout)
+    pool = _process_pool(processes) if processes != 1 else None
+    args = (
+        start_time,
+        end_time,
+        account_id,
+        region,
+        stats,
+        trail,
+        cloudtrail_client,
+        s3_client,
+        event_filter or EventFilter(),
+        layout,
+    )
 
     _logger.info(
         f"Getting CloudTrail data between '{start_time}' and '{end_time}' in account '{account_id}' and region '{region}'..."
     )
-    data = get_cloudtrail_events(start_time, end_time)
-    partitions = CloudTrailDump(data).partition()
-    cloudtrail_prefix = f"scooper/CloudTrail/{account_id}/{region}"
-
-    for datetime_, partition in partitions.items():
-        write_dict_to_s3(
-            obj=partition,
-            bucket_name=bucket_name,
-            object_key=f"{cloudtrail_prefix}/{datetime_.strftime('%Y/%m/%d')}/CloudTrail_{datetime_.isoformat()}.json",
-        )
+    with TRACER.span(region, "region", account=account_id), SpillBuffer(
+        max_memory
+    ) as buffer:
+        if pool is None and max_memory is None:
+            bodies = _serialize(_partition(*args), stats, layout)
+        else:
+            with pool or nullcontext():
+                _encode_fragments(pool, *args, buffer)
+            bodies = _flush(buffer, layout)
+
+        # Objects are serialized and uploaded one at a time, so profile them once as a whole
+        with PROFILER.phase("scoop.write"):
+            for key, part, body, summary in bodies:
+                object_key = layout.object_key(account_id, region, key, part)
+                with stats.stage("upload", profiled=False) as stage:
+                    if isinstance(body, Path):
+                        upload_file_to_s3(body, bucket_name, object_key, s3_client)
+                        body.unlink()
+                    else:
+                        write_bytes_to_s3(
+                            body=body,
+                            bucket_name=bucket_name,
+                            object_key=object_key,
+                            s3_client=s3_client,
+                        )
+                    stage.items += 1
+                    stage.bytes += summary.bytes
+                manifest.objects[object_key] = summary
+
+        if buffer.spills:
+            stats.stages["spill"] = StageStats(
+                seconds=buffer.spill_seconds,
+                items=buffer.spills,
+                bytes=buffer.spilled_bytes,
+                peak_rss_bytes=_peak_rss_bytes(),
+            )
+
+        write_dict_to_s3(manifest.to_dict(), bucket_name, manifest.key, s3_client)
+
+    _logger.debug("CloudTrail scoop stages: %s", stats.to_dict())
+
+    return stats
@@ -0,0 +1,284 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from __future__ import annotations
+
+import re
+from base64 import b64decode, b64encode
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from hashlib import blake2b
+from sys import getsizeof
+from typing import Any, Iterable, Optional
+
+from scooper.core.constants import MANIFEST_INDEXED_FIELDS
+from scooper.incident_response.partitions import PartitionLayout
+
+MANIFEST_PREFIX = "scooper/manifests/CloudTrail"
+MANIFEST_VERSION = 1
+MANIFEST_KEY = re.compile(
+    rf"^{MANIFEST_PREFIX}/(?P<account>[^/]+)/(?P<region>[^/]+)/Manifest_(?P<start>[^_/]+)_(?P<end>[^_/]+)\.json$"
+)
+# Distinct values kept as they are, before degrading to a Bloom filter
+DISTINCT_VALUES_LIMIT = 64
+BLOOM_FILTER_BITS = 8192
+BLOOM_FILTER_HASHES = 4
+
+
+def event_field(event: dict, path: str) -> Optional[Any]:
+    """Get value of dotted `path` in `event`, e.g. `userIdentity.arn`, if any."""
+    value: Any = event
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _bloom_positions(value: str, bits: int, hashes: int) -> list[int]:
+    # Double hashing of a single digest, rather than one digest per hash
+    digest = blake2b(value.encode(), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+
+class ValueSet:
+    """Values of an event field in an object, exact while few, or a Bloom filter of them.
+
+    Either may report values the object doesn't hold once degraded, but never misses
+    one it does, so objects can be skipped when their set can't contain a value.
+    """
+
+    __slots__ = ("values", "bloom", "hashes")
+
+    def __init__(self, values: Iterable[str] = ()) -> None:
+        self.values: Optional[set[str]] = set()
+        self.bloom: Optional[bytearray] = None
+        self.hashes = BLOOM_FILTER_HASHES
+        self.update(values)
+
+    def update(self, values: Iterable[str]) -> None:
+        if self.values is not None:
+            self.values.update(values)
+            if len(self.values) <= DISTINCT_VALUES_LIMIT:
+                return
+            values, self.values = self.values, None
+            self.bloom = bytearray(BLOOM_FILTER_BITS // 8)
+
+        bits = len(self.bloom) * 8
+        for value in values:
+            for position in _bloom_positions(value, bits, self.hashes):
+                self.bloom[position >> 3] |= 1 << (position & 7)
+
+    def merge(self, other: ValueSet) -> None:
+        if other.values is not None:
+            self.update(other.values)
+            return
+        if self.values is not None:
+            values, self.values = self.values, None
+            self.bloom, self.hashes = bytearray(other.bloom), other.hashes
+            self.update(values)
+            return
+        for i, byte in enumerate(other.bloom):
+            self.bloom[i] |= byte
+
+    @property
+    def memory(self) -> int:
+        """Estimated bytes held by the set or filter, e.g. to count against memory budgets."""
+        if self.values is not None:
+            return getsizeof(self.values) + sum(map(getsizeof, self.values))
+        return getsizeof(self.bloom)
+
+    def might_contain(self, value: str) -> bool:
+        if self.values is not None:
+            return value in self.values
+        return all(
+            self.bloom[position >> 3] & (1 << (position & 7))
+            for position in _bloom_positions(value, len(self.bloom) * 8, self.hashes)
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        if self.values is not None:
+            return {"values": sorted(self.values)}
+        return {"bloom": b64encode(self.bloom).decode(), "hashes": self.hashes}
+
+    @classmethod
+    def from_dict(cls, obj: dict[str, Any]) -> ValueSet:
+        value_set = cls(obj.get("values", ()))
+        if "bloom" in obj:
+            value_set.values = None
+            value_set.bloom = bytearray(b64decode(obj["bloom"]))
+            value_set.hashes = obj["hashes"]
+        return value_set
+
+
+@dataclass
+class ObjectSummary:
+    """Event count, byte size, event time range and indexed field values of a scooped object.
+
+    Event times are kept as CloudTrail formats them, which sorts like the times do.
+    """
+
+    events: int = 0
+    bytes: int = 0
+    min_event_time: Optional[str] = None
+    max_event_time: Optional[str] = None
+    fields: dict[str, ValueSet] = field(default_factory=dict)
+
+    @classmethod
+    def of_events(cls, events: list[dict]) -> ObjectSummary:
+        times = [event["eventTime"] for event in events if event.get("eventTime")]
+        summary = cls(
+            events=len(events),
+            min_event_time=min(times, default=None),
+            max_event_time=max(times, default=None),
+        )
+        for path in MANIFEST_INDEXED_FIELDS:
+            # Deduplicate first, so only distinct values are ever hashed
+            values = {event_field(event, path) for event in events}
+            values.discard(None)
+            summary.fields[path] = ValueSet(str(value) for value in values)
+        return summary
+
+    @property
+    def memory(self) -> int:
+        """Estimated bytes held by the summary, most of it its fields' value sets."""
+        return (
+            getsizeof(self)
+            + getsizeof(self.fields)
+            + sum(
+                getsizeof(path) + values.memory for path, values in self.fields.items()
+            )
+        )
+
+    def merge(self, other: ObjectSummary) -> None:
+        self.events += other.events
+        self.bytes += other.bytes
+        times = [
+            time
+            for time in (
+                self.min_event_time,
+                self.max_event_time,
+                other.min_event_time,
+                other.max_event_time,
+            )
+            if time is not None
+        ]
+        self.min_event_time = min(times, default=None)
+        self.max_event_time = max(times, default=None)
+        for path, values in other.fields.items():
+            self.fields.setdefault(path, ValueSet()).merge(values)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "events": self.events,
+            "bytes": self.bytes,
+            "minEventTime": self.min_event_time,
+            "maxEventTime": self.max_event_time,
+            "fields": {path: values.to_dict() for path, values in self.fields.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, obj: dict[str, Any]) -> ObjectSummary:
+        return cls(
+            events=obj["events"],
+            bytes=obj["bytes"],
+            min_event_time=obj["minEventTime"],
+            max_event_time=obj["maxEventTime"],
+            fields={
+                path: ValueSet.from_dict(values)
+                for path, values in obj["fields"].items()
+            },
+        )
+
+
+@dataclass
+class ScoopManifest:
+    """Manifest of the objects a CloudTrail scoop wrote, keyed by object key.
+
+    Written alongside the scoop, so lookups can skip objects whose time range or
+    indexed field values can't match without downloading them.
+    """
+
+    account_id: str
+    region: str
+    start_time: datetime
+    end_time: datetime
+    layout: PartitionLayout = field(default_factory=PartitionLayout)
+    objects: dict[str, ObjectSummary] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        return (
+            f"{MANIFEST_PREFIX}/{self.account_id}/{self.region}/"
+            f"Manifest_{self.start_time.isoformat()}_{self.end_time.isoformat()}.json"
+        )
+
+    @classmethod
+    def of_key(cls, key: str) -> Optional[ScoopManifest]:
+        """Get manifest `key` is the key of without its objects, if it's a manifest's key."""
+        match = MANIFEST_KEY.match(key)
+        if match is None:
+            return None
+        try:
+            return cls(
+                account_id=match["account"],
+                region=match["region"],
+                start_time=datetime.fromisoformat(match["start"]),
+                end_time=datetime.fromisoformat(match["end"]),
+            )
+        except ValueError:
+            return None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": MANIFEST_VERSION,
+            "account": self.account_id,
+            "region": self.region,
+            "startTime": self.start_time.isoformat(),
+            "endTime": self.end_time.isoformat(),
+            "layout": asdict(self.layout),
+            "indexedFields": list(MANIFEST_INDEXED_FIELDS),
+            "objects": {
+                key: summary.to_dict() for key, summary in sorted(self.objects.items())
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, obj: dict[str, Any]) -> ScoopManifest:
+        if obj.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported manifest version {obj.get('version')}")
+
+        return cls(
+            account_id=obj["account"],
+            region=obj["region"],
+            start_time=datetime.fromisoformat(obj["startTime"]),
+            end_time=datetime.fromisoformat(obj["endTime"]),
+            layout=PartitionLayout(**obj["layout"]),
+            objects={
+                key: ObjectSummary.from_dict(summary)
+                for key, summary in obj["objects"].items()
+            },
+        )
@@ -0,0 +1,139 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, NamedTuple, Optional
+from urllib.parse import quote
+
+from scooper.core.constants import DAY, HIVE, HOUR, LEGACY
+
+CLOUDTRAIL_PREFIX = "scooper/CloudTrail"
+# Hive's name of the partition of events without a value for the partition column
+HIVE_DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+class Partition(NamedTuple):
+    time: datetime
+    value: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class PartitionLayout:
+    """Layout of a CloudTrail scoop's S3 objects.
+
+    Events are partitioned by the `granularity` they occurred in, and by the value of
+    their `partition_by` field if given, e.g. `eventSource`. Each partition is written
+    as a single object, or as objects of at most `max_events` events.
+
+    The `legacy` scheme writes `{account}/{region}/YYYY/MM/DD/` prefixes, while the
+    `hive` scheme writes `account=/region=/year=/month=/day=[/hour=][/{column}=]` ones
+    that Athena and Spark can prune partitions by without a crawler.
+    """
+
+    scheme: str = LEGACY
+    granularity: str = HOUR
+    max_events: Optional[int] = None
+    partition_by: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if self.scheme not in (LEGACY, HIVE):
+            raise ValueError(f"Unsupported partition scheme {self.scheme}")
+        if self.granularity not in (HOUR, DAY):
+            raise ValueError(f"Unsupported partition granularity {self.granularity}")
+        if self.max_events is not None and self.max_events < 1:
+            raise ValueError("Partitions must be written at least one event at a time")
+        if self.partition_by and self.scheme != HIVE:
+            raise ValueError(f"Partitioning by a column requires the {HIVE} scheme")
+
+    def partition_of(self, event_time: datetime, event: dict) -> Partition:
+        # Round time down to nearest hour, or day
+        time = event_time.replace(minute=0, second=0, microsecond=0)
+        if self.granularity == DAY:
+            time = time.replace(hour=0)
+
+        if self.partition_by is None:
+            return Partition(time)
+        value = event.get(self.partition_by)
+        return Partition(time, None if value is None else str(value))
+
+    def partition(
+        self, events: Iterable[tuple[datetime, dict]]
+    ) -> dict[Partition, list[dict]]:
+        """Partition parsed CloudTrail events, keeping their order within each partition."""
+        partitions: dict[Partition, list[dict]] = {}
+
+        for event_time, event in events:
+            partitions.setdefault(self.partition_of(event_time, event), []).append(
+                event
+            )
+
+        return partitions
+
+    def chunks(self, partition: list[dict]) -> list[list[dict]]:
+        """Split partition into the events of each of its objects."""
+        if self.max_events is None:
+            return [partition]
+        return [
+            partition[i : i + self.max_events]
+            for i in range(0, len(partition), self.max_events)
+        ]
+
+    def object_key(
+        self,
+        account_id: str,
+        region: str,
+        partition: Partition,
+        part: Optional[int] = None,
+    ) -> str:
+        """Get key of object `part` of `partition`, numbered if partitions are split in parts."""
+        time = partition.time
+        name = f"CloudTrail_{time.isoformat()}"
+        if self.max_events is not None:
+            name += f"_{part or 0:05d}"
+
+        if self.scheme == LEGACY:
+            return f"{CLOUDTRAIL_PREFIX}/{account_id}/{region}/{time.strftime('%Y/%m/%d')}/{name}.json"
+
+        keys = [
+            f"account={account_id}",
+            f"region={region}",
+            f"year={time:%Y}",
+            f"month={time:%m}",
+            f"day={time:%d}",
+        ]
+        if self.granularity == HOUR:
+            keys.append(f"hour={time:%H}")
+        if self.partition_by:
+            value = (
+                HIVE_DEFAULT_PARTITION
+                if partition.value is None
+                else quote(partition.value, safe="")
+            )
+            # Partition keys must be lowercase for Athena to discover them
+            keys.append(f"{self.partition_by.lower()}={value}")
+
+        return f"{CLOUDTRAIL_PREFIX}/{'/'.join(keys)}/{name}.json"
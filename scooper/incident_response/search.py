@@ -0,0 +1,373 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from contextvars import copy_context
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import islice
+from json import dumps, loads
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from boto3 import client
+from botocore.client import BaseClient
+from botocore.config import Config
+
+from scooper.core.utils.logger import get_logger
+from scooper.core.utils.metrics import instrument
+from scooper.core.utils.paginate import paginate
+from scooper.core.utils.tracing import TRACER
+from scooper.incident_response.cloudtrail import TRAIL_EVENT_TIME_FORMAT, _process_pool
+from scooper.incident_response.manifest import (
+    MANIFEST_PREFIX,
+    ObjectSummary,
+    ScoopManifest,
+    event_field,
+)
+
+SEARCH_WORKERS = 16
+# Objects fetched and searched ahead of the one being output
+SEARCH_WINDOW = 2 * SEARCH_WORKERS
+# Scooped objects are JSON arrays indented by 2, so only events open and close at that indentation
+EVENT_START = b"\n  {\n"
+EVENT_END = b"\n  }"
+
+_logger = get_logger()
+
+
+class ScoopStore(ABC):
+    @abstractmethod
+    def list(self, prefix: str) -> list[str]:
+        """List keys of objects under `prefix`."""
+        pass
+
+    @abstractmethod
+    def read(self, key: str) -> bytes:
+        pass
+
+
+class S3ScoopStore(ScoopStore):
+    def __init__(
+        self, bucket_name: str, s3_client: Optional[BaseClient] = None
+    ) -> None:
+        self.bucket_name = bucket_name
+        self._client = s3_client or instrument(
+            client("s3", config=Config(max_pool_connections=SEARCH_WORKERS))
+        )
+
+    def list(self, prefix: str) -> list[str]:
+        return [
+            obj["Key"]
+            for obj in paginate(
+                self._client,
+                "list_objects_v2",
+                "Contents",
+                Bucket=self.bucket_name,
+                Prefix=prefix,
+            )
+        ]
+
+    def read(self, key: str) -> bytes:
+        with TRACER.span(key, "download", bucket=self.bucket_name):
+            return self._client.get_object(Bucket=self.bucket_name, Key=key)[
+                "Body"
+            ].read()
+
+
+class LocalScoopStore(ScoopStore):
+    """Local copy of a scoop bucket, e.g. synced with `aws s3 sync`, keyed by relative path."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def list(self, prefix: str) -> list[str]:
+        return sorted(
+            path.relative_to(self.root).as_posix()
+            for path in self.root.glob(f"{prefix}**/*")
+            if path.is_file()
+        )
+
+    def read(self, key: str) -> bytes:
+        return (self.root / key).read_bytes()
+
+
+def _utc_event_time(time: datetime) -> str:
+    if time.tzinfo is None:
+        time = time.replace(tzinfo=timezone.utc)
+    return time.astimezone(timezone.utc).strftime(TRAIL_EVENT_TIME_FORMAT)
+
+
+def _needles(value: str) -> tuple[bytes, ...]:
+    # Values are encoded as JSON strings, or as literals if they are some, e.g. `true`
+    needles = (dumps(value).encode(),)
+    try:
+        literal = loads(value)
+    except ValueError:
+        return needles
+    return needles if isinstance(literal, str) else (*needles, value.encode())
+
+
+def _field_value(value: Any) -> Optional[str]:
+    # Strings match as they are, and other values as JSON, e.g. `readOnly=true`
+    if value is None or isinstance(value, str):
+        return value
+    return dumps(value)
+
+
+@dataclass(frozen=True)
+class EventQuery:
+    """Query of scooped CloudTrail events, on field values and event time.
+
+    Events must match any value given of each field, for every field given, and
+    have occurred between `start_time` and `end_time`. Fields are dotted paths, e.g.
+    `userIdentity.arn`. Values of `recipientAccountId` and `awsRegion` also select the
+    scoops searched.
+    """
+
+    field_values: tuple[tuple[str, str], ...] = ()
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    # Values of each field, how they may be encoded, and time range as CloudTrail formats event times
+    _values: tuple[tuple[str, frozenset[str]], ...] = field(
+        init=False, repr=False, compare=False
+    )
+    _needles: tuple[tuple[bytes, ...], ...] = field(
+        init=False, repr=False, compare=False
+    )
+    _start: Optional[str] = field(init=False, repr=False, compare=False)
+    _end: Optional[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        values: dict[str, set[str]] = {}
+        for path, value in self.field_values:
+            values.setdefault(path, set()).add(value)
+        object.__setattr__(
+            self,
+            "_values",
+            tuple(
+                (path, frozenset(path_values)) for path, path_values in values.items()
+            ),
+        )
+        object.__setattr__(
+            self,
+            "_needles",
+            tuple(
+                tuple(needle for value in path_values for needle in _needles(value))
+                for path_values in values.values()
+            ),
+        )
+        object.__setattr__(
+            self, "_start", self.start_time and _utc_event_time(self.start_time)
+        )
+        object.__setattr__(
+            self, "_end", self.end_time and _utc_event_time(self.end_time)
+        )
+
+    def _field_values(self, path: str) -> Optional[frozenset[str]]:
+        return next((values for key, values in self._values if key == path), None)
+
+    def may_match_scoop(self, manifest: ScoopManifest) -> bool:
+        """Whether scoop of `manifest` may hold matching events, by its account, region and time range."""
+        accounts = self._field_values("recipientAccountId")
+        regions = self._field_values("awsRegion")
+        return (
+            (accounts is None or manifest.account_id in accounts)
+            and (regions is None or manifest.region in regions)
+            and (self.start_time is None or manifest.end_time > self.start_time)
+            and (self.end_time is None or manifest.start_time < self.end_time)
+        )
+
+    def may_match(self, summary: ObjectSummary) -> bool:
+        """Whether object of `summary` may hold matching events, by its time range and indexed values."""
+        if not summary.events:
+            return False
+        if (
+            self._start
+            and summary.max_event_time
+            and summary.max_event_time < self._start
+        ):
+            return False
+        if self._end and summary.min_event_time and summary.min_event_time >= self._end:
+            return False
+        return all(
+            path not in summary.fields
+            or any(summary.fields[path].might_contain(value) for value in values)
+            for path, values in self._values
+        )
+
+    def may_match_text(self, text: bytes) -> bool:
+        """Whether JSON `text` of events may hold matching ones, scanning it for each field's values."""
+        return all(
+            any(needle in text for needle in needles) for needles in self._needles
+        )
+
+    def matches(self, event: dict) -> bool:
+        event_time = event.get("eventTime")
+        if self._start and (event_time is None or event_time < self._start):
+            return False
+        if self._end and (event_time is None or event_time >= self._end):
+            return False
+        return all(
+            _field_value(event_field(event, path)) in values
+            for path, values in self._values
+        )
+
+
+@dataclass
+class SearchStats:
+    scoops: int = 0
+    objects: int = 0
+    searched: int = 0
+    bytes: int = 0
+    events: int = 0
+
+
+def _event_texts(body: bytes, needles: tuple[bytes, ...]) -> Optional[list[bytes]]:
+    """Get JSON text of each event of encoded object `body` holding any of `needles`, in order.
+
+    Returns `None` if `body` isn't laid out like a scooped object.
+    """
+    spans = set()
+
+    for needle in needles:
+        position = body.find(needle)
+        while position != -1:
+            start = body.rfind(EVENT_START, 0, position)
+            end = body.find(EVENT_END, position)
+            if start == -1 or end == -1:
+                return None
+            end += len(EVENT_END)
+            spans.add((start, end))
+            position = body.find(needle, end)
+
+    return [body[start:end] for start, end in sorted(spans)]
+
+
+def _search_object(body: bytes, query: EventQuery) -> tuple[int, bytes]:
+    """Get count and NDJSON lines of the events of encoded object `body` matching `query`.
+
+    Only the events whose text holds a value of each field are decoded, so objects
+    with few matches are scanned rather than parsed.
+    """
+    if not query.may_match_text(body):
+        return 0, b""
+
+    texts = _event_texts(body, query._needles[0]) if query._needles else None
+    if texts is None:
+        events = loads(body)
+    else:
+        events = [loads(text) for text in texts if query.may_match_text(text)]
+    matches = [event for event in events if query.matches(event)]
+    return len(matches), "".join(f"{dumps(event)}\n" for event in matches).encode()
+
+
+def find_objects(
+    store: ScoopStore, query: EventQuery, stats: Optional[SearchStats] = None
+) -> list[str]:
+    """Find keys of scooped objects that may hold events matching `query`, earliest events first.
+
+    Scoops outside the query's accounts, regions or time range are skipped by the
+    key of their manifest, and objects by their manifest summary. Objects of several
+    scoops are searched once, unless every scoop's summary rules them out.
+    """
+    stats = stats or SearchStats()
+    manifest_keys = [
+        key
+        for key in store.list(f"{MANIFEST_PREFIX}/")
+        if (manifest := ScoopManifest.of_key(key)) and query.may_match_scoop(manifest)
+    ]
+    summaries: dict[str, ObjectSummary] = {}
+
+    with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+        for body in executor.map(store.read, manifest_keys):
+            manifest = ScoopManifest.from_dict(loads(body))
+            stats.scoops += 1
+            for key, summary in manifest.objects.items():
+                if key in summaries:
+                    summaries[key].merge(summary)
+                else:
+                    summaries[key] = summary
+
+    stats.objects += len(summaries)
+
+    return [
+        key
+        for key, summary in sorted(
+            summaries.items(),
+            key=lambda item: (item[1].min_event_time or "", item[0]),
+        )
+        if query.may_match(summary)
+    ]
+
+
+def search_scoops(
+    store: ScoopStore,
+    query: EventQuery,
+    processes: int = 0,
+    stats: Optional[SearchStats] = None,
+) -> Iterator[bytes]:
+    """Search scooped CloudTrail events in `store` matching `query`, yielding them as NDJSON lines.
+
+    Objects are fetched in parallel and searched by worker processes (`0` for one
+    per CPU), but output in the order `find_objects` finds them. Only a window of
+    objects is fetched ahead of the one being output, so memory stays bounded however
+    many are searched.
+    """
+    stats = stats or SearchStats()
+    keys = iter(find_objects(store, query, stats))
+    # Workers are forked as the pool is created, before any thread starts
+    pool: Optional[ProcessPoolExecutor] = (
+        _process_pool(processes) if processes != 1 else None
+    )
+
+    def search(key: str) -> tuple[int, tuple[int, bytes]]:
+        body = store.read(key)
+        if pool is None:
+            return len(body), _search_object(body, query)
+        return len(body), pool.submit(_search_object, body, query).result()
+
+    with pool or nullcontext(), ThreadPoolExecutor(
+        max_workers=SEARCH_WORKERS
+    ) as executor:
+        pending = deque(
+            executor.submit(copy_context().run, search, key)
+            for key in islice(keys, SEARCH_WINDOW)
+        )
+        while pending:
+            size, (count, lines) = pending.popleft().result()
+            if (key := next(keys, None)) is not None:
+                pending.append(executor.submit(copy_context().run, search, key))
+            stats.searched += 1
+            stats.bytes += size
+            stats.events += count
+            if lines:
+                yield lines
+
+    _logger.debug("CloudTrail search: %s", stats)
@@ -0,0 +1,162 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from __future__ import annotations
+
+import gzip
+from json import dumps, loads
+from pathlib import Path
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from time import perf_counter
+from typing import IO, Iterator, Optional
+
+from scooper.core.utils.logger import get_logger
+from scooper.incident_response.manifest import ObjectSummary
+from scooper.incident_response.partitions import Partition
+
+# Spilled segments are read back once, so favour speed over size
+SPILL_COMPRESSION_LEVEL = 1
+SPILL_SEGMENT_SUFFIX = ".ndjson.gz"
+
+_logger = get_logger()
+
+
+class SpillBuffer:
+    """Encoded events of a scoop's open partitions, spilled to disk past a memory budget.
+
+    Partitions hold the fragments of JSON array their events were encoded as, with
+    each fragment's manifest summary. Once fragments and the estimated size of their
+    summaries held in memory exceed `max_memory` bytes, the largest partitions are
+    spilled until they're back under half of it. Each partition spills to its own segment file of gzip-compressed NDJSON
+    records of fragments, appending a gzip member per spill, and is merged back in
+    order once flushed.
+    """
+
+    def __init__(self, max_memory: Optional[int] = None) -> None:
+        self.max_memory = max_memory
+        self.memory = 0
+        self.spills = 0
+        self.spilled_bytes = 0
+        self.spill_seconds = 0.0
+        self._fragments: dict[Partition, list[tuple[ObjectSummary, bytes]]] = {}
+        self._sizes: dict[Partition, int] = {}
+        self._segments: dict[Partition, Path] = {}
+        self._directory: Optional[TemporaryDirectory] = None
+
+    def __enter__(self) -> SpillBuffer:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    @property
+    def directory(self) -> Path:
+        """Temporary directory of spilled segments and objects, created on first use."""
+        if self._directory is None:
+            self._directory = TemporaryDirectory(prefix="scooper-spill-")
+        return Path(self._directory.name)
+
+    def add(
+        self, partition: Partition, fragments: list[tuple[ObjectSummary, bytes]]
+    ) -> None:
+        # Summaries can hold as much as small fragments, e.g. a Bloom filter per field
+        size = sum(len(fragment) + summary.memory for summary, fragment in fragments)
+        self._fragments.setdefault(partition, []).extend(fragments)
+        self._sizes[partition] = self._sizes.get(partition, 0) + size
+        self.memory += size
+
+        if self.max_memory is not None and self.memory > self.max_memory:
+            self._spill()
+
+    def _spill(self) -> None:
+        start_time = perf_counter()
+
+        # Spill the largest partitions first, leaving headroom so every add doesn't spill
+        for partition in sorted(self._sizes, key=self._sizes.get, reverse=True):
+            if self.memory <= self.max_memory // 2:
+                break
+            self._spill_partition(partition)
+
+        self.spill_seconds += perf_counter() - start_time
+        _logger.debug(
+            "Spilled %d bytes of scooped events to %s",
+            self.spilled_bytes,
+            self.directory,
+        )
+
+    def _spill_partition(self, partition: Partition) -> None:
+        fragments = self._fragments[partition]
+        if not fragments:
+            return
+
+        path = self._segments.setdefault(
+            partition,
+            self.directory / f"{self.spills:06d}{SPILL_SEGMENT_SUFFIX}",
+        )
+        with gzip.open(path, "ab", compresslevel=SPILL_COMPRESSION_LEVEL) as segment:
+            for summary, fragment in fragments:
+                record = {"summary": summary.to_dict(), "fragment": fragment.decode()}
+                segment.write(f"{dumps(record)}\n".encode())
+                self.spilled_bytes += len(fragment)
+
+        self.memory -= self._sizes[partition]
+        self.spills += 1
+        self._fragments[partition] = []
+        self._sizes[partition] = 0
+
+    def spilled(self, partition: Partition) -> bool:
+        return partition in self._segments
+
+    def _flush(self, partition: Partition) -> Iterator[tuple[ObjectSummary, bytes]]:
+        if (path := self._segments.pop(partition, None)) is not None:
+            with gzip.open(path, "rb") as segment:
+                for line in segment:
+                    record = loads(line)
+                    summary = ObjectSummary.from_dict(record["summary"])
+                    yield summary, record["fragment"].encode()
+            path.unlink()
+
+        fragments = self._fragments.pop(partition)
+        self.memory -= self._sizes.pop(partition)
+        yield from fragments
+
+    def partitions(
+        self,
+    ) -> Iterator[tuple[Partition, bool, Iterator[tuple[ObjectSummary, bytes]]]]:
+        """Flush partitions in the order they were opened, with whether they spilled.
+
+        Each partition's fragments are read back from its segment, then from memory, in
+        the order they were added, and must be consumed before the next partition's.
+        """
+        for partition in list(self._fragments):
+            yield partition, self.spilled(partition), self._flush(partition)
+
+    def open_object(self) -> IO[bytes]:
+        """Open a temporary file in the spill directory, e.g. to write an object too large to hold in memory."""
+        return NamedTemporaryFile(dir=self.directory, suffix=".json", delete=False)
+
+    def close(self) -> None:
+        if self._directory is not None:
+            self._directory.cleanup()
+            self._directory = None
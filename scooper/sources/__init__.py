@@ -25,6 +25,9 @@ noted in the files associated with those components.
 from abc import ABC, abstractmethod
 from typing import Any
 
+from scooper.core.utils.metrics import API_METRICS
+from scooper.core.utils.tracing import TRACER
+
 from .report import LoggingReport
 
 
@@ -60,5 +63,8 @@ class LogSource(ILogSource):
     @property
     def report(self) -> LoggingReport:
         if self._report is None:
-            self._report = self.get_report()
+            source = self.__class__.__name__
+            with API_METRICS.source(source), TRACER.span(source, "source"):
+                self._report = self.get_report()
+            self._report.timings = API_METRICS.source_summary(source)
         return self._report
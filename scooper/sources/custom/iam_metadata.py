@@ -22,47 +22,150 @@ Notwithstanding the foregoing, third party components included herein are subjec
 noted in the files associated with those components.
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import copy_context
 from string import Template
+from threading import Lock
+from typing import Any, Optional
 
 from boto3 import Session
-from botocore.exceptions import ClientError
+from botocore.client import BaseClient
+from botocore.exceptions import BotoCoreError, ClientError
 from cbs_common.aws.boto_types import DataRequest
 from cbs_common.aws.iam_metadata import IAMMetadata as CBSCommonIAMMetadata
 from cbs_common.aws.utilities import BotoHelper, assume_role
 
 from scooper.core.constants import ORG
+from scooper.core.utils.io import ShardedReportWriter
 from scooper.core.utils.logger import get_logger
+from scooper.core.utils.metrics import instrument
+from scooper.core.utils.profiling import profiled
+from scooper.core.utils.tracing import TRACER
+
+NUM_WORKERS = 8
 
 _logger = get_logger()
 
 
+def _error_details(error: Exception) -> dict[str, str]:
+    """Get boto-style error details for a failed account."""
+    if isinstance(error, ClientError):
+        return error.response["Error"]
+    return {"Code": error.__class__.__name__, "Message": str(error)}
+
+
 class IAMMetadata(CBSCommonIAMMetadata):
     def __init__(
-        self, level: str, organizational_account_access_role_template: Template
+        self,
+        level: str,
+        organizational_account_access_role_template: Template,
+        account_ids: Optional[list[str]] = None,
+        max_workers: int = NUM_WORKERS,
+        writer: Optional[ShardedReportWriter] = None,
+        clients: Optional[dict[str, BaseClient]] = None,
     ) -> None:
-        self._clients = {}
-        session = Session()
-        sts_client = session.client("sts")
-        current_account_id = sts_client.get_caller_identity()["Account"]
-
-        if level == ORG:
-            org_client = BotoHelper("organizations")
-            data_request = DataRequest(method="list_accounts", array_key="Accounts")
-            accounts = org_client(data_request)
-            for account in accounts:
-                if account["Id"] != current_account_id:
-                    account_id = account["Id"]
-                    role_arn = organizational_account_access_role_template.substitute(
-                        account=account_id
+        self._level = level
+        self._role_template = organizational_account_access_role_template
+        self._max_workers = max_workers
+        self._clients: dict[str, BaseClient] = dict(clients or {})
+        self._clients_lock = Lock()
+        self._session = Session()
+        self._sts_client: Optional[BaseClient] = None
+        self._current_account_id: Optional[str] = None
+        self._account_ids = account_ids
+        self._writer = writer
+
+    @property
+    def current_account_id(self) -> str:
+        """ID of the account Scooper runs in, only looked up once needed."""
+        with self._clients_lock:
+            if self._current_account_id is None:
+                self._sts_client = instrument(self._session.client("sts"))
+                self._current_account_id = self._sts_client.get_caller_identity()[
+                    "Account"
+                ]
+            return self._current_account_id
+
+    @property
+    def account_ids(self) -> list[str]:
+        """IDs of accounts to collect IAM metadata from, listing the organization's if not given."""
+        if self._account_ids is None:
+            account_ids = [self.current_account_id]
+            if self._level == ORG:
+                org_client = BotoHelper("organizations")
+                data_request = DataRequest(method="list_accounts", array_key="Accounts")
+                account_ids.extend(
+                    account["Id"]
+                    for account in org_client(data_request)
+                    if account["Id"] != self.current_account_id
+                )
+            self._account_ids = account_ids
+        return self._account_ids
+
+    def get_client(self, account_id: str) -> BaseClient:
+        """Get IAM client for given account, assuming into it on first use."""
+        with self._clients_lock:
+            if account_id in self._clients:
+                return self._clients[account_id]
+
+        if account_id == self.current_account_id:
+            with self._clients_lock:
+                # Sessions aren't thread-safe, so guard client creation from it
+                iam_client = instrument(self._session.client("iam"), account_id)
+        else:
+            role_arn = self._role_template.substitute(account=account_id)
+            iam_client = instrument(
+                assume_role(role_arn=role_arn, sts_client=self._sts_client).client(
+                    "iam"
+                ),
+                account_id,
+            )
+
+        with self._clients_lock:
+            return self._clients.setdefault(account_id, iam_client)
+
+    def _get_account_report(self, account_id: str) -> dict[str, Any]:
+        # Run the parent's collection against a collector holding only this account's client
+        with TRACER.span(account_id, "account", source=self.__class__.__name__):
+            collector = IAMMetadata(
+                self._level,
+                self._role_template,
+                account_ids=[account_id],
+                max_workers=1,
+                clients={account_id: self.get_client(account_id)},
+            )
+            return CBSCommonIAMMetadata.get_report(collector)
+
+    @profiled
+    def get_report(self) -> dict[str, Any]:
+        report = {}
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            futures = {
+                executor.submit(
+                    copy_context().run, self._get_account_report, account_id
+                ): account_id
+                for account_id in self.account_ids
+            }
+            for future in as_completed(futures):
+                account_id = futures[future]
+                try:
+                    account_report = future.result()
+                except (BotoCoreError, ClientError) as e:
+                    _logger.error(
+                        "Failed to get IAM metadata from account '%s': %s",
+                        account_id,
+                        e,
                     )
-                    try:
-                        self._clients[account_id] = assume_role(
-                            role_arn=role_arn, sts_client=sts_client
-                        ).client("iam")
-                    except ClientError as e:
-                        if e.response["Error"]["Code"] == "AccessDenied":
-                            _logger.exception("Failed to assume '%s'", role_arn)
-                        else:
-                            raise
-
-        self._clients[current_account_id] = session.client("iam")
+                    account_report = {account_id: {"Error": _error_details(e)}}
+
+                if self._writer is not None:
+                    # Write account's shard as soon as it's done rather than holding onto it
+                    self._writer.write(account_id, account_report)
+                else:
+                    report.update(account_report)
+
+        if self._writer is not None:
+            report["shards"] = self._writer.close()
+
+        return report
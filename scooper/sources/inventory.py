@@ -0,0 +1,420 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from json import load, loads
+from pathlib import Path
+from re import IGNORECASE, fullmatch
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+from scooper.core.constants import (
+    INVENTORY_CATEGORICAL_COLUMNS,
+    INVENTORY_NUMERIC_COLUMNS,
+)
+from scooper.core.utils.logger import get_logger
+
+INVENTORY_VERSION = 1
+# Absent categorical or numeric value, e.g. of a Log Group without KMS key or retention
+NULL = -1
+NULL_VALUES = {"never", "none", "null"}
+# Sizes are binary, e.g. 1TB is 1024^4 bytes
+SIZE_UNITS = {
+    unit: 1024**power for power, unit in enumerate(("b", "kb", "mb", "gb", "tb", "pb"))
+}
+
+_logger = get_logger()
+
+
+def parse_size(value: str) -> int:
+    """Parse size `value` in bytes, or in binary units, e.g. `512MB`."""
+    if (
+        size := fullmatch(r"(\d+(?:\.\d+)?)\s*([kmgtp]?b)?", value, IGNORECASE)
+    ) is None:
+        raise ValueError(f"Invalid size: '{value}'")
+    number, unit = size.groups()
+    return int(float(number) * SIZE_UNITS[(unit or "b").lower()])
+
+
+@dataclass(frozen=True)
+class Predicate:
+    """Filter of the inventory, e.g. `storedBytes>1TB` or `kmsKeyId=none`.
+
+    Categorical columns are compared for (in)equality, numeric ones in any way, and
+    `never`/`none` stands for an absent value. Rows with an absent value never satisfy
+    an ordering comparison.
+    """
+
+    column: str
+    operator: str
+    value: Any
+
+    @classmethod
+    def parse(cls, expression: str) -> Predicate:
+        if (
+            match := fullmatch(r"\s*(\w+)\s*(>=|<=|!=|=|>|<)\s*(.+?)\s*", expression)
+        ) is None:
+            raise ValueError(
+                f"Invalid predicate, expected COLUMN OPERATOR VALUE: '{expression}'"
+            )
+        column, operator, value = match.groups()
+
+        if column in INVENTORY_CATEGORICAL_COLUMNS:
+            if operator not in ("=", "!="):
+                raise ValueError(f"{column} can only be compared with = or !=")
+            if value.lower() in NULL_VALUES:
+                value = None
+        elif column in INVENTORY_NUMERIC_COLUMNS:
+            value = cls._parse_number(column, operator, value)
+        else:
+            raise ValueError(
+                f"Unknown column {column}, expected one of {INVENTORY_CATEGORICAL_COLUMNS + INVENTORY_NUMERIC_COLUMNS}"
+            )
+
+        return cls(column, operator, value)
+
+    @staticmethod
+    def _parse_number(column: str, operator: str, value: str) -> int:
+        if value.lower() in NULL_VALUES:
+            if operator not in ("=", "!="):
+                raise ValueError(f"Absent {column} can only be compared with = or !=")
+            return NULL
+        if column == "storedBytes":
+            return parse_size(value)
+        if column == "creationTime" and not value.isdigit():
+            # Dates are compared to creation times in milliseconds since the epoch
+            created = datetime.fromisoformat(value)
+            if created.tzinfo is None:
+                created = created.replace(tzinfo=timezone.utc)
+            return int(created.timestamp() * 1000)
+        return int(value)
+
+
+class _InventoryBuilder:
+    """Accumulator of inventory columns, one Log Group at a time."""
+
+    def __init__(self) -> None:
+        self._categories: dict[str, dict[str, int]] = {
+            column: {} for column in INVENTORY_CATEGORICAL_COLUMNS
+        }
+        self._codes = {column: array("i") for column in INVENTORY_CATEGORICAL_COLUMNS}
+        self._numbers = {column: array("q") for column in INVENTORY_NUMERIC_COLUMNS}
+        self._names = bytearray()
+        self._name_offsets = array("q", [0])
+
+    def _code(self, column: str, value: Optional[str]) -> int:
+        if value is None:
+            return NULL
+        categories = self._categories[column]
+        return categories.setdefault(value, len(categories))
+
+    def add(self, account_id: Optional[str], log_group: dict[str, Any]) -> None:
+        # arn:aws:logs:{region}:{account_id}:log-group:{name}:*
+        arn = log_group.get("arn", "").split(":", 5)
+        region = arn[3] if len(arn) > 4 else None
+        account_id = account_id or (arn[4] if len(arn) > 4 else None)
+
+        self._codes["account"].append(self._code("account", account_id))
+        self._codes["region"].append(self._code("region", region))
+        self._codes["kmsKeyId"].append(
+            self._code("kmsKeyId", log_group.get("kmsKeyId"))
+        )
+        self._numbers["storedBytes"].append(log_group.get("storedBytes", 0))
+        self._numbers["retentionInDays"].append(log_group.get("retentionInDays", NULL))
+        self._numbers["creationTime"].append(log_group.get("creationTime", NULL))
+        self._names += log_group["logGroupName"].encode()
+        self._name_offsets.append(len(self._names))
+
+    def build(self) -> LogGroupInventory:
+        return LogGroupInventory(
+            codes={
+                column: np.frombuffer(codes, dtype=np.int32)
+                for column, codes in self._codes.items()
+            },
+            categories={
+                column: np.array(list(categories), dtype=str)
+                for column, categories in self._categories.items()
+            },
+            numbers={
+                column: np.frombuffer(numbers, dtype=np.int64)
+                for column, numbers in self._numbers.items()
+            },
+            names=np.frombuffer(bytes(self._names), dtype=np.uint8),
+            name_offsets=np.frombuffer(self._name_offsets, dtype=np.int64),
+        )
+
+
+class LogGroupInventory:
+    """Columnar inventory of Log Groups, queried with vectorized filters and aggregates.
+
+    Account, region and KMS key columns hold codes into their arrays of distinct
+    values, numeric columns hold 64-bit integers, and names are a single UTF-8 buffer
+    sliced by offsets, so millions of Log Groups take a few arrays rather than as
+    many dicts.
+    """
+
+    def __init__(
+        self,
+        codes: dict[str, np.ndarray],
+        categories: dict[str, np.ndarray],
+        numbers: dict[str, np.ndarray],
+        names: np.ndarray,
+        name_offsets: np.ndarray,
+    ) -> None:
+        self.codes = codes
+        self.categories = categories
+        self.numbers = numbers
+        self._names = names
+        self._name_offsets = name_offsets
+
+    def __len__(self) -> int:
+        return len(self._name_offsets) - 1
+
+    @classmethod
+    def from_log_groups(
+        cls, log_groups: Iterable[tuple[Optional[str], dict[str, Any]]]
+    ) -> LogGroupInventory:
+        """Build inventory of `(account_id, log_group)` pairs.
+
+        Log Groups without an account ID are attributed to the account of their ARN.
+        """
+        builder = _InventoryBuilder()
+        for account_id, log_group in log_groups:
+            builder.add(account_id, log_group)
+        return builder.build()
+
+    @classmethod
+    def from_report(cls, path: Path) -> LogGroupInventory:
+        """Build inventory of CloudWatch report at `path`, in whichever layout it was written."""
+        return cls.from_log_groups(_report_log_groups(path))
+
+    @classmethod
+    def load(cls, path: Path) -> LogGroupInventory:
+        with np.load(path) as data:
+            if int(data["version"]) != INVENTORY_VERSION:
+                raise ValueError(f"Unsupported inventory version {data['version']}")
+            return cls(
+                codes={
+                    column: data[f"{column}.codes"]
+                    for column in INVENTORY_CATEGORICAL_COLUMNS
+                },
+                categories={
+                    column: data[f"{column}.categories"]
+                    for column in INVENTORY_CATEGORICAL_COLUMNS
+                },
+                numbers={column: data[column] for column in INVENTORY_NUMERIC_COLUMNS},
+                names=data["name.data"],
+                name_offsets=data["name.offsets"],
+            )
+
+    def save(self, path: Path) -> Path:
+        if not path.parent.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+        arrays = {"version": np.array(INVENTORY_VERSION)}
+        for column in INVENTORY_CATEGORICAL_COLUMNS:
+            arrays[f"{column}.codes"] = self.codes[column]
+            arrays[f"{column}.categories"] = self.categories[column]
+        arrays.update(self.numbers)
+        arrays["name.data"] = self._names
+        arrays["name.offsets"] = self._name_offsets
+
+        with path.open("wb") as f:
+            np.savez(f, **arrays)
+        _logger.info("Inventory of %d Log Groups written to %s", len(self), path)
+
+        return path
+
+    def name(self, i: int) -> str:
+        start, end = self._name_offsets[i], self._name_offsets[i + 1]
+        return self._names[start:end].tobytes().decode()
+
+    def row(self, i: int) -> dict[str, Any]:
+        row: dict[str, Any] = {}
+        for column in ("account", "region"):
+            row[column] = self._category(column, self.codes[column][i])
+        row["name"] = self.name(i)
+        for column in INVENTORY_NUMERIC_COLUMNS:
+            value = int(self.numbers[column][i])
+            row[column] = None if value == NULL else value
+        row["kmsKeyId"] = self._category("kmsKeyId", self.codes["kmsKeyId"][i])
+        return row
+
+    def _category(self, column: str, code: int) -> Optional[str]:
+        return None if code == NULL else str(self.categories[column][code])
+
+    def _predicate_mask(self, predicate: Predicate) -> np.ndarray:
+        if predicate.column in INVENTORY_CATEGORICAL_COLUMNS:
+            if predicate.value is None:
+                code = NULL
+            else:
+                matches = np.flatnonzero(
+                    self.categories[predicate.column] == predicate.value
+                )
+                # A value no Log Group has can't be equal to any code
+                code = matches[0] if len(matches) else NULL - 1
+            equal = self.codes[predicate.column] == code
+            return equal if predicate.operator == "=" else ~equal
+
+        values = self.numbers[predicate.column]
+        if predicate.operator == "=":
+            return values == predicate.value
+        elif predicate.operator == "!=":
+            return values != predicate.value
+
+        present = values != NULL
+        if predicate.operator == ">":
+            return present & (values > predicate.value)
+        elif predicate.operator == ">=":
+            return present & (values >= predicate.value)
+        elif predicate.operator == "<":
+            return present & (values < predicate.value)
+        return present & (values <= predicate.value)
+
+    def mask(self, predicates: Iterable[Predicate] = ()) -> np.ndarray:
+        """Get mask of Log Groups satisfying every predicate."""
+        mask = np.ones(len(self), dtype=bool)
+        for predicate in predicates:
+            mask &= self._predicate_mask(predicate)
+        return mask
+
+    def group_by(
+        self,
+        column: str,
+        mask: Optional[np.ndarray] = None,
+        top: Optional[int] = None,
+    ) -> list[dict[str, Any]]:
+        """Count and total size of Log Groups per value of `column`, most numerous first."""
+        if column in INVENTORY_CATEGORICAL_COLUMNS:
+            keys = self.codes[column]
+        elif column in INVENTORY_NUMERIC_COLUMNS:
+            keys = self.numbers[column]
+        else:
+            raise ValueError(f"Can't group by {column}")
+        stored_bytes = self.numbers["storedBytes"]
+        if mask is not None:
+            keys, stored_bytes = keys[mask], stored_bytes[mask]
+        if not len(keys):
+            return []
+
+        values, inverse, counts = np.unique(
+            keys, return_inverse=True, return_counts=True
+        )
+        # Sum sizes of each group as exact integers, by reducing over keys sorted in groups
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums = np.add.reduceat(stored_bytes[np.argsort(inverse, kind="stable")], starts)
+        order = np.lexsort((-sums, -counts))[:top]
+
+        groups = []
+        for i in order:
+            value = int(values[i])
+            if column in INVENTORY_CATEGORICAL_COLUMNS:
+                key = self._category(column, value)
+            else:
+                key = None if value == NULL else value
+            groups.append(
+                {column: key, "count": int(counts[i]), "storedBytes": int(sums[i])}
+            )
+
+        return groups
+
+    def top(
+        self,
+        n: Optional[int] = None,
+        by: str = "storedBytes",
+        mask: Optional[np.ndarray] = None,
+    ) -> list[dict[str, Any]]:
+        """Rows of the `n` Log Groups with the largest `by`, or all of them in that order."""
+        indices = np.flatnonzero(mask) if mask is not None else np.arange(len(self))
+        values = self.numbers[by][indices]
+
+        if n is not None and n < len(indices):
+            # Select the largest n in linear time, and only sort those
+            largest = np.argpartition(values, len(values) - n)[len(values) - n :]
+            indices, values = indices[largest], values[largest]
+        indices = indices[np.argsort(-values, kind="stable")]
+
+        return [self.row(i) for i in indices]
+
+
+def _report_log_groups(path: Path) -> Iterable[tuple[Optional[str], dict[str, Any]]]:
+    with path.open() as f:
+        details = load(f)["details"]
+    # Listings and shards are referred to relative to the report's directory
+    root = path.parent
+
+    if "listing" in details:
+        with (root / details["listing"]).open() as f:
+            for line in f:
+                log_group = loads(line)
+                yield log_group.pop("accountId", None), log_group
+    elif "shards" in details:
+        with (root / details["shards"]).open() as f:
+            shards = load(f)["shards"]
+        for account_id, shard in shards.items():
+            with (root / shard["path"]).open() as f:
+                log_groups = load(f)
+            if isinstance(log_groups, dict):
+                raise ValueError(
+                    f"{path} only has summaries of Log Groups, run with --cloudwatch-listing to list them"
+                )
+            for log_group in log_groups:
+                yield account_id, log_group
+    elif isinstance(details.get("log_groups"), dict):
+        for account_id, log_groups in details["log_groups"].items():
+            for log_group in log_groups:
+                yield account_id, log_group
+    elif "log_groups" in details:
+        for log_group in details["log_groups"]:
+            yield None, log_group
+    else:
+        raise ValueError(
+            f"{path} only has summaries of Log Groups, run with --cloudwatch-listing to list them"
+        )
+
+
+def load_inventory(
+    report_path: Path, inventory_path: Optional[Path] = None
+) -> LogGroupInventory:
+    """Load inventory of CloudWatch report at `report_path`, building it if the report is newer."""
+    inventory_path = inventory_path or report_path.with_name(
+        f"{report_path.stem}_inventory.npz"
+    )
+
+    if (
+        inventory_path.exists()
+        and inventory_path.stat().st_mtime >= report_path.stat().st_mtime
+    ):
+        return LogGroupInventory.load(inventory_path)
+
+    _logger.info("Building Log Group inventory of %s...", report_path)
+    inventory = LogGroupInventory.from_report(report_path)
+    inventory.save(inventory_path)
+
+    return inventory
@@ -26,8 +26,11 @@ from boto3 import client
 
 from scooper.core.constants import ACCOUNT, ORG, SCOOPER
 from scooper.core.utils.logger import get_logger
+from scooper.core.utils.metrics import instrument
 from scooper.core.utils.paginate import paginate
+from scooper.core.utils.profiling import profiled
 from scooper.sources import LogSource
+from scooper.sources.records import Trail
 from scooper.sources.report import LoggingReport
 
 _logger = get_logger()
@@ -37,9 +40,10 @@ class CloudTrail(LogSource):
     def __init__(self, level: str) -> None:
         super().__init__(level)
         self._service = self.__class__.__name__
-        self._client = client(self._service.lower())
+        self._client = instrument(client(self._service.lower()))
 
-    def enumerate(self) -> list[dict]:
+    @profiled
+    def enumerate(self) -> list[Trail]:
         _logger.info("Enumerating %s...", self._service)
         trails = paginate(self._client, "list_trails", "Trails")
 
@@ -49,12 +53,18 @@ class CloudTrail(LogSource):
             includeShadowTrails=False,
         )["trailList"]
 
-        return [self._client.get_trail(Name=trail["Name"])["Trail"] for trail in trails]
+        return [
+            Trail(self._client.get_trail(Name=trail["Name"])["Trail"])
+            for trail in trails
+        ]
 
+    @profiled
     def get_report(self) -> LoggingReport:
         logging_enabled = False
 
-        for trail in (trails := self.enumerate()):
+        trails = self.enumerate()
+
+        for i, trail in enumerate(trails):
             if (
                 (trail["IsOrganizationTrail"] and self.level == ORG)
                 or (not trail["IsOrganizationTrail"] and self.level == ACCOUNT)
@@ -67,7 +77,7 @@ class CloudTrail(LogSource):
                     )
                     del event_selectors["TrailARN"]
                     del event_selectors["ResponseMetadata"]
-                    trail.update(event_selectors)
+                    trails[i] = Trail({**trail, **event_selectors})
                 else:
                     _logger.info(
                         "%s trail '%s' is already configured!",
@@ -22,31 +22,109 @@ Notwithstanding the foregoing, third party components included herein are subjec
 noted in the files associated with those components.
 """
 
-from typing import Optional
+from collections import Counter
+from heapq import heappush, heapreplace
+from pathlib import Path
+from typing import Any, Optional
 
 from boto3 import client
 from botocore.client import BaseClient
 
 from scooper.core.config import ScooperConfig
 from scooper.core.constants import ORG
+from scooper.core.utils.io import NDJSONWriter, ShardedReportWriter
 from scooper.core.utils.logger import get_logger
-from scooper.core.utils.organizations import get_all_accounts
-from scooper.core.utils.paginate import paginate
+from scooper.core.utils.metrics import instrument
+from scooper.core.utils.paginate import iter_pages
+from scooper.core.utils.profiling import profiled
 from scooper.core.utils.sts import assume_role
+from scooper.core.utils.tracing import TRACER
 from scooper.sources import LogSource
+from scooper.sources.records import LogGroup
 from scooper.sources.report import LoggingReport
 
+TOP_N_LOG_GROUPS = 10
+
 _logger = get_logger()
 
 
+class LogGroupSummary:
+    """Aggregates of an account's Log Groups, computed one Log Group at a time."""
+
+    def __init__(self, top_n: int = TOP_N_LOG_GROUPS) -> None:
+        self._top_n = top_n
+        self._largest: list[tuple[int, str, dict]] = []
+        self.log_group_count = 0
+        self.stored_bytes = 0
+        self.kms_encrypted_count = 0
+        self.retention_histogram: Counter[str] = Counter()
+
+    def add(self, log_group: dict) -> None:
+        stored_bytes = log_group.get("storedBytes", 0)
+
+        self.log_group_count += 1
+        self.stored_bytes += stored_bytes
+        self.kms_encrypted_count += "kmsKeyId" in log_group
+        self.retention_histogram[str(log_group.get("retentionInDays", "never"))] += 1
+
+        # Keep a min-heap of the largest Log Groups seen so far
+        entry = (stored_bytes, log_group["logGroupName"], log_group)
+        if len(self._largest) < self._top_n:
+            heappush(self._largest, entry)
+        elif entry[:2] > self._largest[0][:2]:
+            heapreplace(self._largest, entry)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "log_group_count": self.log_group_count,
+            "stored_bytes": self.stored_bytes,
+            "retention_histogram": dict(self.retention_histogram),
+            "kms_encrypted_fraction": (
+                self.kms_encrypted_count / self.log_group_count
+                if self.log_group_count
+                else 0.0
+            ),
+            "largest_log_groups": [
+                {
+                    "logGroupName": log_group["logGroupName"],
+                    "storedBytes": stored_bytes,
+                    "retentionInDays": log_group.get("retentionInDays"),
+                    "kmsKeyId": log_group.get("kmsKeyId"),
+                }
+                for stored_bytes, _, log_group in sorted(
+                    self._largest, key=lambda entry: entry[:2], reverse=True
+                )
+            ],
+        }
+
+
 class CloudWatch(LogSource):
-    def __init__(self, level: str, scooper_config: ScooperConfig) -> None:
+    def __init__(
+        self,
+        level: str,
+        scooper_config: ScooperConfig,
+        summary: bool = False,
+        listing_path: Optional[Path] = None,
+        writer: Optional[ShardedReportWriter] = None,
+    ) -> None:
         super().__init__(level)
         self._scooper_config = scooper_config
         self._service = self.__class__.__name__
-        self._client = client("logs")
+        self._client = instrument(client("logs"))
+        self._summary = summary
+        self._listing_path = listing_path
+        self._listing: Optional[NDJSONWriter] = None
+        self._writer = writer
+        self._log_group_count = 0
+        self._account_count = 0
+
+    def _list_log_group(self, account_id: str, log_group: dict) -> None:
+        if self._listing is not None:
+            self._listing.write({"accountId": account_id, **log_group})
 
-    def _get_log_groups(self, logs_client: Optional[BaseClient] = None) -> list[dict]:
+    def _get_log_groups(
+        self, account_id: str, logs_client: Optional[BaseClient] = None
+    ) -> list[LogGroup]:
         if logs_client is None:
             # For account-level use
             _client = self._client
@@ -54,41 +132,126 @@ class CloudWatch(LogSource):
             # For org-level use
             _client = logs_client
 
-        return paginate(_client, "describe_log_groups", "logGroups")
+        # Hold each page's Log Groups as records, rather than all of them as dicts at once
+        records = []
+        for log_groups in iter_pages(_client, "describe_log_groups", "logGroups"):
+            for log_group in log_groups:
+                self._list_log_group(account_id, log_group)
+                records.append(LogGroup(log_group))
+        return records
+
+    def _summarize_log_groups(
+        self, account_id: str, logs_client: Optional[BaseClient] = None
+    ) -> dict[str, Any]:
+        """Summarize Log Groups page by page, streaming them to the listing if one is kept."""
+        summary = LogGroupSummary()
+
+        for log_groups in iter_pages(
+            logs_client or self._client, "describe_log_groups", "logGroups"
+        ):
+            for log_group in log_groups:
+                summary.add(log_group)
+                self._list_log_group(account_id, log_group)
+
+        return summary.to_dict()
+
+    def _enumerate_account(
+        self, account_id: str, logs_client: Optional[BaseClient] = None
+    ) -> Any:
+        if self._summary:
+            log_groups = self._summarize_log_groups(account_id, logs_client)
+            self._log_group_count += log_groups["log_group_count"]
+        else:
+            log_groups = self._get_log_groups(account_id, logs_client)
+            self._log_group_count += len(log_groups)
 
+        return log_groups
+
+    @staticmethod
+    def has_log_groups(log_groups: Any) -> bool:
+        """Check whether an account's enumerated Log Groups, or summary of them, has any."""
+        if isinstance(log_groups, dict):
+            return log_groups.get("log_group_count", 0) > 0
+        return len(log_groups) > 0
+
+    def enumerate_account(self, account_id: str) -> Optional[Any]:
+        """Enumerate Log Groups of organization account `account_id`, if its role can be assumed."""
+        if account_id == self._scooper_config.account_id:
+            return self._enumerate_account(account_id)
+
+        logs_client = assume_role(
+            role_arn=f"arn:aws:iam::{account_id}:role/{self._scooper_config.org_role_name}",
+            service="logs",
+        )
+        if logs_client is None:
+            return None
+        return self._enumerate_account(account_id, logs_client)
+
+    @profiled
     def enumerate(self) -> dict:
         _logger.info("Enumerating %s-level %s Log Groups...", self.level, self._service)
 
         if self.level == ORG:
             cw_log_groups = {}
-            for account in get_all_accounts():
+            for account in self._scooper_config.accounts:
                 account_id = account["Id"]
                 _logger.info(
                     "Enumerating Log Groups in account '%s' (%s)...",
                     account["Name"],
                     account_id,
                 )
-                if account_id == self._scooper_config.account_id:
-                    cw_log_groups[account_id] = self._get_log_groups()
-                else:
-                    logs_client = assume_role(
-                        role_arn=f"arn:aws:iam::{account_id}:role/{self._scooper_config.org_role_name}",
-                        service="logs",
-                    )
-                    if logs_client is not None:
-                        cw_log_groups[account_id] = self._get_log_groups(logs_client)
+                with TRACER.span(account_id, "account", source=self._service):
+                    if (log_groups := self.enumerate_account(account_id)) is None:
+                        continue
+                    self._account_count += 1
+
+                    if self._writer is not None:
+                        # Write account's shard as soon as it's done rather than holding onto it
+                        self._writer.write(account_id, log_groups)
+                    else:
+                        cw_log_groups[account_id] = log_groups
             return cw_log_groups
         else:
-            return self._get_log_groups()
+            return self._enumerate_account(self._scooper_config.account_id)
 
+    @profiled
     def get_report(self) -> LoggingReport:
-        log_groups = self.enumerate()
+        if self._listing_path is not None:
+            self._listing = NDJSONWriter(self._listing_path)
+
+        try:
+            log_groups = self.enumerate()
+        finally:
+            if self._listing is not None:
+                self._listing.close()
+                self._listing = None
+
+        details = {"level": self.level}
+
+        if self._writer is not None and self.level == ORG:
+            details["shards"] = self._writer.close(
+                service=self._service, level=self.level
+            )
+        elif self._summary:
+            details["summary"] = log_groups
+        else:
+            details["log_groups"] = log_groups
+
+        if self._listing_path is not None:
+            # Listings are written next to the report, and referred to relative to it
+            details["listing"] = self._listing_path.name
+
+        if self._summary:
+            # Summaries only count as logging once a Log Group was found
+            logging_enabled = self._log_group_count > 0
+        elif self.level == ORG:
+            # Org-level reports are enabled once any account was enumerated, sharded or not
+            logging_enabled = self._account_count > 0
+        else:
+            logging_enabled = len(log_groups) > 0
 
         return LoggingReport(
             service=self._service,
-            logging_enabled=len(log_groups) > 0,
-            details={
-                "level": self.level,
-                "log_groups": log_groups,
-            },
+            logging_enabled=logging_enabled,
+            details=details,
         )
@@ -26,8 +26,16 @@ from boto3 import client
 
 from scooper.core.constants import SCOOPER
 from scooper.core.utils.logger import get_logger
+from scooper.core.utils.metrics import instrument
 from scooper.core.utils.paginate import paginate
+from scooper.core.utils.profiling import profiled
 from scooper.sources import LogSource
+from scooper.sources.records import (
+    AggregatorSourceStatus,
+    ConfigurationRecorder,
+    DeliveryChannel,
+    Record,
+)
 from scooper.sources.report import LoggingReport
 
 _logger = get_logger()
@@ -37,9 +45,9 @@ class Config(LogSource):
     def __init__(self, level: str) -> None:
         super().__init__(level)
         self._service = self.__class__.__name__
-        self._client = client(self._service.lower())
+        self._client = instrument(client(self._service.lower()))
 
-    def _enumerate_config_aggregators(self) -> dict[str, dict]:
+    def _enumerate_config_aggregators(self) -> dict[str, AggregatorSourceStatus]:
         _logger.info("Enumerating Configuration Aggregators...")
 
         config_aggregators = paginate(
@@ -56,18 +64,20 @@ class Config(LogSource):
         for aggregator in config_aggregators:
             config_aggregators.update(
                 {
-                    aggregator: paginate(
-                        self._client,
-                        "describe_configuration_aggregator_sources_status",
-                        "AggregatedSourceStatusList",
-                        ConfigurationAggregatorName=aggregator,
-                    )[0]
+                    aggregator: AggregatorSourceStatus(
+                        paginate(
+                            self._client,
+                            "describe_configuration_aggregator_sources_status",
+                            "AggregatedSourceStatusList",
+                            ConfigurationAggregatorName=aggregator,
+                        )[0]
+                    )
                 }
             )
 
         return config_aggregators
 
-    def _enumerate_config_recorders(self) -> dict[str, dict]:
+    def _enumerate_config_recorders(self) -> dict[str, ConfigurationRecorder]:
         _logger.info("Enumerating Configuration Recorders...")
 
         config_recorders = self._client.describe_configuration_recorders()[
@@ -82,9 +92,12 @@ class Config(LogSource):
         for status in config_recorder_status:
             config_recorders[status["name"]].update(status)
 
-        return config_recorders
+        return {
+            name: ConfigurationRecorder(recorder)
+            for name, recorder in config_recorders.items()
+        }
 
-    def _enumerate_delivery_channels(self) -> dict[str, dict]:
+    def _enumerate_delivery_channels(self) -> dict[str, DeliveryChannel]:
         _logger.info("Enumerating Delivery Channels...")
 
         delivery_channels = self._client.describe_delivery_channels()[
@@ -99,9 +112,13 @@ class Config(LogSource):
         for status in delivery_channel_status:
             delivery_channels[status["name"]].update(status)
 
-        return delivery_channels
+        return {
+            name: DeliveryChannel(channel)
+            for name, channel in delivery_channels.items()
+        }
 
-    def enumerate(self) -> tuple[dict[str, dict]]:
+    @profiled
+    def enumerate(self) -> tuple[dict[str, Record], ...]:
         _logger.info("Enumerating %s...", self._service)
 
         config_aggregators = self._enumerate_config_aggregators()
@@ -110,6 +127,7 @@ class Config(LogSource):
 
         return config_aggregators, config_recorders, delivery_channels
 
+    @profiled
     def get_report(self) -> LoggingReport:
         config_aggregators, config_recorders, delivery_channels = self.enumerate()
 
@@ -0,0 +1,215 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping
+from sys import intern
+from typing import Any, Optional
+
+
+class Record(Mapping):
+    """Immutable, slotted record of an object of a boto3 response.
+
+    Each key of the response shape a subclass knows is held in a slot of the same name,
+    rather than in a per-object dict, and repeated strings such as regions, account IDs
+    and KMS key ARNs are interned. Keys the subclass doesn't know are kept as they are.
+
+    Records read like the response dict they're made of, and are encoded back to it.
+    """
+
+    __slots__ = ("_extra",)
+
+    # Keys of slotted values, and of values shared between records
+    _fields: tuple[str, ...] = ()
+    _field_set: frozenset[str] = frozenset()
+    _interned: frozenset[str] = frozenset()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._fields = tuple(cls.__dict__.get("__slots__", ()))
+        cls._field_set = frozenset(cls._fields)
+
+    def __init__(self, obj: Mapping[str, Any]) -> None:
+        extra: Optional[dict[str, Any]] = None
+
+        for key, value in obj.items():
+            if key in self._field_set:
+                if key in self._interned and isinstance(value, str):
+                    value = intern(value)
+                object.__setattr__(self, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+
+        object.__setattr__(self, "_extra", extra)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._field_set:
+            try:
+                return object.__getattribute__(self, key)
+            except AttributeError:
+                # Absent from the response, like a missing key of its dict
+                raise KeyError(key) from None
+        if self._extra is not None:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._fields:
+            if hasattr(self, key):
+                yield key
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    # Immutable, so copies can share the record, e.g. in `dataclasses.asdict`
+    def __copy__(self) -> Record:
+        return self
+
+    def __deepcopy__(self, memo: dict) -> Record:
+        return self
+
+    def __reduce__(self) -> tuple:
+        return type(self), (self.to_dict(),)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get response dict the record was made of."""
+        return dict(self)
+
+
+class Trail(Record):
+    """Trail of `cloudtrail:GetTrail`, with its event selectors if it has custom ones."""
+
+    __slots__ = (
+        "Name",
+        "S3BucketName",
+        "S3KeyPrefix",
+        "SnsTopicName",
+        "SnsTopicARN",
+        "IncludeGlobalServiceEvents",
+        "IsMultiRegionTrail",
+        "HomeRegion",
+        "TrailARN",
+        "LogFileValidationEnabled",
+        "CloudWatchLogsLogGroupArn",
+        "CloudWatchLogsRoleArn",
+        "KmsKeyId",
+        "HasCustomEventSelectors",
+        "HasInsightSelectors",
+        "IsOrganizationTrail",
+        "EventSelectors",
+        "AdvancedEventSelectors",
+    )
+    _interned = frozenset(
+        {"S3BucketName", "HomeRegion", "CloudWatchLogsRoleArn", "KmsKeyId"}
+    )
+
+
+class LogGroup(Record):
+    """Log Group of `logs:DescribeLogGroups`."""
+
+    __slots__ = (
+        "logGroupName",
+        "creationTime",
+        "retentionInDays",
+        "metricFilterCount",
+        "arn",
+        "storedBytes",
+        "kmsKeyId",
+        "dataProtectionStatus",
+        "inheritedProperties",
+        "logGroupClass",
+        "logGroupArn",
+    )
+    _interned = frozenset({"kmsKeyId", "dataProtectionStatus", "logGroupClass"})
+
+
+class ConfigurationRecorder(Record):
+    """Configuration recorder of `config:DescribeConfigurationRecorders`, joined with its status."""
+
+    __slots__ = (
+        "name",
+        "roleARN",
+        "recordingGroup",
+        "recordingMode",
+        "recordingScope",
+        "arn",
+        "servicePrincipal",
+        "lastStartTime",
+        "lastStopTime",
+        "recording",
+        "lastStatus",
+        "lastErrorCode",
+        "lastErrorMessage",
+        "lastStatusChangeTime",
+    )
+    _interned = frozenset({"roleARN", "recordingScope", "lastStatus"})
+
+
+class DeliveryChannel(Record):
+    """Delivery channel of `config:DescribeDeliveryChannels`, joined with its status."""
+
+    __slots__ = (
+        "name",
+        "s3BucketName",
+        "s3KeyPrefix",
+        "s3KmsKeyArn",
+        "snsTopicARN",
+        "configSnapshotDeliveryProperties",
+        "configSnapshotDeliveryInfo",
+        "configHistoryDeliveryInfo",
+        "configStreamDeliveryInfo",
+    )
+    _interned = frozenset({"s3BucketName", "s3KmsKeyArn", "snsTopicARN"})
+
+
+class AggregatorSourceStatus(Record):
+    """Status of a Config aggregator's source, of `config:DescribeConfigurationAggregatorSourcesStatus`.
+
+    Reports hold the status of each aggregator's first source, keyed by aggregator name.
+    """
+
+    __slots__ = (
+        "SourceId",
+        "SourceType",
+        "AwsRegion",
+        "LastUpdateStatus",
+        "LastUpdateTime",
+        "LastErrorCode",
+        "LastErrorMessage",
+    )
+    _interned = frozenset({"SourceId", "SourceType", "AwsRegion", "LastUpdateStatus"})
@@ -44,3 +44,4 @@ class LoggingReport:
 
     event_time: datetime = field(default_factory=utc_now)
     owned_by_scooper: bool = field(default=False)
+    timings: dict[str, Any] = field(default_factory=dict)
@@ -0,0 +1,231 @@
+"""
+The resources contained herein are © His Majesty in Right of Canada as Represented by the Minister of National Defence.
+
+FOR OFFICIAL USE All Rights Reserved. All intellectual property rights subsisting in the resources contained herein are,
+and remain the property of the Government of Canada. No part of the resources contained herein may be reproduced or disseminated
+(including by transmission, publication, modification, storage, or otherwise), in any form or any means, without the written
+permission of the Communications Security Establishment (CSE), except in accordance with the provisions of the Copyright Act, such
+as fair dealing for the purpose of research, private study, education, parody or satire. Applications for such permission shall be
+made to CSE.
+
+The resources contained herein are provided “as is”, without warranty or representation of any kind by CSE, whether express or
+implied, including but not limited to the warranties of merchantability, fitness for a particular purpose and noninfringement.
+In no event shall CSE be liable for any loss, liability, damage or cost that may be suffered or incurred at any time arising
+from the provision of the resources contained herein including, but not limited to, loss of data or interruption of business.
+
+CSE is under no obligation to provide support to recipients of the resources contained herein.
+
+This licence is governed by the laws of the province of Ontario and the applicable laws of Canada. Legal proceedings related to
+this licence may only be brought in the courts of Ontario or the Federal Court of Canada.
+
+Notwithstanding the foregoing, third party components included herein are subject to the ownership and licensing provisions
+noted in the files associated with those components.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from json import JSONDecodeError, load, loads
+from pathlib import Path
+from time import sleep
+from typing import Any, Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from scooper.core.config import ScooperConfig
+from scooper.core.constants import ORG, WATCHED_EVENTS
+from scooper.core.utils.io import write_dict_to_file
+from scooper.core.utils.logger import get_logger
+from scooper.core.utils.queues import SQS_MAX_WAIT_SECONDS, Message, Queue
+from scooper.sources import native
+
+# Report each event source's changes are refreshed in
+REPORT_TITLES = {
+    "cloudtrail.amazonaws.com": "cloudtrail",
+    "config.amazonaws.com": "config",
+    "logs.amazonaws.com": "cloudwatch",
+}
+# Trails of every region are listed from any one region, unlike the others
+REGIONAL_REPORTS = {"cloudwatch", "config"}
+# Polls after a failed refresh back off exponentially up to this delay
+MAX_BACKOFF_SECONDS = 60
+
+_logger = get_logger()
+
+
+@dataclass(frozen=True)
+class Change:
+    title: str
+    account_id: str
+    region: str
+
+
+def parse_event(body: str) -> Optional[Change]:
+    """Get change to logging configuration made by EventBridge CloudTrail event `body`, if any."""
+    try:
+        event = loads(body)
+    except JSONDecodeError:
+        return None
+
+    detail = event.get("detail", {})
+    event_source = detail.get("eventSource")
+    if detail.get("eventName") not in WATCHED_EVENTS.get(event_source, ()):
+        return None
+    # Failed calls didn't change anything
+    if "errorCode" in detail:
+        return None
+
+    return Change(
+        REPORT_TITLES[event_source],
+        event.get("account") or detail.get("recipientAccountId"),
+        event.get("region") or detail.get("awsRegion"),
+    )
+
+
+def _load(path: Path) -> Any:
+    with path.open() as f:
+        return load(f)
+
+
+class InventoryRefresher:
+    """Refresher of the reports a previous run wrote to `out`, one change at a time.
+
+    CloudWatch changes only re-enumerate the changed account, and rewrite its shard at
+    org level. CloudTrail and Config reports are org-wide, and are enumerated again.
+    """
+
+    def __init__(
+        self,
+        scooper_config: ScooperConfig,
+        region: str,
+        cloudwatch_summary: bool = False,
+        out: Path = Path("out"),
+    ) -> None:
+        self._scooper_config = scooper_config
+        self._region = region
+        self._cloudwatch_summary = cloudwatch_summary
+        self._out = out
+
+    def _in_scope(self, change: Change) -> bool:
+        if change.title in REGIONAL_REPORTS and change.region != self._region:
+            return False
+        if change.title == "cloudwatch":
+            return any(
+                account["Id"] == change.account_id
+                for account in self._scooper_config.accounts
+            )
+        # Org-wide reports only cover the management account's own resources
+        return change.account_id == self._scooper_config.account_id
+
+    def refresh(self, change: Change) -> bool:
+        """Refresh report affected by `change`, returning whether it was in scope."""
+        if not self._in_scope(change):
+            _logger.debug("Ignoring out of scope change %s", change)
+            return False
+
+        _logger.info(
+            "Refreshing %s of account %s in %s...",
+            change.title,
+            change.account_id,
+            change.region,
+        )
+        if change.title == "cloudwatch" and self._scooper_config.level == ORG:
+            return self._refresh_cloudwatch_shard(change.account_id)
+
+        if change.title == "cloudwatch":
+            source = native.CloudWatch(
+                self._scooper_config.level,
+                self._scooper_config,
+                summary=self._cloudwatch_summary,
+            )
+        elif change.title == "cloudtrail":
+            source = native.CloudTrail(self._scooper_config.level)
+        else:
+            source = native.Config(self._scooper_config.level)
+        write_dict_to_file(asdict(source.report), self._out / f"{change.title}.json")
+
+        return True
+
+    def _refresh_cloudwatch_shard(self, account_id: str) -> bool:
+        report_path = self._out / "cloudwatch.json"
+        report = _load(report_path)
+        if "shards" not in report["details"]:
+            raise ValueError(
+                f"{report_path} has no per-account shards to refresh, run Scooper again"
+            )
+
+        index_path = self._out / report["details"]["shards"]
+        index = _load(index_path)
+
+        cloudwatch = native.CloudWatch(
+            ORG, self._scooper_config, summary=self._cloudwatch_summary
+        )
+        if (log_groups := cloudwatch.enumerate_account(account_id)) is None:
+            return False
+
+        shard_path = index_path.parent / f"{account_id}.json"
+        write_dict_to_file(log_groups, shard_path)
+        index["shards"][account_id] = {
+            "path": shard_path.relative_to(self._out).as_posix(),
+            "bytes": shard_path.stat().st_size,
+        }
+        index["shards"] = dict(sorted(index["shards"].items()))
+        write_dict_to_file(index, index_path)
+
+        report["logging_enabled"] = any(
+            native.CloudWatch.has_log_groups(_load(self._out / shard["path"]))
+            for shard in index["shards"].values()
+        )
+        report["event_time"] = datetime.now(tz=timezone.utc)
+        write_dict_to_file(report, report_path)
+
+        return True
+
+
+def watch(
+    queue: Queue,
+    refresher: InventoryRefresher,
+    wait_seconds: int = SQS_MAX_WAIT_SECONDS,
+    once: bool = False,
+) -> int:
+    """Refresh reports as changes arrive on `queue`, returning how many were refreshed.
+
+    Messages of a change that failed to refresh are left on the queue to be retried once
+    visible again, and polls back off while changes keep failing.
+    If `once`, return as soon as no message is left to receive, failing ones being hidden.
+    """
+    refreshed = 0
+    failures = 0
+
+    while True:
+        messages = queue.receive(wait_seconds)
+        if not messages and once:
+            return refreshed
+
+        # A batch often holds many events of a single change, e.g. a Log Group per call
+        changes: dict[Change, list[Message]] = {}
+        failed = False
+        for message in messages:
+            if (change := parse_event(message.body)) is None:
+                queue.delete(message)
+            else:
+                changes.setdefault(change, []).append(message)
+
+        for change, change_messages in changes.items():
+            try:
+                refreshed += refresher.refresh(change)
+            except (BotoCoreError, ClientError, OSError, ValueError) as e:
+                _logger.error("Failed to refresh %s: %s", change, e)
+                failed = True
+                continue
+            for message in change_messages:
+                queue.delete(message)
+
+        if not failed:
+            failures = 0
+        elif not once:
+            delay = min(2**failures, MAX_BACKOFF_SECONDS)
+            failures += 1
+            _logger.info("Backing off for %d seconds after failed refreshes", delay)
+            sleep(delay)